@@ -0,0 +1,359 @@
+"""
+Декларативная конфигурация кластера: plan / apply
+
+Описание кластера (YAML или JSON) сравнивается с текущим состоянием, прочитанным
+параллельными командами rac, и применяются только отличающиеся параметры.
+Повторное применение к уже приведённому кластеру не выполняет ни одной записи.
+
+Формат описания:
+
+    cluster:                      # параметры кластера (как в update_cluster)
+      expiration_timeout: 60
+      kill_problem_processes: true
+    servers:                      # рабочие серверы, сопоставляются по name (или agent_host)
+      - name: "Центральный сервер"
+        memory_limit: 0
+        connections_limit: 256
+        rules:                    # желаемый список ТНФ (как в sync_rules)
+          - object_type: ""
+            rule_type: auto
+    admins:                       # администраторы кластера
+      - name: admin
+        password: secret          # используется только при регистрации
+    admins_exclusive: false       # удалять администраторов, не указанных в описании
+    apply_rules: full             # применить ТНФ после изменения (full|partial)
+"""
+import yaml
+from .parallel import run_parallel
+from .rule_sync import plan_rule_sync
+from .views import _parse_cluster_list, _parse_server_list, _parse_rule_list
+
+# Параметры, которые поддерживают update_cluster / update_server в RACClient
+CLUSTER_PARAMS = (
+    'name', 'expiration_timeout', 'lifetime_limit', 'max_memory_size', 'max_memory_time_limit',
+    'security_level', 'session_fault_tolerance_level', 'load_balancing_mode', 'errors_count_threshold',
+    'kill_problem_processes', 'kill_by_memory_with_dump', 'allow_access_right_audit_events_recording',
+    'ping_period', 'ping_timeout', 'restart_schedule',
+)
+SERVER_PARAMS = (
+    'port_range', 'using', 'infobases_limit', 'memory_limit', 'connections_limit', 'dedicate_managers',
+    'safe_working_processes_memory_limit', 'safe_call_memory_limit', 'critical_total_memory',
+    'temporary_allowed_total_memory', 'temporary_allowed_total_memory_time_limit',
+    'service_principal_name', 'restart_schedule',
+)
+TOP_LEVEL_KEYS = ('cluster', 'servers', 'admins', 'admins_exclusive', 'apply_rules')
+
+
+class ConfigError(ValueError):
+    """Ошибка в описании конфигурации кластера"""
+
+
+def load_config(source):
+    """
+    Загружает и проверяет описание кластера.
+
+    Args:
+        source: dict или текст YAML/JSON
+
+    Returns:
+        dict: Проверенное описание
+
+    Raises:
+        ConfigError: Если описание некорректно
+    """
+    if isinstance(source, str):
+        try:
+            # JSON является подмножеством YAML, поэтому достаточно одного загрузчика
+            source = yaml.safe_load(source)
+        except yaml.YAMLError as e:
+            raise ConfigError(f'Ошибка разбора конфигурации: {e}')
+
+    if not isinstance(source, dict):
+        raise ConfigError('Конфигурация должна быть объектом')
+
+    unknown = set(source) - set(TOP_LEVEL_KEYS)
+    if unknown:
+        raise ConfigError(f'Неизвестные разделы конфигурации: {", ".join(sorted(unknown))}')
+
+    cluster = source.get('cluster') or {}
+    if not isinstance(cluster, dict):
+        raise ConfigError('Раздел cluster должен быть объектом')
+    unknown = set(cluster) - set(CLUSTER_PARAMS)
+    if unknown:
+        raise ConfigError(f'Неизвестные параметры кластера: {", ".join(sorted(unknown))}')
+
+    servers = source.get('servers') or []
+    if not isinstance(servers, list):
+        raise ConfigError('Раздел servers должен быть списком')
+    for server in servers:
+        if not isinstance(server, dict) or not (server.get('name') or server.get('agent_host')):
+            raise ConfigError('Для каждого сервера требуется name или agent_host')
+        unknown = set(server) - set(SERVER_PARAMS) - {'name', 'agent_host', 'rules'}
+        if unknown:
+            raise ConfigError(f'Неизвестные параметры сервера: {", ".join(sorted(unknown))}')
+        if 'rules' in server and not isinstance(server['rules'], list):
+            raise ConfigError('Раздел rules сервера должен быть списком')
+
+    admins = source.get('admins')
+    if admins is not None:
+        if not isinstance(admins, list) or any(not isinstance(a, dict) or not a.get('name') for a in admins):
+            raise ConfigError('Для каждого администратора требуется name')
+
+    if source.get('apply_rules') not in (None, '', 'full', 'partial'):
+        raise ConfigError('apply_rules должен быть full или partial')
+
+    return {
+        'cluster': cluster,
+        'servers': servers,
+        'admins': admins,
+        'admins_exclusive': bool(source.get('admins_exclusive', False)),
+        'apply_rules': source.get('apply_rules') or None,
+    }
+
+
+def _normalize_value(value):
+    """Приводит значение к виду, в котором его выводит rac"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    return str(value).strip().strip('"')
+
+
+def _diff_params(desired, current_data, allowed):
+    """Возвращает отличающиеся параметры {key: {'from': ..., 'to': ...}}"""
+    diff = {}
+    for key in allowed:
+        if key not in desired:
+            continue
+        current = _normalize_value(current_data.get(key.replace('_', '-')))
+        target = _normalize_value(desired[key])
+        if current != target:
+            diff[key] = {'from': current, 'to': desired[key]}
+    return diff
+
+
+def _parse_admin_names(output):
+    """Извлекает имена администраторов из вывода cluster admin list"""
+    names = []
+    for line in (output or '').split('\n'):
+        if ':' in line:
+            key, value = line.split(':', 1)
+            if key.strip() == 'name':
+                names.append(value.strip().strip('"'))
+    return names
+
+
+def _find_server(servers, desired):
+    name = desired.get('name')
+    host = desired.get('agent_host')
+    for server in servers:
+        if name and server.get('name') == name:
+            return server
+        if not name and host and server.get('host') == host:
+            return server
+    return None
+
+
+def fetch_state(rac_client, cluster_uuid, config, max_workers=None):
+    """
+    Читает текущее состояние кластера параллельными командами rac.
+
+    Читаются только разделы, присутствующие в описании: cluster list, server list,
+    cluster admin list, затем rule list для серверов с заданными правилами.
+
+    Args:
+        max_workers: Число одновременных команд (1 - последовательно, если
+            кластеры сами обрабатываются параллельно)
+
+    Returns:
+        dict: {'cluster': {...}, 'servers': [...], 'admins': [...], 'rules': {server_uuid: [...]}}
+
+    Raises:
+        ConfigError: Если чтение не удалось
+    """
+    reads = {}
+    if config['cluster']:
+        reads['cluster'] = rac_client.get_cluster_list
+    if config['servers']:
+        reads['servers'] = lambda: rac_client.get_server_list(cluster_uuid)
+    if config['admins'] is not None:
+        reads['admins'] = lambda: rac_client.cluster_admin_list(cluster_uuid)
+
+    names = list(reads)
+    results = dict(zip(names, run_parallel(lambda name: reads[name](), names, max_workers)))
+    for name, result in results.items():
+        if not result['success']:
+            raise ConfigError(f'Не удалось прочитать {name}: {result.get("error")}')
+
+    state = {'cluster': None, 'servers': [], 'admins': [], 'rules': {}}
+    if 'cluster' in results:
+        for cluster in _parse_cluster_list(results['cluster']['output']):
+            if cluster['uuid'] == cluster_uuid:
+                state['cluster'] = cluster['data']
+                break
+        if state['cluster'] is None:
+            raise ConfigError('Кластер не найден')
+    if 'servers' in results:
+        state['servers'] = _parse_server_list(results['servers']['output'])
+    if 'admins' in results:
+        state['admins'] = _parse_admin_names(results['admins']['output'])
+
+    # Правила читаем только для серверов, у которых они описаны
+    rule_servers = []
+    for desired in config['servers']:
+        server = _find_server(state['servers'], desired)
+        if server and 'rules' in desired:
+            rule_servers.append(server['uuid'])
+    rule_results = run_parallel(lambda uuid: rac_client.get_rule_list(cluster_uuid, uuid), rule_servers, max_workers)
+    for server_uuid, result in zip(rule_servers, rule_results):
+        if not result['success']:
+            raise ConfigError(f'Не удалось прочитать правила сервера {server_uuid}: {result.get("error")}')
+        state['rules'][server_uuid] = _parse_rule_list(result['output'])
+
+    return state
+
+
+def plan_changes(config, state, current_admin=None):
+    """
+    Сравнивает описание с текущим состоянием.
+
+    Args:
+        config: Результат load_config
+        state: Результат fetch_state
+        current_admin: Администратор, от имени которого выполняются команды (не удаляется)
+
+    Returns:
+        tuple: (changes, errors) - список изменений и список ошибок сопоставления
+    """
+    changes = []
+    errors = []
+
+    if config['cluster']:
+        diff = _diff_params(config['cluster'], state['cluster'], CLUSTER_PARAMS)
+        if diff:
+            changes.append({'object': 'cluster', 'action': 'update', 'params': diff})
+
+    for desired in config['servers']:
+        label = desired.get('name') or desired.get('agent_host')
+        server = _find_server(state['servers'], desired)
+        if server is None:
+            # Регистрация и удаление серверов не выполняются автоматически
+            errors.append(f'Рабочий сервер {label} не найден в кластере')
+            continue
+
+        diff = _diff_params(desired, server['data'], SERVER_PARAMS)
+        if diff:
+            changes.append({
+                'object': f'server:{label}', 'action': 'update',
+                'server_uuid': server['uuid'], 'params': diff
+            })
+
+        if 'rules' in desired:
+            try:
+                operations = plan_rule_sync(state['rules'].get(server['uuid'], []), desired['rules'])
+            except ValueError as e:
+                errors.append(f'{label}: {e}')
+                continue
+            if operations:
+                changes.append({
+                    'object': f'rules:{label}', 'action': 'sync',
+                    'server_uuid': server['uuid'], 'operations': operations
+                })
+
+    if config['admins'] is not None:
+        existing = set(state['admins'])
+        desired_names = set()
+        for admin in config['admins']:
+            desired_names.add(admin['name'])
+            if admin['name'] not in existing:
+                changes.append({
+                    'object': f'admin:{admin["name"]}', 'action': 'register',
+                    'name': admin['name'], 'password': admin.get('password'), 'descr': admin.get('descr')
+                })
+        if config['admins_exclusive']:
+            for name in state['admins']:
+                if name not in desired_names and name != current_admin:
+                    changes.append({'object': f'admin:{name}', 'action': 'remove', 'name': name})
+
+    return changes, errors
+
+
+def public_changes(changes):
+    """Изменения для ответа API (без паролей)"""
+    result = []
+    for change in changes:
+        change = dict(change)
+        if 'password' in change:
+            change['password'] = '***' if change['password'] else None
+        result.append(change)
+    return result
+
+
+def _apply_change(rac_client, cluster_uuid, change):
+    """Выполняет одно изменение; правила одного сервера синхронизируются последовательно"""
+    action = change['action']
+    if change['object'] == 'cluster':
+        params = {key: value['to'] for key, value in change['params'].items()}
+        return rac_client.update_cluster(cluster_uuid, **params)
+    if action == 'update':
+        params = {key: value['to'] for key, value in change['params'].items()}
+        return rac_client.update_server(cluster_uuid, change['server_uuid'], **params)
+    if action == 'sync':
+        server_uuid = change['server_uuid']
+        for operation in change['operations']:
+            if operation['action'] == 'remove':
+                result = rac_client.remove_rule(cluster_uuid, server_uuid, operation['rule_uuid'])
+            elif operation['action'] == 'update':
+                result = rac_client.update_rule(cluster_uuid, server_uuid, operation['rule_uuid'],
+                                                operation['position'], **operation['fields'])
+            else:
+                result = rac_client.insert_rule(cluster_uuid, server_uuid, operation['position'],
+                                                **operation['fields'])
+            if not result['success']:
+                return result
+        return {'success': True}
+    if action == 'register':
+        return rac_client.cluster_admin_register(cluster_uuid, change['name'], change.get('password'),
+                                                 change.get('descr'))
+    return rac_client.cluster_admin_remove(cluster_uuid, change['name'])
+
+
+def apply_changes(rac_client, cluster_uuid, changes, apply_rules=None, max_workers=None):
+    """
+    Применяет изменения плана.
+
+    Параметры кластера, серверов и правила разных серверов независимы и
+    выполняются параллельно. Администраторы изменяются после них, чтобы не
+    потерять права посреди применения. ТНФ применяются один раз в конце.
+
+    Returns:
+        list: Результаты {'object', 'action', 'success', 'error'} в порядке выполнения
+    """
+    def run(change):
+        result = _apply_change(rac_client, cluster_uuid, change)
+        return {
+            'object': change['object'],
+            'action': change['action'],
+            'success': result['success'],
+            'error': result.get('error'),
+        }
+
+    stages = [
+        [c for c in changes if not c['object'].startswith('admin:')],
+        [c for c in changes if c['object'].startswith('admin:')],
+    ]
+    results = []
+    for stage in stages:
+        results.extend(run_parallel(run, stage, max_workers))
+
+    if apply_rules and any(c['action'] == 'sync' for c in changes):
+        result = rac_client.apply_rules(cluster_uuid, full=apply_rules == 'full')
+        results.append({
+            'object': 'rules',
+            'action': 'apply',
+            'success': result['success'],
+            'error': result.get('error'),
+        })
+
+    return results
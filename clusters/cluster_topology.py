@@ -0,0 +1,169 @@
+"""
+Топология кластера по пяти спискам rac
+
+Результаты server list, process list, manager list, session list и infobase
+summary list соединяются по ключам за один проход по каждому списку:
+
+- рабочий процесс и менеджер -> рабочий сервер по имени компьютера (host
+  процесса совпадает с agent-host сервера);
+- сеанс -> рабочий процесс по UUID из поля process;
+- сеанс -> информационная база по UUID из поля infobase.
+
+Для каждого ключа строится словарь (хэш-индекс), поэтому построение линейно по
+числу элементов. Элементы, для которых пара не найдена (например, процесс
+сервера, отсутствующего в server list), возвращаются в разделе unassigned.
+"""
+
+
+def _clean(value):
+    if value is None:
+        return ''
+    return str(value).strip().strip('"')
+
+
+def _host_key(value):
+    return _clean(value).lower()
+
+
+def _session_summary(session, infobase_names):
+    data = session.get('data', {})
+    infobase = _clean(data.get('infobase'))
+    return {
+        'uuid': session['uuid'],
+        'session_id': _clean(data.get('session-id')),
+        'infobase': infobase,
+        'infobase_name': infobase_names.get(infobase, infobase),
+        'user_name': _clean(data.get('user-name')),
+        'app_id': _clean(data.get('app-id')),
+        'host': _clean(data.get('host')),
+        'started_at': _clean(data.get('started-at')),
+        'last_active_at': _clean(data.get('last-active-at')),
+        'hibernate': _clean(data.get('hibernate')),
+    }
+
+
+def build_topology(servers, processes, managers, sessions, infobases, include_sessions=True):
+    """
+    Строит вложенную структуру кластера.
+
+    Args:
+        servers, processes, managers, sessions, infobases: Результаты _parse_*_list
+            (None - список не получен)
+        include_sessions: Вкладывать сведения о сеансах; иначе - только их число
+
+    Returns:
+        dict: {'servers': [сервер -> managers, processes -> sessions],
+               'infobases': [база -> sessions], 'unassigned': {...}, 'counts': {...}}
+    """
+    servers = servers or []
+    processes = processes or []
+    managers = managers or []
+    sessions = sessions or []
+    infobases = infobases or []
+
+    infobase_names = {ib['uuid']: ib.get('name', '') for ib in infobases}
+
+    server_nodes = []
+    servers_by_host = {}
+    for server in servers:
+        data = server.get('data', {})
+        node = {
+            'uuid': server['uuid'],
+            'name': server.get('name', ''),
+            'host': _clean(data.get('agent-host')) or server.get('host', ''),
+            'port': _clean(data.get('agent-port')),
+            'data': data,
+            'managers': [],
+            'processes': [],
+            'sessions_count': 0,
+        }
+        server_nodes.append(node)
+        servers_by_host.setdefault(_host_key(node['host']), node)
+
+    unassigned = {'managers': [], 'processes': [], 'sessions': []}
+
+    for manager in managers:
+        data = manager.get('data', {})
+        node = {
+            'uuid': manager['uuid'],
+            'host': _clean(data.get('host')),
+            'pid': _clean(data.get('pid')),
+            'descr': _clean(data.get('descr')),
+            'data': data,
+        }
+        server = servers_by_host.get(_host_key(node['host']))
+        (server['managers'] if server else unassigned['managers']).append(node)
+
+    processes_by_uuid = {}
+    for process in processes:
+        data = process.get('data', {})
+        node = {
+            'uuid': process['uuid'],
+            'host': _clean(data.get('host')),
+            'port': _clean(data.get('port')),
+            'pid': _clean(data.get('pid')),
+            'data': data,
+            'sessions': [],
+            'sessions_count': 0,
+        }
+        processes_by_uuid[node['uuid']] = node
+        server = servers_by_host.get(_host_key(node['host']))
+        node['server_uuid'] = server['uuid'] if server else None
+        (server['processes'] if server else unassigned['processes']).append(node)
+
+    infobase_nodes = []
+    infobases_by_uuid = {}
+    for infobase in infobases:
+        node = {
+            'uuid': infobase['uuid'],
+            'name': infobase.get('name', ''),
+            'descr': _clean(infobase.get('data', {}).get('descr')),
+            'sessions': [],
+            'sessions_count': 0,
+        }
+        infobase_nodes.append(node)
+        infobases_by_uuid[node['uuid']] = node
+
+    sessions_without_process = 0
+    for session in sessions:
+        data = session.get('data', {})
+        summary = _session_summary(session, infobase_names) if include_sessions else None
+
+        process = processes_by_uuid.get(_clean(data.get('process')))
+        if process is not None:
+            process['sessions_count'] += 1
+            if include_sessions:
+                process['sessions'].append(summary)
+        else:
+            # Сеансы без процесса (спящие, не обслуживаемые процессом) - отдельно
+            sessions_without_process += 1
+            if include_sessions:
+                unassigned['sessions'].append(summary)
+
+        infobase = infobases_by_uuid.get(_clean(data.get('infobase')))
+        if infobase is not None:
+            infobase['sessions_count'] += 1
+            if include_sessions:
+                infobase['sessions'].append(summary)
+
+    for server in server_nodes:
+        server['sessions_count'] = sum(process['sessions_count'] for process in server['processes'])
+
+    if not include_sessions:
+        for node in list(processes_by_uuid.values()) + infobase_nodes:
+            del node['sessions']
+        del unassigned['sessions']
+
+    return {
+        'servers': server_nodes,
+        'infobases': infobase_nodes,
+        'unassigned': unassigned,
+        'counts': {
+            'servers': len(servers),
+            'managers': len(managers),
+            'processes': len(processes),
+            'sessions': len(sessions),
+            'infobases': len(infobases),
+            'sessions_without_process': sessions_without_process,
+        },
+    }
@@ -0,0 +1,668 @@
+#!/usr/bin/env python3
+"""
+Имитатор утилиты rac для нагрузочного тестирования без кластера 1С
+
+Использование: указать путь к этому файлу в системной настройке rac_path
+(или в переменной окружения RAC_PATH) - файл должен быть исполняемым.
+Django при этом не импортируется, поэтому запуск быстрый.
+
+Данные генерируются детерминированно: одни и те же UUID и значения
+возвращаются при каждом вызове, а UUID содержит номер объекта, поэтому
+команды info отвечают без перебора списка. Счётчики сеансов (вызовы, время
+процессора, объём данных) и память процессов растут со временем, как на
+работающем кластере. Команды изменения всегда успешны и состояние не меняют.
+
+Параметры задаются переменными окружения (rac_client передаёт окружение процессу):
+
+    FAKE_RAC_SEED            Начальное значение генератора (default)
+    FAKE_RAC_CLUSTERS        Число кластеров (1)
+    FAKE_RAC_SERVERS         Число рабочих серверов в кластере (2)
+    FAKE_RAC_PROCESSES       Число рабочих процессов в кластере (4)
+    FAKE_RAC_INFOBASES       Число информационных баз в кластере (20)
+    FAKE_RAC_SESSIONS        Число сеансов в кластере (200)
+    FAKE_RAC_RULES           Число требований назначения на сервере (3)
+    FAKE_RAC_BLOCKED_RATE    Доля сеансов, ожидающих блокировку другого сеанса (0.01)
+    FAKE_RAC_LATENCY_MS      Задержка каждой команды, мс (0)
+    FAKE_RAC_JITTER_MS       Случайная добавка к задержке, мс (0)
+    FAKE_RAC_ENCODING        Кодировка вывода: utf-8 или cp1251 (utf-8)
+    FAKE_RAC_FAILURE_RATE    Доля команд, завершающихся ошибкой (0)
+    FAKE_RAC_TIMEOUT_RATE    Доля команд, которые «зависают» (0)
+    FAKE_RAC_HANG_SECONDS    Длительность «зависания», сек (3600)
+    FAKE_RAC_DOWN_HOSTS      Недоступные адреса через запятую: host или host:port
+    FAKE_RAC_CLUSTER_ADMIN   Если задан - команды кластера требуют --cluster-user с этим именем
+"""
+import hashlib
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+APP_IDS = ['1CV8C', '1CV8C', '1CV8C', 'WebClient', 'BackgroundJob', 'Designer', 'COMConnection', 'WSConnection']
+USER_NAMES = ['Иванов', 'Петров', 'Сидорова', 'Кузнецов', 'Смирнова', 'Администратор', 'Бухгалтер', 'Кассир']
+HOSTS = ['WS-01', 'WS-02', 'WS-03', 'TERM-01', 'TERM-02', 'APP-01']
+INFOBASE_NAMES = ['Бухгалтерия', 'ЗУП', 'УТ', 'ERP', 'Документооборот', 'Розница', 'КА', 'Склад']
+RULE_OBJECT_TYPES = ['', 'Connection', 'BackgroundJob', 'ExternalConnection', 'ClientWebConnection']
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+SEED = os.environ.get('FAKE_RAC_SEED', 'default')
+COUNTS = {
+    'cluster': _env_int('FAKE_RAC_CLUSTERS', 1),
+    'server': _env_int('FAKE_RAC_SERVERS', 2),
+    'process': _env_int('FAKE_RAC_PROCESSES', 4),
+    'infobase': _env_int('FAKE_RAC_INFOBASES', 20),
+    'session': _env_int('FAKE_RAC_SESSIONS', 200),
+    'rule': _env_int('FAKE_RAC_RULES', 3),
+    'manager': 1,
+}
+
+# Начало суток - точка отсчёта для растущих счётчиков
+NOW = time.time()
+DAY_START = NOW - NOW % 86400
+
+
+class RacError(Exception):
+    """Ошибка, которую rac выводит в stderr"""
+
+
+def _digest(*parts):
+    return hashlib.sha256(':'.join(str(p) for p in (SEED,) + parts).encode('utf-8')).hexdigest()
+
+
+def _rand(*parts):
+    """Детерминированное число [0, 1) для объекта"""
+    return int(_digest(*parts)[:13], 16) / float(1 << 52)
+
+
+def make_uuid(kind, scope, index):
+    """UUID объекта: 20 символов - хэш вида и области, 12 последних - номер объекта"""
+    prefix = _digest('uuid', kind, scope)
+    return f'{prefix[:8]}-{prefix[8:12]}-{prefix[12:16]}-{prefix[16:20]}-{index:012x}'
+
+
+def parse_uuid(kind, scope, value):
+    """Возвращает номер объекта по UUID или None, если объекта нет"""
+    value = (value or '').strip()
+    if len(value) != 36:
+        return None
+    try:
+        index = int(value[-12:], 16)
+    except ValueError:
+        return None
+    if make_uuid(kind, scope, index) != value or index >= COUNTS[kind]:
+        return None
+    return index
+
+
+def _ts(seconds):
+    return datetime.fromtimestamp(seconds).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def _block(kind, uuid, fields):
+    lines = [f'{kind:<33}: {uuid}']
+    lines.extend(f'{key:<33}: {value}' for key, value in fields)
+    return '\n'.join(lines) + '\n'
+
+
+# --- Генерация объектов ---
+
+def cluster_fields(i):
+    return [
+        ('host', f'srv-1c-{i + 1:02d}'),
+        ('port', 1541 + i * 100),
+        ('name', f'"Кластер {i + 1}"'),
+        ('expiration-timeout', 0),
+        ('lifetime-limit', 0),
+        ('max-memory-size', 0),
+        ('max-memory-time-limit', 0),
+        ('security-level', 0),
+        ('session-fault-tolerance-level', 0),
+        ('load-balancing-mode', 'performance'),
+        ('errors-count-threshold', 0),
+        ('kill-problem-processes', 'yes'),
+        ('kill-by-memory-with-dump', 'no'),
+        ('allow-access-right-audit-events-recording', 'no'),
+        ('ping-period', 0),
+        ('ping-timeout', 0),
+        ('restart-schedule', ''),
+    ]
+
+
+def server_fields(cluster, i):
+    return [
+        ('agent-host', f'srv-1c-{i + 1:02d}'),
+        ('agent-port', 1540),
+        ('port-range', '1560:1591'),
+        ('name', f'"Рабочий сервер {i + 1}"'),
+        ('using', 'main'),
+        ('dedicate-managers', 'none'),
+        ('infobases-limit', 8),
+        ('memory-limit', 0),
+        ('connections-limit', 128),
+        ('cluster-port', 1541),
+        ('safe-working-processes-memory-limit', 0),
+        ('safe-call-memory-limit', 0),
+        ('critical-total-memory', 0),
+        ('temporary-allowed-total-memory', 0),
+        ('temporary-allowed-total-memory-time-limit', 300),
+        ('service-principal-name', ''),
+        ('restart-schedule', ''),
+    ]
+
+
+def process_fields(cluster, i):
+    started = DAY_START + int(_rand('process-start', cluster, i) * 3600)
+    # Память растёт и сбрасывается (перезапуск процесса) с периодом около часа
+    period = 1800 + int(_rand('process-period', cluster, i) * 3600)
+    base_kb = 500_000 + int(_rand('process-mem', cluster, i) * 1_500_000)
+    memory_kb = base_kb + int((NOW - started) % period * 1000)
+    server = i % COUNTS['server']
+    return [
+        ('host', f'srv-1c-{server + 1:02d}'),
+        ('port', 1560 + i),
+        ('pid', 10000 + i * 7),
+        ('turned-on', 'yes'),
+        ('running', 'yes'),
+        ('started-at', _ts(started)),
+        ('use', 'used'),
+        ('available-perfomance', 100 + int(_rand('process-perf', cluster, i) * 200)),
+        ('capacity', 1000),
+        ('connections', COUNTS['session'] // max(COUNTS['process'], 1)),
+        ('memory-size', memory_kb),
+        ('memory-excess-time', 0),
+        ('selection-size', 61440),
+        ('avg-back-call-time', 0.001),
+        ('avg-call-time', round(0.05 + _rand('process-call', cluster, i) * 0.5, 3)),
+        ('avg-db-call-time', round(0.02 + _rand('process-db', cluster, i) * 0.2, 3)),
+        ('avg-lock-call-time', 0.001),
+        ('avg-server-call-time', 0.01),
+        ('avg-threads', round(1 + _rand('process-threads', cluster, i) * 4, 2)),
+        ('reserve', 'no'),
+    ]
+
+
+def infobase_name(i):
+    base = INFOBASE_NAMES[i % len(INFOBASE_NAMES)]
+    return base if i < len(INFOBASE_NAMES) else f'{base}_{i // len(INFOBASE_NAMES)}'
+
+
+def infobase_info_fields(cluster, i):
+    return [
+        ('name', infobase_name(i)),
+        ('dbms', 'PostgreSQL'),
+        ('db-server', 'db-01'),
+        ('db-name', f'ib_{i}'),
+        ('db-user', 'postgres'),
+        ('security-level', 0),
+        ('license-distribution', 'allow'),
+        ('scheduled-jobs-deny', 'off'),
+        ('sessions-deny', 'off'),
+        ('denied-from', ''),
+        ('denied-message', ''),
+        ('denied-parameter', ''),
+        ('denied-to', ''),
+        ('permission-code', ''),
+        ('external-session-manager-connection-string', ''),
+        ('external-session-manager-required', 'no'),
+        ('security-profile-name', ''),
+        ('safe-mode-security-profile-name', ''),
+        ('reserve-working-processes', 'no'),
+        ('descr', f'"{infobase_name(i)}"'),
+    ]
+
+
+def session_connected(cluster, i):
+    """Есть ли у сеанса соединение (conn-id соединения совпадает с номером сеанса)"""
+    return _rand('session', 'connected', cluster, i) < 0.7
+
+
+def connection_fields(cluster, i):
+    rnd = lambda name: _rand('session', name, cluster, i)
+    started = min(DAY_START + int(rnd('start') * 28800), NOW - 60)
+    return [
+        ('conn-id', i + 1),
+        ('host', HOSTS[int(rnd('host') * len(HOSTS))]),
+        ('process', make_uuid('process', cluster, i % max(COUNTS['process'], 1))),
+        ('infobase', make_uuid('infobase', cluster, i % COUNTS['infobase'])),
+        ('application', f'"{APP_IDS[int(rnd("app") * len(APP_IDS))]}"'),
+        ('connected-at', _ts(started)),
+        ('session-number', i + 1),
+        ('blocked-by-ls', 0),
+    ]
+
+
+def session_fields(cluster, i):
+    rnd = lambda name: _rand('session', name, cluster, i)
+    started = DAY_START + int(rnd('start') * 28800)
+    started = min(started, NOW - 60)
+    # Счётчики растут со временем с постоянной для сеанса скоростью
+    elapsed = max(NOW - started, 1)
+    activity = rnd('activity') ** 3  # большинство сеансов малоактивны
+    calls = int(elapsed * activity * 2)
+    cpu_ms = int(elapsed * activity * 300)
+    duration_ms = int(elapsed * activity * 500)
+    db_bytes = int(elapsed * activity * 200_000)
+    idle = int(rnd('idle') ** 2 * 7200)
+    last_active = max(NOW - idle, started)
+
+    # Ожидание блокировки сеанса той же базы: управляемой (номер сеанса)
+    # или СУБД (номер соединения - только если у блокировщика есть соединение)
+    blocked_by_ls = blocked_by_dbms = 0
+    if i >= COUNTS['infobase'] and rnd('blocked') < _env_float('FAKE_RAC_BLOCKED_RATE', 0.01):
+        blocker = i - COUNTS['infobase'] * (1 + int(rnd('blocker') * (i // COUNTS['infobase'])))
+        if session_connected(cluster, blocker) and rnd('dbms') < 0.5:
+            blocked_by_dbms = blocker + 1
+        else:
+            blocked_by_ls = blocker + 1
+
+    infobase = i % COUNTS['infobase']
+    process = i % max(COUNTS['process'], 1)
+    return [
+        ('session-id', i + 1),
+        ('infobase', make_uuid('infobase', cluster, infobase)),
+        ('connection', make_uuid('connection', cluster, i) if session_connected(cluster, i) else '00000000-0000-0000-0000-000000000000'),
+        ('process', make_uuid('process', cluster, process) if COUNTS['process'] else '00000000-0000-0000-0000-000000000000'),
+        ('user-name', USER_NAMES[int(rnd('user') * len(USER_NAMES))]),
+        ('host', HOSTS[int(rnd('host') * len(HOSTS))]),
+        ('app-id', APP_IDS[int(rnd('app') * len(APP_IDS))]),
+        ('locale', 'ru_RU'),
+        ('started-at', _ts(started)),
+        ('last-active-at', _ts(last_active)),
+        ('hibernate', 'yes' if rnd('hibernate') < 0.05 else 'no'),
+        ('passive-session-hibernate-time', 1200),
+        ('hibernate-session-terminate-time', 86400),
+        ('blocked-by-dbms', blocked_by_dbms),
+        ('blocked-by-ls', blocked_by_ls),
+        ('bytes-all', db_bytes // 10),
+        ('bytes-last-5min', int(300 * activity * 20_000)),
+        ('calls-all', calls),
+        ('calls-last-5min', int(300 * activity * 2)),
+        ('dbms-bytes-all', db_bytes),
+        ('dbms-bytes-last-5min', int(300 * activity * 200_000)),
+        ('db-proc-info', ''),
+        ('db-proc-took', 0),
+        ('db-proc-took-at', ''),
+        ('duration-all', duration_ms),
+        ('duration-all-dbms', duration_ms // 2),
+        ('duration-current', int(rnd('current') * 5000) if activity > 0.5 else 0),
+        ('duration-last-5min', int(300 * activity * 500)),
+        ('duration-last-5min-dbms', int(300 * activity * 250)),
+        ('duration-current-dbms', 0),
+        ('memory-current', int(activity * 10_000_000)),
+        ('memory-last-5min', int(activity * 50_000_000)),
+        ('memory-total', int(elapsed * activity * 100_000)),
+        ('read-current', 0),
+        ('read-last-5min', int(activity * 1_000_000)),
+        ('read-total', int(elapsed * activity * 10_000)),
+        ('write-current', 0),
+        ('write-last-5min', int(activity * 100_000)),
+        ('write-total', int(elapsed * activity * 1_000)),
+        ('duration-current-service', 0),
+        ('duration-last-5min-service', 0),
+        ('duration-all-service', 0),
+        ('current-service-name', ''),
+        ('cpu-time-current', 0),
+        ('cpu-time-last-5min', int(300 * activity * 300)),
+        ('cpu-time-total', cpu_ms),
+        ('data-separation', "''"),
+        ('client-ip', f'10.0.{i // 250 % 250}.{i % 250 + 1}'),
+    ]
+
+
+def license_fields(cluster, i, owner_fields):
+    owner = dict(owner_fields)
+    software = _rand('license', cluster, i) < 0.3
+    return [
+        ('user-name', owner.get('user-name', '')),
+        ('host', owner.get('host', '')),
+        ('app-id', owner.get('app-id', '')),
+        ('full-name', '' if software else f'"/var/1C/licenses/2023{i % 7:04d}.lic"'),
+        ('series', f'"ORG8B{i % 5:07d}"'),
+        ('issued-by-server', 'yes' if software else 'no'),
+        ('license-type', 'soft' if software else 'HASP'),
+        ('net', 'no' if software else 'yes'),
+        ('max-users-all', 50 if software else 100),
+        ('max-users-cur', 50 if software else 100),
+        ('rmngr-address', '"srv-1c-01"'),
+        ('rmngr-port', 1541),
+        ('rmngr-pid', 10000),
+        ('short-presentation', f'"Клиент, ORG8B{i % 5:07d} {50 if software else 100} шт"'),
+        ('full-presentation', f'"Клиент, {10000}, ORG8B{i % 5:07d}"'),
+    ]
+
+
+def rule_fields(server, i):
+    return [
+        ('object-type', RULE_OBJECT_TYPES[i % len(RULE_OBJECT_TYPES)]),
+        ('infobase-name', infobase_name(i) if i % 2 else ''),
+        ('rule-type', ['auto', 'always', 'never'][i % 3]),
+        ('application-ext', ''),
+        ('priority', i * 10),
+    ]
+
+
+# --- Команды ---
+
+def _require_cluster(options):
+    cluster = options.get('cluster')
+    index = parse_uuid('cluster', '', cluster)
+    if index is None:
+        raise RacError('Ошибка операции администрирования\nКластер с указанным идентификатором не найден')
+    admin = os.environ.get('FAKE_RAC_CLUSTER_ADMIN')
+    if admin and options.get('cluster-user') != admin:
+        raise RacError('Ошибка операции администрирования\nАдминистратор кластера не аутентифицирован')
+    return cluster
+
+
+def _require(kind, scope, options, key=None, message='Объект не найден'):
+    value = options.get(key or kind)
+    index = parse_uuid(kind, scope, value)
+    if index is None:
+        raise RacError(f'Ошибка операции администрирования\n{message}')
+    return index, value
+
+
+def cmd_cluster_list(options):
+    return ''.join(
+        _block('cluster', make_uuid('cluster', '', i), cluster_fields(i)) + '\n'
+        for i in range(COUNTS['cluster'])
+    )
+
+
+def cmd_cluster_info(options):
+    cluster = _require_cluster(options)
+    return _block('cluster', cluster, cluster_fields(parse_uuid('cluster', '', cluster)))
+
+
+def cmd_server_list(options):
+    cluster = _require_cluster(options)
+    return ''.join(
+        _block('server', make_uuid('server', cluster, i), server_fields(cluster, i)) + '\n'
+        for i in range(COUNTS['server'])
+    )
+
+
+def cmd_server_info(options):
+    cluster = _require_cluster(options)
+    index, uuid = _require('server', cluster, options, message='Рабочий сервер не найден')
+    return _block('server', uuid, server_fields(cluster, index))
+
+
+def cmd_process_list(options):
+    cluster = _require_cluster(options)
+    server = options.get('server')
+    server_index = parse_uuid('server', cluster, server) if server else None
+    out = []
+    for i in range(COUNTS['process']):
+        if server and i % COUNTS['server'] != server_index:
+            continue
+        # С --licenses rac выводит сведения о лицензиях вместо параметров процесса
+        fields = license_fields(cluster, i, []) if 'licenses' in options else process_fields(cluster, i)
+        out.append(_block('process', make_uuid('process', cluster, i), fields) + '\n')
+    return ''.join(out)
+
+
+def cmd_process_info(options):
+    cluster = _require_cluster(options)
+    index, uuid = _require('process', cluster, options, message='Рабочий процесс не найден')
+    if 'licenses' in options:
+        return _block('process', uuid, license_fields(cluster, index, []))
+    return _block('process', uuid, process_fields(cluster, index))
+
+
+def cmd_manager_list(options):
+    cluster = _require_cluster(options)
+    return ''.join(
+        _block('manager', make_uuid('manager', cluster, i), [
+            ('pid', 9000 + i), ('using', 'normal'), ('host', f'srv-1c-{i + 1:02d}'),
+            ('main-port', 1541), ('descr', '"Главный менеджер кластера"'),
+        ]) + '\n'
+        for i in range(COUNTS['manager'])
+    )
+
+
+def cmd_manager_info(options):
+    cluster = _require_cluster(options)
+    index, uuid = _require('manager', cluster, options, message='Менеджер кластера не найден')
+    return _block('manager', uuid, [
+        ('pid', 9000 + index), ('using', 'normal'), ('host', f'srv-1c-{index + 1:02d}'),
+        ('main-port', 1541), ('descr', '"Главный менеджер кластера"'),
+    ])
+
+
+def cmd_infobase_summary_list(options):
+    cluster = _require_cluster(options)
+    return ''.join(
+        _block('infobase', make_uuid('infobase', cluster, i), [
+            ('name', infobase_name(i)), ('descr', f'"{infobase_name(i)}"'),
+        ]) + '\n'
+        for i in range(COUNTS['infobase'])
+    )
+
+
+def cmd_infobase_info(options):
+    cluster = _require_cluster(options)
+    if 'name' in options and 'infobase' not in options:
+        names = [infobase_name(i) for i in range(COUNTS['infobase'])]
+        if options['name'] not in names:
+            raise RacError('Ошибка операции администрирования\nИнформационная база не найдена')
+        index = names.index(options['name'])
+        uuid = make_uuid('infobase', cluster, index)
+    else:
+        index, uuid = _require('infobase', cluster, options, message='Информационная база не найдена')
+    return _block('infobase', uuid, infobase_info_fields(cluster, index))
+
+
+def cmd_infobase_create(options):
+    cluster = _require_cluster(options)
+    return _block('infobase', make_uuid('infobase', cluster, COUNTS['infobase']), [])
+
+
+def cmd_session_list(options):
+    cluster = _require_cluster(options)
+    infobase = options.get('infobase')
+    infobase_index = parse_uuid('infobase', cluster, infobase) if infobase else None
+    if infobase and infobase_index is None:
+        raise RacError('Ошибка операции администрирования\nИнформационная база не найдена')
+
+    licenses = 'licenses' in options
+    out = []
+    for i in range(COUNTS['session']):
+        if infobase and i % COUNTS['infobase'] != infobase_index:
+            continue
+        uuid = make_uuid('session', cluster, i)
+        fields = session_fields(cluster, i)
+        if licenses:
+            # С --licenses rac выводит сведения о лицензиях вместо параметров сеанса
+            out.append(_block('session', uuid, license_fields(cluster, i, fields)) + '\n')
+        else:
+            out.append(_block('session', uuid, fields) + '\n')
+    return ''.join(out)
+
+
+def cmd_connection_list(options):
+    cluster = _require_cluster(options)
+    infobase = options.get('infobase')
+    infobase_index = parse_uuid('infobase', cluster, infobase) if infobase else None
+    process = options.get('process')
+    process_index = parse_uuid('process', cluster, process) if process else None
+    out = []
+    for i in range(COUNTS['session']):
+        if not session_connected(cluster, i):
+            continue
+        if infobase and i % COUNTS['infobase'] != infobase_index:
+            continue
+        if process and i % max(COUNTS['process'], 1) != process_index:
+            continue
+        out.append(_block('connection', make_uuid('connection', cluster, i), connection_fields(cluster, i)) + '\n')
+    return ''.join(out)
+
+
+def cmd_session_info(options):
+    cluster = _require_cluster(options)
+    index, uuid = _require('session', cluster, options, message='Сеанс с указанным идентификатором не найден')
+    fields = session_fields(cluster, index)
+    if 'licenses' in options:
+        return _block('session', uuid, license_fields(cluster, index, fields))
+    return _block('session', uuid, fields)
+
+
+def cmd_session_change(options):
+    cluster = _require_cluster(options)
+    _require('session', cluster, options, message='Сеанс с указанным идентификатором не найден')
+    return ''
+
+
+def cmd_process_turn_off(options):
+    cluster = _require_cluster(options)
+    _require('process', cluster, options, message='Рабочий процесс не найден')
+    return ''
+
+
+def cmd_rule_list(options):
+    cluster = _require_cluster(options)
+    server_index, server = _require('server', cluster, options, message='Рабочий сервер не найден')
+    return ''.join(
+        _block('rule', make_uuid('rule', server, i), rule_fields(server, i)) + '\n'
+        for i in range(COUNTS['rule'])
+    )
+
+
+def cmd_rule_info(options):
+    cluster = _require_cluster(options)
+    _, server = _require('server', cluster, options, message='Рабочий сервер не найден')
+    index, uuid = _require('rule', server, options, message='Требование назначения не найдено')
+    return _block('rule', uuid, rule_fields(server, index))
+
+
+def cmd_rule_insert(options):
+    cluster = _require_cluster(options)
+    _, server = _require('server', cluster, options, message='Рабочий сервер не найден')
+    return _block('rule', make_uuid('rule', server, COUNTS['rule']), [])
+
+
+def cmd_admin_list(options):
+    if 'cluster' in options:
+        _require_cluster(options)
+    return _block('name', 'Администратор', [('auth', 'pwd'), ('os-user', ''), ('descr', '')]) + '\n'
+
+
+def cmd_ok(options):
+    if 'cluster' in options:
+        _require_cluster(options)
+    return ''
+
+
+COMMANDS = {
+    ('cluster', 'list'): cmd_cluster_list,
+    ('cluster', 'info'): cmd_cluster_info,
+    ('cluster', 'update'): cmd_ok,
+    ('cluster', 'insert'): lambda options: _block('cluster', make_uuid('cluster', '', COUNTS['cluster']), []),
+    ('cluster', 'remove'): cmd_ok,
+    ('cluster', 'admin', 'list'): cmd_admin_list,
+    ('cluster', 'admin', 'register'): cmd_ok,
+    ('cluster', 'admin', 'remove'): cmd_ok,
+    ('agent', 'admin', 'list'): cmd_admin_list,
+    ('agent', 'admin', 'register'): cmd_ok,
+    ('agent', 'admin', 'remove'): cmd_ok,
+    ('server', 'list'): cmd_server_list,
+    ('server', 'info'): cmd_server_info,
+    ('server', 'insert'): lambda options: _block('server', make_uuid('server', _require_cluster(options), COUNTS['server']), []),
+    ('server', 'update'): cmd_ok,
+    ('server', 'remove'): cmd_ok,
+    ('process', 'list'): cmd_process_list,
+    ('process', 'info'): cmd_process_info,
+    ('process', 'turn-off'): cmd_process_turn_off,
+    ('manager', 'list'): cmd_manager_list,
+    ('manager', 'info'): cmd_manager_info,
+    ('infobase', 'summary', 'list'): cmd_infobase_summary_list,
+    ('infobase', 'info'): cmd_infobase_info,
+    ('infobase', 'create'): cmd_infobase_create,
+    ('infobase', 'update'): cmd_ok,
+    ('infobase', 'drop'): cmd_ok,
+    ('connection', 'list'): cmd_connection_list,
+    ('session', 'list'): cmd_session_list,
+    ('session', 'info'): cmd_session_info,
+    ('session', 'terminate'): cmd_session_change,
+    ('session', 'interrupt-current-server-call'): cmd_session_change,
+    ('rule', 'list'): cmd_rule_list,
+    ('rule', 'info'): cmd_rule_info,
+    ('rule', 'insert'): cmd_rule_insert,
+    ('rule', 'update'): cmd_ok,
+    ('rule', 'remove'): cmd_ok,
+    ('rule', 'apply'): cmd_ok,
+}
+
+
+def parse_args(argv):
+    """Разбирает аргументы rac: слова команды, параметры --key[=value] и адрес host:port"""
+    words = []
+    options = {}
+    endpoint = None
+    pending = None
+    for arg in argv:
+        if arg.startswith('--'):
+            key, sep, value = arg[2:].partition('=')
+            options[key] = value if sep else ''
+            pending = None if sep else key
+        elif ':' in arg and arg.rsplit(':', 1)[1].isdigit():
+            endpoint = arg
+        elif pending is not None and len(words) >= 2:
+            # Значение параметра, переданное отдельным аргументом (--name "значение с пробелами")
+            options[pending] = arg
+            pending = None
+        else:
+            words.append(arg)
+    return words, options, endpoint
+
+
+def run(argv):
+    words, options, endpoint = parse_args(argv)
+
+    latency = _env_float('FAKE_RAC_LATENCY_MS', 0) + random.random() * _env_float('FAKE_RAC_JITTER_MS', 0)
+    if latency > 0:
+        time.sleep(latency / 1000)
+
+    down_hosts = {h.strip() for h in os.environ.get('FAKE_RAC_DOWN_HOSTS', '').split(',') if h.strip()}
+    if endpoint and (endpoint in down_hosts or endpoint.rsplit(':', 1)[0] in down_hosts):
+        raise RacError(f'Ошибка соединения с сервером {endpoint}: Connection refused')
+
+    if random.random() < _env_float('FAKE_RAC_TIMEOUT_RATE', 0):
+        time.sleep(_env_float('FAKE_RAC_HANG_SECONDS', 3600))
+    if random.random() < _env_float('FAKE_RAC_FAILURE_RATE', 0):
+        raise RacError('Ошибка операции администрирования\nВнутренняя ошибка сервера (имитация сбоя)')
+
+    for size in (3, 2):
+        handler = COMMANDS.get(tuple(words[:size]))
+        if handler:
+            return handler(options)
+    raise RacError(f'Неизвестная команда: {" ".join(words)}')
+
+
+def main():
+    encoding = os.environ.get('FAKE_RAC_ENCODING', 'utf-8')
+    try:
+        output = run(sys.argv[1:])
+    except RacError as e:
+        sys.stderr.buffer.write((str(e) + '\n').encode(encoding, errors='replace'))
+        return 255
+    sys.stdout.buffer.write(output.encode(encoding, errors='replace'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
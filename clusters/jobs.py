@@ -0,0 +1,180 @@
+"""
+Фоновые задачи для длительных операций с кластером
+
+Задачи хранятся в таблице BackgroundJob и выполняются пулом потоков внутри
+процесса приложения (без внешнего брокера). HTTP-запрос сразу получает id
+задачи, а ход выполнения по шагам читается через API опроса.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import BackgroundJob
+from .rac_client import fix_broken_encoding
+
+logger = logging.getLogger(__name__)
+
+# Минимальный интервал между записями прогресса в БД (сек)
+PROGRESS_FLUSH_INTERVAL = 0.5
+
+_executor = None
+_executor_lock = threading.Lock()
+_process_started_at = timezone.now()
+
+
+def _get_executor():
+    """Создаёт пул исполнителей при первом обращении"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Задачи, которые остались незавершёнными после перезапуска процесса, уже не выполнятся
+            BackgroundJob.objects.filter(
+                status__in=[BackgroundJob.STATUS_PENDING, BackgroundJob.STATUS_RUNNING],
+                created_at__lt=_process_started_at
+            ).update(
+                status=BackgroundJob.STATUS_FAILED,
+                error='Задача прервана перезапуском сервера',
+                finished_at=timezone.now()
+            )
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'RAC_JOB_WORKERS', 4),
+                thread_name_prefix='job'
+            )
+        return _executor
+
+
+def get_job_timeout():
+    """Таймаут команды rac для RACClient внутри фоновой задачи"""
+    return getattr(settings, 'RAC_JOB_TIMEOUT', 900)
+
+
+class JobProgress:
+    """Учёт шагов задачи; безопасен для вызова из нескольких потоков"""
+
+    def __init__(self, job_id, steps_total):
+        self.job_id = job_id
+        self.steps_total = steps_total
+        self.steps_done = 0
+        self.current_step = ''
+        self.steps = []
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def set_total(self, steps_total):
+        with self._lock:
+            self.steps_total = steps_total
+            self._flush(force=True)
+
+    def step(self, name, func, *args, **kwargs):
+        """
+        Выполняет один шаг задачи и записывает его результат.
+
+        Args:
+            name: Описание шага для пользователя
+            func: Функция, возвращающая результат RACClient ({'success': ..., 'error': ...})
+
+        Returns:
+            dict: Результат func
+        """
+        with self._lock:
+            self.current_step = name
+            self._flush()
+
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+
+        error = result.get('error')
+        with self._lock:
+            self.steps_done += 1
+            self.steps.append({
+                'step': name,
+                'success': bool(result.get('success')),
+                'error': fix_broken_encoding(error) if error else None,
+                'duration': round(time.monotonic() - started, 3),
+            })
+            self._flush(force=self.steps_done >= self.steps_total)
+        return result
+
+    def _flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_flush < PROGRESS_FLUSH_INTERVAL:
+            return
+        self._last_flush = now
+        BackgroundJob.objects.filter(id=self.job_id).update(
+            steps_total=self.steps_total,
+            steps_done=self.steps_done,
+            current_step=self.current_step[:255],
+            steps=self.steps
+        )
+
+
+def _run_job(job_id, func, steps_total):
+    progress = JobProgress(job_id, steps_total)
+    try:
+        BackgroundJob.objects.filter(id=job_id).update(
+            status=BackgroundJob.STATUS_RUNNING,
+            started_at=timezone.now()
+        )
+        try:
+            result = func(progress) or {}
+            success = result.get('success', True)
+            error = result.get('error') or ''
+            status = BackgroundJob.STATUS_SUCCESS if success else BackgroundJob.STATUS_FAILED
+        except Exception as e:
+            logger.exception(f"Background job {job_id} failed")
+            result = None
+            error = str(e)
+            status = BackgroundJob.STATUS_FAILED
+
+        BackgroundJob.objects.filter(id=job_id).update(
+            status=status,
+            result=result,
+            error=fix_broken_encoding(error) if error else '',
+            steps_total=progress.steps_total,
+            steps_done=progress.steps_done,
+            current_step='',
+            steps=progress.steps,
+            finished_at=timezone.now()
+        )
+        logger.info(f"Background job {job_id} finished with status {status}")
+    except Exception as e:
+        logger.error(f"Background job {job_id} bookkeeping failed: {e}")
+    finally:
+        # Поток пула переиспользуется - закрываем его соединение с БД
+        connection.close()
+
+
+def submit_job(user, kind, title, func, server_connection=None, steps_total=1):
+    """
+    Ставит операцию в очередь фоновых задач.
+
+    Args:
+        user: Пользователь, запустивший задачу (только он видит её прогресс)
+        kind: Тип операции (create_infobase, drop_infobase, apply_rules, terminate_sessions...)
+        title: Описание для пользователя
+        func: Функция func(progress) -> dict; шаги выполняются через progress.step(),
+              возвращаемый dict сохраняется как результат (success=False помечает задачу ошибочной)
+        server_connection: ServerConnection, к которому относится задача
+        steps_total: Ожидаемое число шагов
+
+    Returns:
+        BackgroundJob: Созданная задача
+    """
+    job = BackgroundJob.objects.create(
+        user=user,
+        connection=server_connection,
+        kind=kind,
+        title=title[:255],
+        steps_total=max(steps_total, 1)
+    )
+    executor = _get_executor()
+    # Запускаем только после фиксации транзакции, чтобы поток увидел запись задачи
+    transaction.on_commit(lambda: executor.submit(_run_job, job.id, func, job.steps_total))
+    logger.info(f"User {user.username} queued background job {job.id} ({kind})")
+    return job
@@ -0,0 +1,235 @@
+"""
+Сводка использования лицензий по всем кластерам подключений
+
+Для каждого кластера выполняются session list --licenses, process list
+--licenses, session list (база сеанса) и infobase summary list; все команды
+всех кластеров запускаются одним параллельным проходом с ограничением
+RAC_MAX_PARALLEL. Вывод с лицензиями не содержит информационной базы, поэтому
+лицензии сеансов соединяются с обычным session list по UUID сеанса.
+
+Использование группируется по серии лицензии (с запасом относительно
+max-users-all), серверу, выдавшему лицензию (rmngr-address), информационной
+базе и пользователю.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from django.utils import timezone
+from .parallel import run_parallel
+from .rac_client import RACClient, fix_broken_encoding
+from .snapshots import ColumnarSnapshot
+from .views import _parse_cluster_list, _parse_session_list, _parse_process_list, _parse_infobase_list
+
+logger = logging.getLogger(__name__)
+
+# Строки session list, нужные для соединения с лицензиями: UUID сеанса и его база
+SESSION_INFOBASE_RE = re.compile(r'^\s*(session|infobase)\s*:\s*(\S*)\s*$', re.MULTILINE)
+
+
+def _clean(value):
+    if value is None:
+        return ''
+    return str(value).strip().strip('"')
+
+
+def _to_int(value):
+    try:
+        return int(_clean(value))
+    except ValueError:
+        return 0
+
+
+def _cluster_commands(client, cluster_uuid):
+    return {
+        'session_licenses': lambda: client.get_session_list(cluster_uuid, include_licenses=True),
+        'process_licenses': lambda: client.get_process_list(cluster_uuid, include_licenses=True),
+        'sessions': lambda: client.get_session_list(cluster_uuid),
+        'infobases': lambda: client.get_infobase_summary_list(cluster_uuid),
+    }
+
+
+def _snapshot(result, parse):
+    """Разбирает успешный результат команды в ColumnarSnapshot (None - команда не выполнена)"""
+    if not result['success']:
+        return None
+    return ColumnarSnapshot.from_items(parse(result['output']))
+
+
+def _session_infobases(output):
+    """
+    {uuid сеанса: uuid базы} из вывода session list.
+
+    Из многомегабайтного вывода нужны только две строки каждого сеанса, поэтому
+    вместо полного разбора они выбираются регулярным выражением.
+    """
+    infobases = {}
+    session = None
+    for key, value in SESSION_INFOBASE_RE.findall(output or ''):
+        if key == 'session':
+            session = value
+        elif session is not None:
+            infobases[session] = value
+    return infobases
+
+
+def _summarize_cluster(target, results):
+    """Использование лицензий одним кластером"""
+    connection, cluster = target
+    session_licenses = _snapshot(results['session_licenses'], _parse_session_list)
+    process_licenses = _snapshot(results['process_licenses'], _parse_process_list)
+    session_infobases = _session_infobases(results['sessions']['output']) if results['sessions']['success'] else None
+    infobase_names = {}
+    if results['infobases']['success']:
+        infobase_names = {ib['uuid']: ib['name'] for ib in _parse_infobase_list(results['infobases']['output'])}
+
+    failed = [name for name in ('session_licenses', 'process_licenses') if not results[name]['success']]
+    summary = {
+        'connection_id': connection.id,
+        'connection_name': connection.display_name,
+        'cluster_uuid': cluster['uuid'],
+        'cluster_name': cluster['name'],
+        'sessions': len(session_licenses) if session_licenses is not None else None,
+        'processes': len(process_licenses) if process_licenses is not None else None,
+        'error': fix_broken_encoding(results[failed[0]].get('error')) if failed else None,
+    }
+
+    usage = {'series': {}, 'servers': Counter(), 'infobases': Counter(), 'users': Counter()}
+    for kind, snapshot in (('sessions', session_licenses), ('processes', process_licenses)):
+        if snapshot is None:
+            continue
+        for record in snapshot:
+            data = record['data']
+            series = _clean(data.get('series'))
+            item = usage['series'].get(series)
+            if item is None:
+                item = usage['series'][series] = {
+                    'series': series,
+                    'license_type': _clean(data.get('license-type')),
+                    'net': _clean(data.get('net')) == 'yes',
+                    'presentation': _clean(data.get('short-presentation')),
+                    'max_users': 0,
+                    'sessions': 0,
+                    'processes': 0,
+                }
+            item['max_users'] = max(item['max_users'], _to_int(data.get('max-users-all')))
+            item[kind] += 1
+            usage['servers'][(_clean(data.get('rmngr-address')), kind)] += 1
+
+        if kind == 'sessions':
+            for user, count in snapshot.count_by('user-name').items():
+                usage['users'][_clean(user)] += count
+            if session_infobases is not None:
+                for session, count in snapshot.count_by('uuid').items():
+                    infobase = _clean(session_infobases.get(session))
+                    usage['infobases'][(infobase, infobase_names.get(infobase, infobase))] += count
+
+    return summary, usage
+
+
+def collect_license_usage(connections, cluster_admin=None, cluster_password=None):
+    """
+    Собирает использование лицензий по всем кластерам подключений.
+
+    Args:
+        connections: Подключения (ServerConnection)
+        cluster_admin, cluster_password: Учётные данные администратора кластера;
+            если не заданы - сохранённые в подключении
+
+    Returns:
+        dict: {'success', 'collected_at', 'duration', 'clusters', 'totals',
+               'by_series', 'by_server', 'by_infobase', 'by_user', 'errors'}
+    """
+    started = time.monotonic()
+    clients = {
+        connection.id: RACClient(
+            connection,
+            cluster_admin=cluster_admin or connection.cluster_admin,
+            cluster_password=cluster_password or connection.cluster_password
+        )
+        for connection in connections
+    }
+
+    errors = []
+    targets = []
+    cluster_results = run_parallel(lambda c: clients[c.id].get_cluster_list(), connections)
+    for connection, result in zip(connections, cluster_results):
+        if not result['success']:
+            errors.append({'connection_id': connection.id, 'connection_name': connection.display_name,
+                           'error': fix_broken_encoding(result.get('error'))})
+            continue
+        targets.extend((connection, cluster) for cluster in _parse_cluster_list(result['output']))
+
+    # Все команды всех кластеров - одним параллельным проходом
+    commands = [
+        (index, name, command)
+        for index, (connection, cluster) in enumerate(targets)
+        for name, command in _cluster_commands(clients[connection.id], cluster['uuid']).items()
+    ]
+    results = [{} for _ in targets]
+    for (index, name, _), outcome in zip(commands, run_parallel(lambda command: command[2](), commands)):
+        results[index][name] = outcome
+
+    clusters = []
+    series = {}
+    servers = Counter()
+    infobases = Counter()
+    users = Counter()
+    for target, cluster_results in zip(targets, results):
+        summary, usage = _summarize_cluster(target, cluster_results)
+        clusters.append(summary)
+        if summary['error']:
+            errors.append({key: summary[key] for key in ('connection_id', 'connection_name', 'cluster_uuid', 'error')})
+
+        for name, item in usage['series'].items():
+            total = series.get(name)
+            if total is None:
+                series[name] = dict(item)
+                continue
+            total['max_users'] = max(total['max_users'], item['max_users'])
+            total['sessions'] += item['sessions']
+            total['processes'] += item['processes']
+        servers.update(usage['servers'])
+        users.update(usage['users'])
+        connection, cluster = target
+        infobases.update({
+            (connection.id, cluster['uuid'], infobase, name): count
+            for (infobase, name), count in usage['infobases'].items()
+        })
+
+    by_series = sorted(series.values(), key=lambda item: item['series'])
+    for item in by_series:
+        item['used'] = item['sessions'] + item['processes']
+        # Ёмкость неизвестна (0) - запас не считается
+        item['available'] = item['max_users'] - item['used'] if item['max_users'] else None
+
+    by_server = {}
+    for (server, kind), count in servers.items():
+        by_server.setdefault(server, {'server': server, 'sessions': 0, 'processes': 0})[kind] += count
+
+    result = {
+        'success': True,
+        'collected_at': timezone.now().isoformat(),
+        'duration': round(time.monotonic() - started, 3),
+        'clusters': clusters,
+        'totals': {
+            'clusters': len(targets),
+            'sessions': sum(item['sessions'] for item in by_series),
+            'processes': sum(item['processes'] for item in by_series),
+            'users': len(users),
+        },
+        'by_series': by_series,
+        'by_server': sorted(by_server.values(), key=lambda item: item['server']),
+        'by_infobase': [
+            {'connection_id': connection_id, 'cluster_uuid': cluster_uuid, 'infobase': infobase,
+             'infobase_name': name, 'sessions': count}
+            for (connection_id, cluster_uuid, infobase, name), count in infobases.most_common()
+        ],
+        'by_user': [{'user_name': user, 'sessions': count} for user, count in users.most_common()],
+        'errors': errors,
+    }
+    logger.info(
+        f"License usage collected from {len(targets)} clusters of {len(connections)} connections "
+        f"in {result['duration']}s"
+    )
+    return result
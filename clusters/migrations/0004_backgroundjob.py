@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('clusters', '0003_alter_serverconnection_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50, verbose_name='Тип операции')),
+                ('title', models.CharField(max_length=255, verbose_name='Описание')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('success', 'Выполнена'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('steps_total', models.PositiveIntegerField(default=1, verbose_name='Всего шагов')),
+                ('steps_done', models.PositiveIntegerField(default=0, verbose_name='Выполнено шагов')),
+                ('current_step', models.CharField(blank=True, default='', max_length=255, verbose_name='Текущий шаг')),
+                ('steps', models.JSONField(blank=True, default=list, verbose_name='Результаты шагов')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Результат')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('connection', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='clusters.serverconnection', verbose_name='Подключение')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='background_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Фоновая задача',
+                'verbose_name_plural': 'Фоновые задачи',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='clusters_ba_user_id_ffda06_idx'), models.Index(fields=['status'], name='clusters_ba_status_99c371_idx')],
+            },
+        ),
+    ]
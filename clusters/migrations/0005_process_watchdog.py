@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django_cryptography.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('clusters', '0004_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessWatchdogPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cluster_uuid', models.CharField(max_length=36, verbose_name='UUID кластера')),
+                ('cluster_name', models.CharField(blank=True, default='', max_length=255, verbose_name='Имя кластера')),
+                ('enabled', models.BooleanField(default=True, verbose_name='Включено')),
+                ('dry_run', models.BooleanField(default=True, verbose_name='Только журнал (без выключения)')),
+                ('memory_limit_mb', models.PositiveIntegerField(blank=True, null=True, verbose_name='Порог памяти, МБ')),
+                ('memory_release_mb', models.PositiveIntegerField(blank=True, null=True, verbose_name='Порог сброса памяти, МБ')),
+                ('min_performance', models.PositiveIntegerField(blank=True, null=True, verbose_name='Минимальная доступная производительность')),
+                ('performance_release', models.PositiveIntegerField(blank=True, null=True, verbose_name='Порог сброса производительности')),
+                ('consecutive_checks', models.PositiveIntegerField(default=2, verbose_name='Проверок подряд до выключения')),
+                ('max_actions_per_hour', models.PositiveIntegerField(default=1, verbose_name='Выключений в час, не более')),
+                ('cluster_admin', models.CharField(blank=True, max_length=255, null=True, verbose_name='Администратор кластера')),
+                ('cluster_password', django_cryptography.fields.encrypt(models.CharField(blank=True, max_length=255, null=True, verbose_name='Пароль администратора кластера'))),
+                ('state', models.JSONField(blank=True, default=dict, verbose_name='Состояние процессов')),
+                ('last_run_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя проверка')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Последняя ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('connection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watchdog_policies', to='clusters.serverconnection', verbose_name='Подключение')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Создал')),
+            ],
+            options={
+                'verbose_name': 'Правило контроля процессов',
+                'verbose_name_plural': 'Правила контроля процессов',
+                'ordering': ['connection', 'cluster_name'],
+                'unique_together': {('connection', 'cluster_uuid')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProcessWatchdogAction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cluster_uuid', models.CharField(max_length=36, verbose_name='UUID кластера')),
+                ('process_uuid', models.CharField(max_length=36, verbose_name='UUID процесса')),
+                ('host', models.CharField(blank=True, default='', max_length=255, verbose_name='Сервер')),
+                ('port', models.CharField(blank=True, default='', max_length=10, verbose_name='Порт')),
+                ('pid', models.CharField(blank=True, default='', max_length=20, verbose_name='PID')),
+                ('memory_mb', models.FloatField(blank=True, null=True, verbose_name='Память, МБ')),
+                ('available_performance', models.IntegerField(blank=True, null=True, verbose_name='Доступная производительность')),
+                ('action', models.CharField(choices=[('turn_off', 'Процесс выключен'), ('dry_run', 'Выключение (пробный режим)'), ('rate_limited', 'Пропущено: лимит выключений'), ('skipped', 'Пропущено: последний процесс сервера'), ('failed', 'Ошибка выключения')], max_length=20, verbose_name='Действие')),
+                ('reason', models.CharField(blank=True, default='', max_length=255, verbose_name='Причина')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('connection', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='clusters.serverconnection', verbose_name='Подключение')),
+                ('policy', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='actions', to='clusters.processwatchdogpolicy', verbose_name='Правило')),
+            ],
+            options={
+                'verbose_name': 'Действие контроля процессов',
+                'verbose_name_plural': 'Журнал контроля процессов',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['policy', '-created_at'], name='clusters_pr_policy__118290_idx'), models.Index(fields=['connection', '-created_at'], name='clusters_pr_connect_8f5e1f_idx')],
+            },
+        ),
+    ]
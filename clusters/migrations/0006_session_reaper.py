@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django_cryptography.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('clusters', '0005_process_watchdog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionReaperPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cluster_uuid', models.CharField(max_length=36, verbose_name='UUID кластера')),
+                ('cluster_name', models.CharField(blank=True, default='', max_length=255, verbose_name='Имя кластера')),
+                ('name', models.CharField(max_length=255, verbose_name='Название')),
+                ('enabled', models.BooleanField(default=True, verbose_name='Включено')),
+                ('dry_run', models.BooleanField(default=True, verbose_name='Только отчёт (без завершения)')),
+                ('selector', models.JSONField(default=dict, verbose_name='Условия отбора')),
+                ('active_from', models.TimeField(blank=True, null=True, verbose_name='Действует с')),
+                ('active_to', models.TimeField(blank=True, null=True, verbose_name='Действует до')),
+                ('max_sessions', models.PositiveIntegerField(default=100, verbose_name='Завершать за запуск, не более')),
+                ('error_message', models.CharField(blank=True, default='', max_length=255, verbose_name='Сообщение пользователю')),
+                ('cluster_admin', models.CharField(blank=True, max_length=255, null=True, verbose_name='Администратор кластера')),
+                ('cluster_password', django_cryptography.fields.encrypt(models.CharField(blank=True, max_length=255, null=True, verbose_name='Пароль администратора кластера'))),
+                ('last_run_at', models.DateTimeField(blank=True, null=True, verbose_name='Последний запуск')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('connection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reaper_policies', to='clusters.serverconnection', verbose_name='Подключение')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Создал')),
+            ],
+            options={
+                'verbose_name': 'Правило завершения сеансов',
+                'verbose_name_plural': 'Правила завершения сеансов',
+                'ordering': ['connection', 'cluster_name', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SessionReaperRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(verbose_name='Начало')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание')),
+                ('dry_run', models.BooleanField(default=False, verbose_name='Пробный запуск')),
+                ('sessions_total', models.PositiveIntegerField(default=0, verbose_name='Сеансов в снимке')),
+                ('matched', models.PositiveIntegerField(default=0, verbose_name='Подходящих сеансов')),
+                ('terminated', models.PositiveIntegerField(default=0, verbose_name='Завершено')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Ошибок')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Ошибка')),
+                ('report', models.JSONField(blank=True, default=list, verbose_name='Сеансы')),
+                ('policy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='runs', to='clusters.sessionreaperpolicy', verbose_name='Правило')),
+            ],
+            options={
+                'verbose_name': 'Запуск правила завершения сеансов',
+                'verbose_name_plural': 'Запуски правил завершения сеансов',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['policy', '-started_at'], name='clusters_se_policy__3a882b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0006_session_reaper'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cluster_uuid', models.CharField(max_length=36, verbose_name='UUID кластера')),
+                ('session_uuid', models.CharField(max_length=36, verbose_name='UUID сеанса')),
+                ('session_id', models.PositiveIntegerField(blank=True, null=True, verbose_name='Номер сеанса')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Начало сеанса'), (2, 'Окончание сеанса'), (3, 'Завершение администратором')], verbose_name='Событие')),
+                ('occurred_at', models.DateTimeField(verbose_name='Время')),
+                ('infobase', models.CharField(blank=True, default='', max_length=36, verbose_name='UUID информационной базы')),
+                ('user_name', models.CharField(blank=True, default='', max_length=255, verbose_name='Пользователь')),
+                ('app_id', models.CharField(blank=True, default='', max_length=64, verbose_name='Приложение')),
+                ('host', models.CharField(blank=True, default='', max_length=255, verbose_name='Компьютер')),
+                ('actor', models.CharField(blank=True, default='', max_length=150, verbose_name='Кем завершён')),
+                ('connection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='clusters.serverconnection', verbose_name='Подключение')),
+            ],
+            options={
+                'verbose_name': 'Событие сеанса',
+                'verbose_name_plural': 'Журнал сеансов',
+                'ordering': ['-occurred_at', '-id'],
+                'indexes': [models.Index(fields=['connection', 'cluster_uuid', 'occurred_at'], name='clusters_se_connect_ae1e0a_idx'), models.Index(fields=['user_name', 'occurred_at'], name='clusters_se_user_na_b7cf46_idx'), models.Index(fields=['infobase', 'occurred_at'], name='clusters_se_infobas_a35798_idx'), models.Index(fields=['session_uuid'], name='clusters_se_session_29313d_idx')],
+            },
+        ),
+    ]
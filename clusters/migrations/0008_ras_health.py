@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0007_sessionevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RasHealth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=300, unique=True, verbose_name='Адрес RAS')),
+                ('data', models.JSONField(default=dict, verbose_name='Результат проверки')),
+                ('checked_at', models.DateTimeField(verbose_name='Время проверки')),
+            ],
+            options={
+                'verbose_name': 'Состояние RAS',
+                'verbose_name_plural': 'Состояние RAS',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0008_ras_health'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='processwatchdogaction',
+            name='action',
+            field=models.CharField(choices=[('turn_off', 'Процесс выключен'), ('dry_run', 'Выключение (пробный режим)'), ('rate_limited', 'Пропущено: лимит выключений'), ('host_busy', 'Отложено: на сервере уже выключается процесс'), ('skipped', 'Пропущено: последний процесс сервера'), ('failed', 'Ошибка выключения')], max_length=20, verbose_name='Действие'),
+        ),
+    ]
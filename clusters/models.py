@@ -43,4 +43,358 @@ class ServerConnection(models.Model):
         return self.display_name
 
     def get_connection_string(self):
-        return f"{self.server_host}:{self.ras_port}"
\ No newline at end of file
+        return f"{self.server_host}:{self.ras_port}"
+class BackgroundJob(models.Model):
+    """Фоновая задача для длительных операций с кластером (выполняется пулом потоков приложения)"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'В очереди'),
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_SUCCESS, 'Выполнена'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='background_jobs', verbose_name='Пользователь')
+    connection = models.ForeignKey(ServerConnection, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Подключение')
+    kind = models.CharField(max_length=50, verbose_name='Тип операции')
+    title = models.CharField(max_length=255, verbose_name='Описание')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name='Статус')
+    steps_total = models.PositiveIntegerField(default=1, verbose_name='Всего шагов')
+    steps_done = models.PositiveIntegerField(default=0, verbose_name='Выполнено шагов')
+    current_step = models.CharField(max_length=255, blank=True, default='', verbose_name='Текущий шаг')
+    steps = models.JSONField(default=list, blank=True, verbose_name='Результаты шагов')
+    result = models.JSONField(null=True, blank=True, verbose_name='Результат')
+    error = models.TextField(blank=True, default='', verbose_name='Ошибка')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['status']),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCESS, self.STATUS_FAILED)
+
+    def to_dict(self, include_steps=True):
+        data = {
+            'id': self.id,
+            'kind': self.kind,
+            'title': self.title,
+            'status': self.status,
+            'status_display': self.get_status_display(),
+            'finished': self.is_finished,
+            'steps_total': self.steps_total,
+            'steps_done': self.steps_done,
+            'progress': round(100 * self.steps_done / self.steps_total) if self.steps_total else 100,
+            'current_step': self.current_step,
+            'result': self.result,
+            'error': self.error,
+            'connection_id': self.connection_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_steps:
+            data['steps'] = self.steps
+        return data
+
+
+class ProcessWatchdogPolicy(models.Model):
+    """Правило автоматического выключения рабочих процессов кластера по памяти и производительности"""
+    connection = models.ForeignKey(ServerConnection, on_delete=models.CASCADE, related_name='watchdog_policies', verbose_name='Подключение')
+    cluster_uuid = models.CharField(max_length=36, verbose_name='UUID кластера')
+    cluster_name = models.CharField(max_length=255, blank=True, default='', verbose_name='Имя кластера')
+    enabled = models.BooleanField(default=True, verbose_name='Включено')
+    dry_run = models.BooleanField(default=True, verbose_name='Только журнал (без выключения)')
+    # Порог срабатывания и порог сброса (гистерезис): процесс считается нарушителем,
+    # пока значение не вернётся за порог сброса
+    memory_limit_mb = models.PositiveIntegerField(null=True, blank=True, verbose_name='Порог памяти, МБ')
+    memory_release_mb = models.PositiveIntegerField(null=True, blank=True, verbose_name='Порог сброса памяти, МБ')
+    min_performance = models.PositiveIntegerField(null=True, blank=True, verbose_name='Минимальная доступная производительность')
+    performance_release = models.PositiveIntegerField(null=True, blank=True, verbose_name='Порог сброса производительности')
+    consecutive_checks = models.PositiveIntegerField(default=2, verbose_name='Проверок подряд до выключения')
+    max_actions_per_hour = models.PositiveIntegerField(default=1, verbose_name='Выключений в час, не более')
+    cluster_admin = models.CharField(max_length=255, blank=True, null=True, verbose_name='Администратор кластера')
+    cluster_password = encrypt(models.CharField(max_length=255, blank=True, null=True, verbose_name='Пароль администратора кластера'))
+    state = models.JSONField(default=dict, blank=True, verbose_name='Состояние процессов')
+    last_run_at = models.DateTimeField(null=True, blank=True, verbose_name='Последняя проверка')
+    last_error = models.TextField(blank=True, default='', verbose_name='Последняя ошибка')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Создал')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Правило контроля процессов'
+        verbose_name_plural = 'Правила контроля процессов'
+        ordering = ['connection', 'cluster_name']
+        unique_together = [['connection', 'cluster_uuid']]
+
+    def __str__(self):
+        return f"{self.connection} / {self.cluster_name or self.cluster_uuid}"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'connection_id': self.connection_id,
+            'cluster_uuid': self.cluster_uuid,
+            'cluster_name': self.cluster_name,
+            'enabled': self.enabled,
+            'dry_run': self.dry_run,
+            'memory_limit_mb': self.memory_limit_mb,
+            'memory_release_mb': self.memory_release_mb,
+            'min_performance': self.min_performance,
+            'performance_release': self.performance_release,
+            'consecutive_checks': self.consecutive_checks,
+            'max_actions_per_hour': self.max_actions_per_hour,
+            'cluster_admin': self.cluster_admin,
+            'flagged_processes': sum(1 for item in self.state.values() if item.get('flagged')),
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_error': self.last_error,
+        }
+
+
+class ProcessWatchdogAction(models.Model):
+    """Журнал действий контроля рабочих процессов (только добавление записей)"""
+    ACTION_TURN_OFF = 'turn_off'
+    ACTION_DRY_RUN = 'dry_run'
+    ACTION_RATE_LIMITED = 'rate_limited'
+    ACTION_HOST_BUSY = 'host_busy'
+    ACTION_SKIPPED = 'skipped'
+    ACTION_FAILED = 'failed'
+    ACTION_CHOICES = [
+        (ACTION_TURN_OFF, 'Процесс выключен'),
+        (ACTION_DRY_RUN, 'Выключение (пробный режим)'),
+        (ACTION_RATE_LIMITED, 'Пропущено: лимит выключений'),
+        (ACTION_HOST_BUSY, 'Отложено: на сервере уже выключается процесс'),
+        (ACTION_SKIPPED, 'Пропущено: последний процесс сервера'),
+        (ACTION_FAILED, 'Ошибка выключения'),
+    ]
+
+    policy = models.ForeignKey(ProcessWatchdogPolicy, on_delete=models.SET_NULL, null=True, blank=True, related_name='actions', verbose_name='Правило')
+    connection = models.ForeignKey(ServerConnection, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Подключение')
+    cluster_uuid = models.CharField(max_length=36, verbose_name='UUID кластера')
+    process_uuid = models.CharField(max_length=36, verbose_name='UUID процесса')
+    host = models.CharField(max_length=255, blank=True, default='', verbose_name='Сервер')
+    port = models.CharField(max_length=10, blank=True, default='', verbose_name='Порт')
+    pid = models.CharField(max_length=20, blank=True, default='', verbose_name='PID')
+    memory_mb = models.FloatField(null=True, blank=True, verbose_name='Память, МБ')
+    available_performance = models.IntegerField(null=True, blank=True, verbose_name='Доступная производительность')
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES, verbose_name='Действие')
+    reason = models.CharField(max_length=255, blank=True, default='', verbose_name='Причина')
+    error = models.TextField(blank=True, default='', verbose_name='Ошибка')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Действие контроля процессов'
+        verbose_name_plural = 'Журнал контроля процессов'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['policy', '-created_at']),
+            models.Index(fields=['connection', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()}: {self.host}:{self.port} ({self.created_at})"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'policy_id': self.policy_id,
+            'connection_id': self.connection_id,
+            'cluster_uuid': self.cluster_uuid,
+            'process_uuid': self.process_uuid,
+            'host': self.host,
+            'port': self.port,
+            'pid': self.pid,
+            'memory_mb': self.memory_mb,
+            'available_performance': self.available_performance,
+            'action': self.action,
+            'action_display': self.get_action_display(),
+            'reason': self.reason,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class SessionReaperPolicy(models.Model):
+    """Правило автоматического завершения простаивающих сеансов кластера или информационной базы"""
+    connection = models.ForeignKey(ServerConnection, on_delete=models.CASCADE, related_name='reaper_policies', verbose_name='Подключение')
+    cluster_uuid = models.CharField(max_length=36, verbose_name='UUID кластера')
+    cluster_name = models.CharField(max_length=255, blank=True, default='', verbose_name='Имя кластера')
+    name = models.CharField(max_length=255, verbose_name='Название')
+    enabled = models.BooleanField(default=True, verbose_name='Включено')
+    dry_run = models.BooleanField(default=True, verbose_name='Только отчёт (без завершения)')
+    # Условия отбора в формате session_selectors.parse_selector (infobase, user_name, app_id, idle_seconds, hibernate)
+    selector = models.JSONField(default=dict, verbose_name='Условия отбора')
+    # Время действия правила (локальное время приложения); начало позже конца - окно через полночь
+    active_from = models.TimeField(null=True, blank=True, verbose_name='Действует с')
+    active_to = models.TimeField(null=True, blank=True, verbose_name='Действует до')
+    max_sessions = models.PositiveIntegerField(default=100, verbose_name='Завершать за запуск, не более')
+    error_message = models.CharField(max_length=255, blank=True, default='', verbose_name='Сообщение пользователю')
+    cluster_admin = models.CharField(max_length=255, blank=True, null=True, verbose_name='Администратор кластера')
+    cluster_password = encrypt(models.CharField(max_length=255, blank=True, null=True, verbose_name='Пароль администратора кластера'))
+    last_run_at = models.DateTimeField(null=True, blank=True, verbose_name='Последний запуск')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Создал')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Правило завершения сеансов'
+        verbose_name_plural = 'Правила завершения сеансов'
+        ordering = ['connection', 'cluster_name', 'name']
+
+    def __str__(self):
+        return self.name
+
+    def is_active_at(self, moment):
+        """Проверяет, что время moment (datetime.time) попадает в окно действия правила"""
+        if self.active_from is None or self.active_to is None:
+            return True
+        if self.active_from <= self.active_to:
+            return self.active_from <= moment < self.active_to
+        return moment >= self.active_from or moment < self.active_to
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'connection_id': self.connection_id,
+            'cluster_uuid': self.cluster_uuid,
+            'cluster_name': self.cluster_name,
+            'name': self.name,
+            'enabled': self.enabled,
+            'dry_run': self.dry_run,
+            'selector': self.selector,
+            'active_from': self.active_from.strftime('%H:%M') if self.active_from else None,
+            'active_to': self.active_to.strftime('%H:%M') if self.active_to else None,
+            'max_sessions': self.max_sessions,
+            'error_message': self.error_message,
+            'cluster_admin': self.cluster_admin,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+        }
+
+
+class SessionReaperRun(models.Model):
+    """Отчёт о запуске правила завершения сеансов"""
+    policy = models.ForeignKey(SessionReaperPolicy, on_delete=models.CASCADE, related_name='runs', verbose_name='Правило')
+    started_at = models.DateTimeField(verbose_name='Начало')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Окончание')
+    dry_run = models.BooleanField(default=False, verbose_name='Пробный запуск')
+    sessions_total = models.PositiveIntegerField(default=0, verbose_name='Сеансов в снимке')
+    matched = models.PositiveIntegerField(default=0, verbose_name='Подходящих сеансов')
+    terminated = models.PositiveIntegerField(default=0, verbose_name='Завершено')
+    failed = models.PositiveIntegerField(default=0, verbose_name='Ошибок')
+    error = models.TextField(blank=True, default='', verbose_name='Ошибка')
+    report = models.JSONField(default=list, blank=True, verbose_name='Сеансы')
+
+    class Meta:
+        verbose_name = 'Запуск правила завершения сеансов'
+        verbose_name_plural = 'Запуски правил завершения сеансов'
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['policy', '-started_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.policy} ({self.started_at})"
+
+    def to_dict(self, include_report=True):
+        data = {
+            'id': self.id,
+            'policy_id': self.policy_id,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'dry_run': self.dry_run,
+            'sessions_total': self.sessions_total,
+            'matched': self.matched,
+            'terminated': self.terminated,
+            'failed': self.failed,
+            'error': self.error,
+        }
+        if include_report:
+            data['report'] = self.report
+        return data
+
+
+class SessionEvent(models.Model):
+    """Событие жизненного цикла сеанса: начало, окончание, завершение администратором (только добавление)"""
+    KIND_START = 1
+    KIND_END = 2
+    KIND_TERMINATE = 3
+    KIND_CHOICES = [
+        (KIND_START, 'Начало сеанса'),
+        (KIND_END, 'Окончание сеанса'),
+        (KIND_TERMINATE, 'Завершение администратором'),
+    ]
+    KIND_NAMES = {KIND_START: 'start', KIND_END: 'end', KIND_TERMINATE: 'terminate'}
+
+    connection = models.ForeignKey(ServerConnection, on_delete=models.CASCADE, related_name='+', verbose_name='Подключение')
+    cluster_uuid = models.CharField(max_length=36, verbose_name='UUID кластера')
+    session_uuid = models.CharField(max_length=36, verbose_name='UUID сеанса')
+    session_id = models.PositiveIntegerField(null=True, blank=True, verbose_name='Номер сеанса')
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES, verbose_name='Событие')
+    # Начало - started-at из session list; окончание - время снимка, в котором сеанса уже нет
+    occurred_at = models.DateTimeField(verbose_name='Время')
+    infobase = models.CharField(max_length=36, blank=True, default='', verbose_name='UUID информационной базы')
+    user_name = models.CharField(max_length=255, blank=True, default='', verbose_name='Пользователь')
+    app_id = models.CharField(max_length=64, blank=True, default='', verbose_name='Приложение')
+    host = models.CharField(max_length=255, blank=True, default='', verbose_name='Компьютер')
+    actor = models.CharField(max_length=150, blank=True, default='', verbose_name='Кем завершён')
+
+    class Meta:
+        verbose_name = 'Событие сеанса'
+        verbose_name_plural = 'Журнал сеансов'
+        ordering = ['-occurred_at', '-id']
+        indexes = [
+            models.Index(fields=['connection', 'cluster_uuid', 'occurred_at']),
+            models.Index(fields=['user_name', 'occurred_at']),
+            models.Index(fields=['infobase', 'occurred_at']),
+            models.Index(fields=['session_uuid']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.user_name} ({self.occurred_at})"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.KIND_NAMES.get(self.kind, ''),
+            'kind_display': self.get_kind_display(),
+            'occurred_at': self.occurred_at.isoformat() if self.occurred_at else None,
+            'connection_id': self.connection_id,
+            'cluster_uuid': self.cluster_uuid,
+            'session_uuid': self.session_uuid,
+            'session_id': self.session_id,
+            'infobase': self.infobase,
+            'user_name': self.user_name,
+            'app_id': self.app_id,
+            'host': self.host,
+            'actor': self.actor,
+        }
+
+
+class RasHealth(models.Model):
+    """Последний результат проверки доступности RAS (общий для веб-процессов и планировщика)"""
+    endpoint = models.CharField(max_length=300, unique=True, verbose_name='Адрес RAS')
+    # {'status', 'latency_ms', 'error', 'checked_at', ['rac']} - как в кэше rac_health
+    data = models.JSONField(default=dict, verbose_name='Результат проверки')
+    checked_at = models.DateTimeField(verbose_name='Время проверки')
+
+    class Meta:
+        verbose_name = 'Состояние RAS'
+        verbose_name_plural = 'Состояние RAS'
+
+    def __str__(self):
+        return f"{self.endpoint}: {self.data.get('status', '')}"
@@ -0,0 +1,146 @@
+"""
+Параллельное выполнение команд RAC
+
+Каждая команда rac - это отдельный процесс, поэтому пул потоков позволяет
+выполнять их одновременно (GIL освобождается на время ожидания subprocess).
+
+Ограничения проверяются в момент запуска процесса rac (command_slot):
+- RAC_MAX_PARALLEL_PER_CONNECTION - команд к одному RAS во всём процессе;
+- command_budget - общее число команд внутри блока, включая вложенные
+  run_parallel (например, операции пакетного запроса).
+"""
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Семафоры RAS: {host:port: BoundedSemaphore}, общие для всех запросов процесса
+_connection_slots = {}
+_connection_slots_lock = threading.Lock()
+
+# Семафор command_budget текущего блока; передаётся в потоки run_parallel
+_command_budget = contextvars.ContextVar('rac_command_budget', default=None)
+
+
+def get_max_workers(requested=None):
+    """Возвращает размер пула с учётом ограничения RAC_MAX_PARALLEL из настроек"""
+    limit = getattr(settings, 'RAC_MAX_PARALLEL', 8)
+    if requested:
+        try:
+            return max(1, min(int(requested), limit))
+        except (ValueError, TypeError):
+            pass
+    return limit
+
+
+def _guarded(func):
+    """
+    Обёртка задачи пула: исключение -> {'success': False, 'error': ...}, закрытие
+    соединения с БД потока, передача command_budget вызывающего потока.
+    """
+    budget = _command_budget.get()
+
+    def task(item):
+        token = _command_budget.set(budget)
+        try:
+            return func(item)
+        except Exception as e:
+            logger.error(f"Parallel task failed: {e}")
+            return {'success': False, 'error': str(e)}
+        finally:
+            _command_budget.reset(token)
+            # RACClient читает SystemSettings из потока - закрываем соединение с БД потока
+            connection.close()
+    return task
+
+
+def run_parallel(func, items, max_workers=None):
+    """
+    Выполняет func(item) для каждого элемента параллельно.
+
+    Args:
+        func: Функция одного аргумента; обычно возвращает результат RACClient ({'success': ..., ...})
+        items: Список аргументов
+        max_workers: Размер пула (ограничивается RAC_MAX_PARALLEL)
+
+    Returns:
+        list: Результаты в том же порядке, что и items. Исключение внутри func
+        превращается в {'success': False, 'error': ...}, остальные задачи продолжают выполняться.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    workers = min(get_max_workers(max_workers), len(items))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rac') as executor:
+        return list(executor.map(_guarded(func), items))
+
+
+def run_staggered(func, items, spread, max_workers=None):
+    """
+    Как run_parallel, но запуски распределяются по времени равномерно: элемент
+    номер i запускается через i * spread / len(items) секунд после первого.
+
+    Периодический опрос десятков RAS не отправляет все команды одновременно.
+
+    Args:
+        spread: Длительность окна запусков (сек); 0 - все сразу
+    """
+    items = list(items)
+    if not spread or len(items) < 2:
+        return run_parallel(func, items, max_workers)
+
+    step = spread / len(items)
+    started = time.monotonic()
+    task = _guarded(func)
+    workers = min(get_max_workers(max_workers), len(items))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rac') as executor:
+        futures = []
+        for index, item in enumerate(items):
+            delay = started + index * step - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(task, item))
+        return [future.result() for future in futures]
+
+
+@contextmanager
+def command_budget(limit=None):
+    """
+    Ограничивает общее число одновременно выполняемых команд rac, запущенных
+    внутри блока, в том числе из вложенных run_parallel (по умолчанию - RAC_MAX_PARALLEL).
+    """
+    token = _command_budget.set(threading.BoundedSemaphore(get_max_workers(limit)))
+    try:
+        yield
+    finally:
+        _command_budget.reset(token)
+
+
+@contextmanager
+def command_slot(endpoint):
+    """
+    Занимает слот для одной команды rac к RAS endpoint (host:port).
+
+    К одному RAS одновременно выполняется не больше RAC_MAX_PARALLEL_PER_CONNECTION
+    команд процесса; внутри command_budget - ещё и не больше лимита блока.
+    Слот RAS занимается первым, поэтому ожидание не может стать взаимным.
+    """
+    with _connection_slots_lock:
+        slot = _connection_slots.get(endpoint)
+        if slot is None:
+            limit = max(1, getattr(settings, 'RAC_MAX_PARALLEL_PER_CONNECTION', 4))
+            slot = _connection_slots[endpoint] = threading.BoundedSemaphore(limit)
+    budget = _command_budget.get()
+    with slot:
+        if budget is None:
+            yield
+        else:
+            with budget:
+                yield
@@ -0,0 +1,252 @@
+"""
+Контроль рабочих процессов кластера по памяти и доступной производительности
+
+Для каждого включённого правила (ProcessWatchdogPolicy) выполняется process list,
+значения memory-size и available-perfomance сравниваются с порогами правила.
+Срабатывание с гистерезисом: процесс становится нарушителем при превышении
+порога и перестаёт им быть, только когда значение вернётся за порог сброса,
+поэтому колебания около порога не приводят к выключению. Выключение
+(process turn-off - процесс перестаёт принимать новые соединения и завершается
+после переноса сеансов) выполняется после нескольких проверок подряд,
+не чаще max_actions_per_hour и не более одного процесса сервера за проверку.
+
+Каждое решение записывается в журнал ProcessWatchdogAction. Функция run_watchdog
+рассчитана на периодический вызов планировщиком.
+"""
+import logging
+from datetime import timedelta
+from django.utils import timezone
+from .models import ProcessWatchdogPolicy, ProcessWatchdogAction
+from .parallel import run_parallel
+from .rac_client import RACClient, fix_broken_encoding
+from .views import _parse_process_list
+
+logger = logging.getLogger(__name__)
+
+# Порог сброса памяти по умолчанию - доля от порога срабатывания
+DEFAULT_MEMORY_RELEASE_RATIO = 0.9
+
+
+def _clean(value):
+    if value is None:
+        return ''
+    return str(value).strip().strip('"')
+
+
+def _to_number(value):
+    try:
+        return float(_clean(value))
+    except ValueError:
+        return None
+
+
+def _release_thresholds(policy):
+    """Пороги сброса: явно заданные или производные от порогов срабатывания"""
+    memory_release = policy.memory_release_mb
+    if memory_release is None and policy.memory_limit_mb:
+        memory_release = policy.memory_limit_mb * DEFAULT_MEMORY_RELEASE_RATIO
+    performance_release = policy.performance_release
+    if performance_release is None:
+        performance_release = policy.min_performance
+    return memory_release, performance_release
+
+
+def evaluate_processes(policy, processes, state):
+    """
+    Обновляет состояние процессов по новому снимку process list.
+
+    Args:
+        policy: ProcessWatchdogPolicy
+        processes: Результат _parse_process_list
+        state: Состояние с прошлой проверки {uuid процесса: {'strikes', 'flagged', 'logged'}}
+
+    Returns:
+        tuple: (новое состояние, процессы-кандидаты на выключение по убыванию памяти,
+                число работающих процессов по серверам)
+    """
+    memory_release, performance_release = _release_thresholds(policy)
+    new_state = {}
+    candidates = []
+    running_by_host = {}
+
+    for process in processes:
+        data = process.get('data', {})
+        # Процессы, которые уже выключаются или не запущены, не рассматриваем
+        if _clean(data.get('running')) != 'yes' or _clean(data.get('turned-on')) == 'no':
+            continue
+        host = _clean(data.get('host'))
+        running_by_host[host] = running_by_host.get(host, 0) + 1
+
+        memory_kb = _to_number(data.get('memory-size'))
+        memory_mb = memory_kb / 1024 if memory_kb is not None else None
+        performance = _to_number(data.get('available-perfomance'))
+
+        reasons = []
+        if policy.memory_limit_mb and memory_mb is not None and memory_mb > policy.memory_limit_mb:
+            reasons.append(f'память {memory_mb:.0f} МБ > {policy.memory_limit_mb} МБ')
+        if policy.min_performance and performance is not None and performance < policy.min_performance:
+            reasons.append(f'производительность {performance:.0f} < {policy.min_performance}')
+
+        recovered = (
+            (memory_release is None or memory_mb is None or memory_mb < memory_release)
+            and (performance_release is None or performance is None or performance > performance_release)
+        )
+
+        entry = dict(state.get(process['uuid']) or {'strikes': 0, 'flagged': False})
+        if not reasons and (not entry['flagged'] or recovered):
+            # Процесс в норме (или вернулся за порог сброса) - состояние не храним
+            continue
+        # Между порогами нарушитель остаётся нарушителем с прежней причиной
+        entry['flagged'] = True
+        entry['strikes'] += 1
+        if reasons:
+            entry['reason'] = '; '.join(reasons)
+        new_state[process['uuid']] = entry
+
+        if entry['strikes'] >= policy.consecutive_checks:
+            candidates.append({
+                'uuid': process['uuid'],
+                'host': host,
+                'port': _clean(data.get('port')),
+                'pid': _clean(data.get('pid')),
+                'memory_mb': round(memory_mb, 1) if memory_mb is not None else None,
+                'available_performance': int(performance) if performance is not None else None,
+                'reason': entry['reason'][:255],
+            })
+
+    candidates.sort(key=lambda c: c['memory_mb'] or 0, reverse=True)
+    return new_state, candidates, running_by_host
+
+
+def _make_action(policy, candidate, action, error=''):
+    return ProcessWatchdogAction(
+        policy=policy,
+        connection_id=policy.connection_id,
+        cluster_uuid=policy.cluster_uuid,
+        process_uuid=candidate['uuid'],
+        host=candidate['host'],
+        port=candidate['port'],
+        pid=candidate['pid'],
+        memory_mb=candidate['memory_mb'],
+        available_performance=candidate['available_performance'],
+        action=action,
+        reason=candidate['reason'],
+        error=error,
+    )
+
+
+def run_policy(policy, dry_run=None):
+    """
+    Выполняет одну проверку правила.
+
+    Args:
+        policy: ProcessWatchdogPolicy (с connection)
+        dry_run: Переопределить режим правила (None - как в правиле)
+
+    Returns:
+        dict: {'success', 'policy_id', 'processes', 'flagged', 'actions': [...], ['error']}
+    """
+    dry_run = policy.dry_run if dry_run is None else dry_run
+    connection = policy.connection
+    rac_client = RACClient(
+        connection,
+        cluster_admin=policy.cluster_admin or connection.cluster_admin,
+        cluster_password=policy.cluster_password or connection.cluster_password
+    )
+
+    now = timezone.now()
+    result = rac_client.get_process_list(policy.cluster_uuid)
+    if not result['success']:
+        error = fix_broken_encoding(result['error']) or 'process list failed'
+        ProcessWatchdogPolicy.objects.filter(id=policy.id).update(last_run_at=now, last_error=error)
+        return {'success': False, 'policy_id': policy.id, 'error': error}
+
+    processes = _parse_process_list(result['output'])
+    state, candidates, running_by_host = evaluate_processes(policy, processes, policy.state or {})
+
+    # Лимит считается по журналу, поэтому учитывает и перезапуски приложения.
+    # Рабочий запуск расходует лимит только реальными выключениями, пробный - пробными
+    counted_action = ProcessWatchdogAction.ACTION_DRY_RUN if dry_run else ProcessWatchdogAction.ACTION_TURN_OFF
+    used = ProcessWatchdogAction.objects.filter(
+        policy=policy,
+        action=counted_action,
+        created_at__gte=now - timedelta(hours=1)
+    ).count()
+    allowed = max(policy.max_actions_per_hour - used, 0)
+
+    actions = []
+    to_turn_off = []
+    hosts_in_run = set()
+    for candidate in candidates:
+        entry = state[candidate['uuid']]
+        if running_by_host.get(candidate['host'], 0) <= 1:
+            action = ProcessWatchdogAction.ACTION_SKIPPED
+        elif allowed <= 0:
+            action = ProcessWatchdogAction.ACTION_RATE_LIMITED
+        elif candidate['host'] in hosts_in_run:
+            # На сервере за проверку выключается не больше одного процесса
+            action = ProcessWatchdogAction.ACTION_HOST_BUSY
+        else:
+            allowed -= 1
+            hosts_in_run.add(candidate['host'])
+            if dry_run:
+                actions.append(_make_action(policy, candidate, ProcessWatchdogAction.ACTION_DRY_RUN))
+                # Следующая пробная запись - снова после consecutive_checks проверок
+                entry.update(strikes=0, logged=ProcessWatchdogAction.ACTION_DRY_RUN)
+            else:
+                to_turn_off.append(candidate)
+            continue
+
+        # Пропуски записываем один раз за эпизод, а не при каждой проверке
+        if entry.get('logged') != action:
+            entry['logged'] = action
+            actions.append(_make_action(policy, candidate, action))
+
+    if to_turn_off:
+        results = run_parallel(
+            lambda c: rac_client.turn_off_process(policy.cluster_uuid, c['uuid']), to_turn_off
+        )
+        for candidate, turn_off_result in zip(to_turn_off, results):
+            if turn_off_result['success']:
+                actions.append(_make_action(policy, candidate, ProcessWatchdogAction.ACTION_TURN_OFF))
+                state.pop(candidate['uuid'], None)
+            else:
+                error = fix_broken_encoding(turn_off_result.get('error')) or ''
+                actions.append(_make_action(policy, candidate, ProcessWatchdogAction.ACTION_FAILED, error))
+                logger.warning(f"Watchdog turn-off failed for process {candidate['uuid']}: {error}")
+
+    if actions:
+        ProcessWatchdogAction.objects.bulk_create(actions)
+    ProcessWatchdogPolicy.objects.filter(id=policy.id).update(state=state, last_run_at=now, last_error='')
+
+    return {
+        'success': True,
+        'policy_id': policy.id,
+        'dry_run': dry_run,
+        'processes': len(processes),
+        'flagged': len(state),
+        'actions': [action.to_dict() for action in actions],
+    }
+
+
+def run_watchdog(policy_ids=None, dry_run=None):
+    """
+    Проверяет все включённые правила (или только policy_ids) параллельно.
+
+    Returns:
+        dict: {'success', 'policies', 'actions', 'errors', 'results'}
+    """
+    policies = ProcessWatchdogPolicy.objects.filter(enabled=True).select_related('connection')
+    if policy_ids is not None:
+        policies = policies.filter(id__in=policy_ids)
+    policies = list(policies)
+
+    results = run_parallel(lambda policy: run_policy(policy, dry_run=dry_run), policies)
+    errors = [r for r in results if not r['success']]
+    return {
+        'success': not errors,
+        'policies': len(policies),
+        'actions': sum(len(r.get('actions', [])) for r in results),
+        'errors': len(errors),
+        'results': results,
+    }
@@ -0,0 +1,141 @@
+"""
+Кэш результатов команд RAC
+
+Хранит в кэше Django (settings.CACHES) результаты, которые часто
+запрашиваются повторно. Ключи включают подключение и кластер, поэтому
+данные разных подключений не пересекаются.
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+
+# Время жизни сведений об информационной базе (сек)
+INFOBASE_INFO_TIMEOUT = 300
+
+INFOBASE_VERSION_KEY = 'rac:infobase-version:{connection_id}:{cluster_uuid}'
+INFOBASE_INFO_KEY = 'rac:infobase-info:{connection_id}:{cluster_uuid}:{version}:{infobase}:{admin}:{credentials}'
+
+
+def _credentials_digest(infobase_user, infobase_pwd):
+    """Хэш учетных данных (базы или администратора кластера): результат, полученный с одним паролем, не отдаётся при другом"""
+    raw = f'{infobase_user or ""}\0{"" if infobase_pwd is None else infobase_pwd}\0{infobase_pwd is None}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def _infobase_version(connection_id, cluster_uuid):
+    return cache.get(INFOBASE_VERSION_KEY.format(connection_id=connection_id, cluster_uuid=cluster_uuid), 0)
+
+
+def _infobase_info_key(connection_id, cluster_uuid, infobase, infobase_user, infobase_pwd, cluster_admin, cluster_password):
+    return INFOBASE_INFO_KEY.format(
+        connection_id=connection_id,
+        cluster_uuid=cluster_uuid,
+        version=_infobase_version(connection_id, cluster_uuid),
+        infobase=infobase,
+        admin=_credentials_digest(cluster_admin, cluster_password),
+        credentials=_credentials_digest(infobase_user, infobase_pwd)
+    )
+
+
+def get_infobase_info(connection_id, cluster_uuid, infobase, infobase_user=None, infobase_pwd=None,
+                      cluster_admin=None, cluster_password=None):
+    """Возвращает закэшированный результат infobase info или None"""
+    return cache.get(_infobase_info_key(
+        connection_id, cluster_uuid, infobase, infobase_user, infobase_pwd, cluster_admin, cluster_password
+    ))
+
+
+def set_infobase_info(connection_id, cluster_uuid, infobase, data, infobase_user=None, infobase_pwd=None,
+                      cluster_admin=None, cluster_password=None):
+    """
+    Сохраняет успешный результат infobase info.
+
+    Ключ включает учетные данные и базы, и администратора кластера: результат
+    отдаётся только запросу с теми же учетными данными.
+    """
+    cache.set(
+        _infobase_info_key(connection_id, cluster_uuid, infobase, infobase_user, infobase_pwd, cluster_admin, cluster_password),
+        data,
+        INFOBASE_INFO_TIMEOUT
+    )
+
+
+def invalidate_infobases(connection_id, cluster_uuid):
+    """Сбрасывает сведения обо всех информационных базах кластера (после изменения или удаления)"""
+    key = INFOBASE_VERSION_KEY.format(connection_id=connection_id, cluster_uuid=cluster_uuid)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+# Время, в течение которого элемент session list / process list считается актуальным (сек)
+LIST_ENTRY_TIMEOUT = 15
+
+LIST_ENTRY_KEY = 'rac:list-entry:{kind}:{connection_id}:{cluster_uuid}:{licenses}:{credentials}:{uuid}'
+
+
+def _list_entry_key(kind, connection_id, cluster_uuid, uuid, licenses, cluster_admin, cluster_password):
+    return LIST_ENTRY_KEY.format(
+        kind=kind,
+        connection_id=connection_id,
+        cluster_uuid=cluster_uuid,
+        licenses=int(bool(licenses)),
+        credentials=_credentials_digest(cluster_admin, cluster_password),
+        uuid=uuid
+    )
+
+
+def set_list_entries(kind, connection_id, cluster_uuid, items, licenses=False, cluster_admin=None, cluster_password=None):
+    """
+    Индексирует элементы списка (session, process) по UUID.
+
+    Каждый элемент хранится под своим ключом, поэтому чтение одного элемента
+    не зависит от размера списка. Списки с лицензиями и без хранятся раздельно:
+    вывод rac для них различается. Ключ включает учётные данные администратора
+    кластера: элемент отдаётся только запросу с теми же учётными данными.
+    """
+    cache.set_many(
+        {
+            _list_entry_key(kind, connection_id, cluster_uuid, item['uuid'], licenses, cluster_admin, cluster_password): item
+            for item in items
+        },
+        LIST_ENTRY_TIMEOUT
+    )
+
+
+def get_list_entry(kind, connection_id, cluster_uuid, uuid, licenses=False, cluster_admin=None, cluster_password=None):
+    """Возвращает элемент недавно полученного списка или None"""
+    return cache.get(_list_entry_key(kind, connection_id, cluster_uuid, uuid, licenses, cluster_admin, cluster_password))
+
+
+def entry_to_output(kind, entry):
+    """Восстанавливает текст в формате вывода rac для закэшированного элемента"""
+    lines = [f"{kind} : {entry['uuid']}"]
+    lines.extend(f'{key} : {value}' for key, value in entry['data'].items())
+    return '\n'.join(lines) + '\n'
+
+
+LICENSE_USAGE_KEY = 'rac:license-usage:{connections}:{credentials}'
+
+
+def _license_usage_key(connection_ids, cluster_admin, cluster_password):
+    connections = hashlib.sha256(','.join(map(str, sorted(connection_ids))).encode('ascii')).hexdigest()[:32]
+    return LICENSE_USAGE_KEY.format(
+        connections=connections,
+        credentials=_credentials_digest(cluster_admin, cluster_password)
+    )
+
+
+def get_license_usage(connection_ids, cluster_admin=None, cluster_password=None):
+    """Возвращает закэшированную сводку использования лицензий по набору подключений или None"""
+    return cache.get(_license_usage_key(connection_ids, cluster_admin, cluster_password))
+
+
+def set_license_usage(connection_ids, data, cluster_admin=None, cluster_password=None):
+    """Сохраняет сводку на RAC_LICENSE_USAGE_TTL секунд"""
+    cache.set(
+        _license_usage_key(connection_ids, cluster_admin, cluster_password),
+        data,
+        settings.RAC_LICENSE_USAGE_TTL
+    )
@@ -1,13 +1,27 @@
 import subprocess
 import json
 import os
+import re
 import sys
 from django.conf import settings
 from core.models import SystemSettings
+from . import rac_health
+from .parallel import command_slot
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Классы команд rac для выбора таймаута (глагол - последнее слово команды до параметров)
+READ_VERBS = {'list', 'info'}
+LONG_COMMANDS = {('infobase', 'create'), ('infobase', 'drop')}
+
+CYRILLIC_RE = re.compile('[\u0400-\u04FF]')
+
+
+def count_cyrillic(text):
+    """Считает кириллические символы (регулярное выражение - без цикла Python по символам большого вывода)"""
+    return len(CYRILLIC_RE.findall(text))
+
 def fix_broken_encoding(text):
     """
     Исправляет текст, который был неправильно декодирован (CP1251 прочитанная как UTF-8).
@@ -22,7 +36,7 @@ def fix_broken_encoding(text):
         for encoding in ['cp1251', 'koi8-r', 'utf-8', 'cp866']:
             try:
                 decoded = text.decode(encoding, errors='replace')
-                cyrillic_count = sum(1 for char in decoded if '\u0400' <= char <= '\u04FF')
+                cyrillic_count = count_cyrillic(decoded)
                 if cyrillic_count > 0:
                     return decoded
             except (UnicodeDecodeError, LookupError):
@@ -42,11 +56,11 @@ def fix_broken_encoding(text):
         'РќРµРґРѕСЃС‚Р°С‚РѕС‡РЅРѕ', 'РїСЂР°РІ', 'РїРѕР»СЊР·РѕРІР°С‚РµР»СЏ', 'РёРЅС„РѕСЂРјР°С†РёРѕРЅРЅСѓСЋ', 'Р±Р°Р·Сѓ'
     ]
     broken_count = sum(1 for pattern in broken_patterns if pattern in text)
-    cyrillic_count = sum(1 for char in text if '\u0400' <= char <= '\u04FF')
+    cyrillic_count = count_cyrillic(text)
     
     # Также проверяем на отдельные "битые" символы
     broken_chars = ['Р', 'С']
-    broken_chars_count = sum(1 for char in text if char in broken_chars)
+    broken_chars_count = sum(text.count(char) for char in set(broken_chars) if len(char) == 1)
     
     # Если есть "битые" символы и нет правильной кириллицы - пытаемся исправить
     if (broken_count > 0 or broken_chars_count > 3) and cyrillic_count == 0:
@@ -54,7 +68,7 @@ def fix_broken_encoding(text):
             # Кодируем обратно в байты как UTF-8, затем декодируем как CP1251
             fixed_bytes = text.encode('utf-8', errors='replace')
             fixed_text = fixed_bytes.decode('cp1251', errors='replace')
-            fixed_cyrillic = sum(1 for char in fixed_text if '\u0400' <= char <= '\u04FF')
+            fixed_cyrillic = count_cyrillic(fixed_text)
             if fixed_cyrillic > 0:
                 logger.info(f"Fixed broken encoding: {broken_count} broken patterns, {broken_chars_count} broken chars -> {fixed_cyrillic} cyrillic chars")
                 return fixed_text
@@ -66,7 +80,7 @@ def fix_broken_encoding(text):
         try:
             fixed_bytes = text.encode('utf-8', errors='replace')
             fixed_text = fixed_bytes.decode('koi8-r', errors='replace')
-            fixed_cyrillic = sum(1 for char in fixed_text if '\u0400' <= char <= '\u04FF')
+            fixed_cyrillic = count_cyrillic(fixed_text)
             if fixed_cyrillic > 0:
                 logger.info(f"Fixed broken encoding with koi8-r: {fixed_cyrillic} cyrillic chars")
                 return fixed_text
@@ -76,13 +90,16 @@ def fix_broken_encoding(text):
     return text
 
 class RACClient:
-    def __init__(self, server_connection, cluster_admin=None, cluster_password=None):
+    def __init__(self, server_connection, cluster_admin=None, cluster_password=None, timeout=None):
         self.server_connection = server_connection
         # Получаем путь к RAC из системных настроек
         self.rac_path = SystemSettings.get_setting('rac_path', settings.RAC_PATH)
         # Администратор кластера (передается отдельно, не из server_connection)
         self.cluster_admin = cluster_admin
         self.cluster_password = cluster_password
+        # Таймаут команды rac в секундах (фоновые задачи передают увеличенное значение);
+        # если не указан - выбирается по классу команды, см. _get_timeout
+        self.timeout = timeout
         
     def _mask_sensitive_data(self, command):
         """Маскирует чувствительные данные в команде для логирования"""
@@ -97,6 +114,17 @@ class RACClient:
             masked = masked.replace(str(self.server_connection.agent_password), '***')
         return masked
         
+    def _get_timeout(self, args):
+        """Таймаут команды: явно заданный или по классу (чтение, изменение, создание/удаление базы)"""
+        if self.timeout:
+            return self.timeout
+        words = [arg for arg in args[:3] if not arg.startswith('-')]
+        if tuple(words[:2]) in LONG_COMMANDS:
+            return settings.RAC_TIMEOUT_LONG
+        if words and words[-1] in READ_VERBS:
+            return settings.RAC_TIMEOUT_READ
+        return settings.RAC_TIMEOUT_WRITE
+
     def _execute_command(self, args):
         """Выполняет команду rac и возвращает результат"""
         connection_str = self.server_connection.get_connection_string()
@@ -176,13 +204,26 @@ class RACClient:
                 env['LC_CTYPE'] = 'ru_RU.utf8'
                 env['PYTHONIOENCODING'] = 'utf-8'
             
-            # Запускаем команду без text=True, чтобы получить байты
-            result = subprocess.run(
-                cmd_args,
-                capture_output=True,
-                env=env,
-                timeout=30  # 30 секунд таймаут
-            )
+            # RAS недавно не отвечал - завершаемся сразу, не дожидаясь таймаута
+            timeout = self._get_timeout(args)
+            breaker_error = rac_health.before_call(connection_str, timeout)
+            if breaker_error:
+                logger.warning(f"RAC command skipped: {breaker_error}")
+                return {'success': False, 'error': breaker_error, 'unavailable': True}
+            
+            # Запускаем команду без text=True, чтобы получить байты.
+            # Число одновременных команд к одному RAS ограничено (RAC_MAX_PARALLEL_PER_CONNECTION)
+            try:
+                with command_slot(connection_str):
+                    result = subprocess.run(
+                        cmd_args,
+                        capture_output=True,
+                        env=env,
+                        timeout=timeout
+                    )
+            except subprocess.TimeoutExpired:
+                rac_health.record_failure(connection_str)
+                raise
             
             def decode_text(data_bytes):
                 """Пробует декодировать текст с разными кодировками"""
@@ -217,8 +258,8 @@ class RACClient:
                 try:
                     utf8_decoded = data_bytes.decode('utf-8', errors='replace')
                     broken_chars = ['Р', 'С', 'Рµ', 'РЅ', 'Рѕ', 'Р°', 'РІ', 'Рё', 'Р»', 'Рј', 'РЅ', 'Рѕ', 'Рї', 'СЂ', 'СЃ', 'С‚', 'Сѓ', 'С„', 'С…', 'С†', 'С‡', 'С€', 'С‰', 'СЉ', 'С‹', 'СЊ', 'СЌ', 'СЋ', 'СЏ']
-                    broken_count = sum(1 for char in utf8_decoded if char in broken_chars)
-                    utf8_cyrillic = sum(1 for char in utf8_decoded if '\u0400' <= char <= '\u04FF')
+                    broken_count = sum(utf8_decoded.count(char) for char in set(broken_chars) if len(char) == 1)
+                    utf8_cyrillic = count_cyrillic(utf8_decoded)
                     
                     # Если много "битых" символов и нет кириллицы - это явно cp1251, прочитанная как utf-8
                     # Снижаем порог до 1 для более агрессивного обнаружения
@@ -233,7 +274,7 @@ class RACClient:
                 if broken_utf8_decoded and broken_utf8_score > 0:
                     try:
                         cp1251_decoded = data_bytes.decode('cp1251', errors='replace')
-                        cp1251_cyrillic = sum(1 for char in cp1251_decoded if '\u0400' <= char <= '\u04FF')
+                        cp1251_cyrillic = count_cyrillic(cp1251_decoded)
                         if cp1251_cyrillic > 0:
                             logger.info(f"Fixed broken encoding: decoded as cp1251 with {cp1251_cyrillic} cyrillic characters (found {broken_utf8_score} broken utf-8 chars)")
                             return cp1251_decoded
@@ -244,7 +285,7 @@ class RACClient:
                     if sys.platform != 'win32':
                         try:
                             koi8_decoded = data_bytes.decode('koi8-r', errors='replace')
-                            koi8_cyrillic = sum(1 for char in koi8_decoded if '\u0400' <= char <= '\u04FF')
+                            koi8_cyrillic = count_cyrillic(koi8_decoded)
                             if koi8_cyrillic > 0:
                                 logger.info(f"Fixed broken encoding: decoded as koi8-r with {koi8_cyrillic} cyrillic characters")
                                 return koi8_decoded
@@ -255,7 +296,7 @@ class RACClient:
                 # Если она успешно декодирует - используем её (даже если нет кириллицы)
                 try:
                     primary_decoded = data_bytes.decode(primary_encoding, errors='replace')
-                    primary_cyrillic = sum(1 for char in primary_decoded if '\u0400' <= char <= '\u04FF')
+                    primary_cyrillic = count_cyrillic(primary_decoded)
                     # Если основная кодировка успешно декодирует и есть кириллица - используем её
                     if primary_cyrillic > 0:
                         logger.debug(f"Decoded with {primary_cyrillic} cyrillic characters using primary encoding: {primary_encoding}")
@@ -274,7 +315,7 @@ class RACClient:
                     try:
                         decoded = data_bytes.decode(encoding, errors='replace')
                         # Подсчитываем количество кириллических символов
-                        cyrillic_count = sum(1 for char in decoded if '\u0400' <= char <= '\u04FF')
+                        cyrillic_count = count_cyrillic(decoded)
                         
                         # Если есть кириллица, это хороший признак
                         if cyrillic_count > best_score:
@@ -316,15 +357,15 @@ class RACClient:
                             utf8_decoded = error_bytes.decode('utf-8', errors='replace')
                             # Проверяем на признаки "битой" кодировки (CP1251, прочитанная как UTF-8)
                             broken_chars = ['Р', 'С', 'Рµ', 'РЅ', 'Рѕ', 'Р°', 'РІ', 'Рё', 'Р»', 'Рј', 'РЅ', 'Рѕ', 'Рї', 'СЂ', 'СЃ', 'С‚', 'Сѓ', 'С„', 'С…', 'С†', 'С‡', 'С€', 'С‰', 'СЉ', 'С‹', 'СЊ', 'СЌ', 'СЋ', 'СЏ']
-                            broken_count = sum(1 for char in utf8_decoded if char in broken_chars)
-                            utf8_cyrillic = sum(1 for char in utf8_decoded if '\u0400' <= char <= '\u04FF')
+                            broken_count = sum(utf8_decoded.count(char) for char in set(broken_chars) if len(char) == 1)
+                            utf8_cyrillic = count_cyrillic(utf8_decoded)
                             
                             # Если есть "битые" символы и нет кириллицы - это CP1251, прочитанная как UTF-8
                             if broken_count > 0 and utf8_cyrillic == 0:
                                 # Пробуем декодировать как CP1251
                                 try:
                                     cp1251_text = error_bytes.decode('cp1251', errors='replace')
-                                    cp1251_cyrillic = sum(1 for char in cp1251_text if '\u0400' <= char <= '\u04FF')
+                                    cp1251_cyrillic = count_cyrillic(cp1251_text)
                                     if cp1251_cyrillic > 0:
                                         logger.info(f"Error fixed: decoded as cp1251 with {cp1251_cyrillic} cyrillic characters (found {broken_count} broken utf-8 chars)")
                                         error_text = cp1251_text
@@ -332,7 +373,7 @@ class RACClient:
                                         # Пробуем koi8-r
                                         try:
                                             koi8_text = error_bytes.decode('koi8-r', errors='replace')
-                                            koi8_cyrillic = sum(1 for char in koi8_text if '\u0400' <= char <= '\u04FF')
+                                            koi8_cyrillic = count_cyrillic(koi8_text)
                                             if koi8_cyrillic > 0:
                                                 logger.info(f"Error decoded as koi8-r with {koi8_cyrillic} cyrillic characters")
                                                 error_text = koi8_text
@@ -356,9 +397,17 @@ class RACClient:
                 error_text = fix_broken_encoding(error_text)
                 
                 # Логируем с правильной кодировкой
+                # Ошибку самой команды вернул RAS - он доступен; ошибка соединения учитывается выключателем
+                if rac_health.is_connection_error(error_text):
+                    rac_health.record_failure(connection_str)
+                else:
+                    rac_health.record_success(connection_str)
+                
                 logger.error(f"RAC command failed: {error_text}")
                 return {'success': False, 'error': error_text}
             
+            rac_health.record_success(connection_str)
+            
             # Декодируем вывод с правильной кодировкой
             output_text = decode_text(result.stdout)
             # Логируем результаты команд RAC на уровне DEBUG
@@ -508,12 +557,24 @@ class RACClient:
                 env['LC_CTYPE'] = 'ru_RU.utf8'
                 env['PYTHONIOENCODING'] = 'utf-8'
             
-            result = subprocess.run(
-                cmd_args,
-                capture_output=True,
-                env=env,
-                timeout=30
-            )
+            # RAS недавно не отвечал - завершаемся сразу, не дожидаясь таймаута
+            timeout = self._get_timeout(args)
+            breaker_error = rac_health.before_call(connection_str, timeout)
+            if breaker_error:
+                logger.warning(f"RAC command skipped: {breaker_error}")
+                return {'success': False, 'error': breaker_error, 'unavailable': True}
+            
+            try:
+                with command_slot(connection_str):
+                    result = subprocess.run(
+                        cmd_args,
+                        capture_output=True,
+                        env=env,
+                        timeout=timeout
+                    )
+            except subprocess.TimeoutExpired:
+                rac_health.record_failure(connection_str)
+                raise
             
             def decode_text(data_bytes):
                 """Пробует декодировать текст с разными кодировками"""
@@ -544,7 +605,7 @@ class RACClient:
                 # Сначала пробуем основную кодировку из настроек
                 try:
                     primary_decoded = data_bytes.decode(primary_encoding, errors='replace')
-                    primary_cyrillic = sum(1 for char in primary_decoded if '\u0400' <= char <= '\u04FF')
+                    primary_cyrillic = count_cyrillic(primary_decoded)
                     if primary_cyrillic > 0:
                         return primary_decoded
                     # Если кириллицы нет, но декодирование успешно - тоже используем основную
@@ -556,8 +617,8 @@ class RACClient:
                 try:
                     utf8_decoded = data_bytes.decode('utf-8', errors='replace')
                     broken_chars = ['Р', 'С', 'Рµ', 'РЅ', 'Рѕ', 'Р°', 'РІ', 'Рё', 'Р»', 'Рј', 'РЅ', 'Рѕ', 'Рї', 'СЂ', 'СЃ', 'С‚', 'Сѓ', 'С„', 'С…', 'С†', 'С‡', 'С€', 'С‰', 'СЉ', 'С‹', 'СЊ', 'СЌ', 'СЋ', 'СЏ']
-                    broken_count = sum(1 for char in utf8_decoded if char in broken_chars)
-                    utf8_cyrillic = sum(1 for char in utf8_decoded if '\u0400' <= char <= '\u04FF')
+                    broken_count = sum(utf8_decoded.count(char) for char in set(broken_chars) if len(char) == 1)
+                    utf8_cyrillic = count_cyrillic(utf8_decoded)
                     
                     # Если много "битых" символов и нет кириллицы - это явно cp1251, прочитанная как utf-8
                     # Снижаем порог до 1 для более агрессивного обнаружения
@@ -572,7 +633,7 @@ class RACClient:
                 if broken_utf8_decoded and broken_utf8_score > 0:
                     try:
                         cp1251_decoded = data_bytes.decode('cp1251', errors='replace')
-                        cp1251_cyrillic = sum(1 for char in cp1251_decoded if '\u0400' <= char <= '\u04FF')
+                        cp1251_cyrillic = count_cyrillic(cp1251_decoded)
                         if cp1251_cyrillic > 0:
                             logger.info(f"Fixed broken encoding: decoded as cp1251 with {cp1251_cyrillic} cyrillic characters (found {broken_utf8_score} broken utf-8 chars)")
                             return cp1251_decoded
@@ -583,7 +644,7 @@ class RACClient:
                     if sys.platform != 'win32':
                         try:
                             koi8_decoded = data_bytes.decode('koi8-r', errors='replace')
-                            koi8_cyrillic = sum(1 for char in koi8_decoded if '\u0400' <= char <= '\u04FF')
+                            koi8_cyrillic = count_cyrillic(koi8_decoded)
                             if koi8_cyrillic > 0:
                                 logger.info(f"Fixed broken encoding: decoded as koi8-r with {koi8_cyrillic} cyrillic characters")
                                 return koi8_decoded
@@ -595,7 +656,7 @@ class RACClient:
                     try:
                         decoded = data_bytes.decode(encoding, errors='replace')
                         # Подсчитываем количество кириллических символов
-                        cyrillic_count = sum(1 for char in decoded if '\u0400' <= char <= '\u04FF')
+                        cyrillic_count = count_cyrillic(decoded)
                         
                         # Если есть кириллица, это хороший признак
                         if cyrillic_count > best_score:
@@ -631,15 +692,15 @@ class RACClient:
                             utf8_decoded = error_bytes.decode('utf-8', errors='replace')
                             # Проверяем на признаки "битой" кодировки (CP1251, прочитанная как UTF-8)
                             broken_chars = ['Р', 'С', 'Рµ', 'РЅ', 'Рѕ', 'Р°', 'РІ', 'Рё', 'Р»', 'Рј', 'РЅ', 'Рѕ', 'Рї', 'СЂ', 'СЃ', 'С‚', 'Сѓ', 'С„', 'С…', 'С†', 'С‡', 'С€', 'С‰', 'СЉ', 'С‹', 'СЊ', 'СЌ', 'СЋ', 'СЏ']
-                            broken_count = sum(1 for char in utf8_decoded if char in broken_chars)
-                            utf8_cyrillic = sum(1 for char in utf8_decoded if '\u0400' <= char <= '\u04FF')
+                            broken_count = sum(utf8_decoded.count(char) for char in set(broken_chars) if len(char) == 1)
+                            utf8_cyrillic = count_cyrillic(utf8_decoded)
                             
                             # Если есть "битые" символы и нет кириллицы - это CP1251, прочитанная как UTF-8
                             if broken_count > 0 and utf8_cyrillic == 0:
                                 # Пробуем декодировать как CP1251
                                 try:
                                     cp1251_text = error_bytes.decode('cp1251', errors='replace')
-                                    cp1251_cyrillic = sum(1 for char in cp1251_text if '\u0400' <= char <= '\u04FF')
+                                    cp1251_cyrillic = count_cyrillic(cp1251_text)
                                     if cp1251_cyrillic > 0:
                                         logger.info(f"Error fixed: decoded as cp1251 with {cp1251_cyrillic} cyrillic characters (found {broken_count} broken utf-8 chars)")
                                         error_text = cp1251_text
@@ -647,7 +708,7 @@ class RACClient:
                                         # Пробуем koi8-r
                                         try:
                                             koi8_text = error_bytes.decode('koi8-r', errors='replace')
-                                            koi8_cyrillic = sum(1 for char in koi8_text if '\u0400' <= char <= '\u04FF')
+                                            koi8_cyrillic = count_cyrillic(koi8_text)
                                             if koi8_cyrillic > 0:
                                                 logger.info(f"Error decoded as koi8-r with {koi8_cyrillic} cyrillic characters")
                                                 error_text = koi8_text
@@ -670,9 +731,16 @@ class RACClient:
                 # Проверяем и исправляем "битую" кодировку, если ошибка уже была неправильно декодирована
                 error_text = fix_broken_encoding(error_text)
                 
+                # Ошибку самой команды вернул RAS - он доступен; ошибка соединения учитывается выключателем
+                if rac_health.is_connection_error(error_text):
+                    rac_health.record_failure(connection_str)
+                else:
+                    rac_health.record_success(connection_str)
+                
                 logger.error(f"RAC command failed: {error_text}")
                 return {'success': False, 'error': error_text}
             
+            rac_health.record_success(connection_str)
             output_text = decode_text(result.stdout)
             return {'success': True, 'output': output_text}
             
@@ -741,6 +809,15 @@ class RACClient:
             args.append(f'--error-message={error_message}')
         return self._execute_command(args)
     
+    def get_connection_list(self, cluster_uuid, process_uuid=None, infobase_uuid=None):
+        """Получает список соединений (conn-id и номер сеанса каждого соединения)"""
+        args = ['connection', 'list', f'--cluster={cluster_uuid}']
+        if process_uuid:
+            args.append(f'--process={process_uuid}')
+        if infobase_uuid:
+            args.append(f'--infobase={infobase_uuid}')
+        return self._execute_command(args)
+    
     def get_infobase_summary_list(self, cluster_uuid):
         """Получает список информационных баз"""
         args = [
@@ -0,0 +1,291 @@
+"""
+Состояние доступности серверов администрирования (RAS)
+
+Проверка доступности: параллельные TCP-подключения к host:ras_port (и при
+необходимости команда cluster list) с кэшированием результата на короткое время.
+
+Автоматический выключатель (circuit breaker) для команд rac: после нескольких
+подряд ошибок соединения или таймаутов с одним RAS команды к нему завершаются
+сразу, не дожидаясь таймаута. По истечении паузы выполняется одна пробная
+команда: при успехе выключатель закрывается, при ошибке пауза начинается заново.
+
+Состояние хранится в кэше Django (settings.CACHES) по адресу host:port,
+поэтому общее для всех подключений к одному RAS. Результаты проверок
+дополнительно записываются в таблицу RasHealth: кэш по умолчанию локален для
+процесса, а периодическую проверку выполняет отдельный процесс планировщика.
+"""
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .parallel import run_parallel, run_staggered
+
+BREAKER_KEY = 'rac:breaker:{endpoint}'
+BREAKER_PROBE_KEY = 'rac:breaker-probe:{endpoint}'
+HEALTH_KEY = 'rac:health:{endpoint}'
+
+# Результат из таблицы RasHealth старше этого считается неизвестным (сек)
+HEALTH_MAX_AGE = 300
+# Окно, по которому распределяются проверки периодической задачи (сек); интервал задачи по умолчанию - 30 сек
+REFRESH_SPREAD = 20
+
+# Фрагменты сообщений rac, означающие, что RAS недоступен (а не ошибку самой команды)
+CONNECTION_ERROR_MARKERS = (
+    'connection refused',
+    'connection reset',
+    'connection timed out',
+    'no route to host',
+    'network is unreachable',
+    'host not found',
+    'name or service not known',
+    'отказ в соединении',
+    'подключение не установлено',
+    'не удалось установить соединение',
+    'сервер не обнаружен',
+    'превышено время ожидания',
+)
+
+
+def is_connection_error(error_text):
+    """Проверяет, что ошибка rac вызвана недоступностью RAS"""
+    text = (error_text or '').lower()
+    return any(marker in text for marker in CONNECTION_ERROR_MARKERS)
+
+
+def _get_state(endpoint):
+    return cache.get(BREAKER_KEY.format(endpoint=endpoint)) or {'failures': 0, 'opened_until': None}
+
+
+def before_call(endpoint, timeout):
+    """
+    Проверяет, можно ли выполнять команду для RAS.
+
+    Args:
+        endpoint: Адрес RAS (host:port)
+        timeout: Таймаут команды - на это время занимается право пробной команды
+
+    Returns:
+        str | None: Сообщение об ошибке, если выключатель разомкнут, иначе None
+    """
+    state = _get_state(endpoint)
+    opened_until = state['opened_until']
+    if opened_until is None:
+        return None
+
+    remaining = opened_until - time.time()
+    if remaining > 0:
+        return f'RAS {endpoint} is unavailable, retry in {int(remaining) + 1} s'
+
+    # Пауза истекла: пробную команду выполняет только первый запрос
+    if cache.add(BREAKER_PROBE_KEY.format(endpoint=endpoint), 1, timeout + 5):
+        return None
+    return f'RAS {endpoint} is unavailable, checking connection'
+
+
+def record_success(endpoint):
+    """RAS ответил (в том числе ошибкой команды) - сбрасываем счётчик ошибок"""
+    key = BREAKER_KEY.format(endpoint=endpoint)
+    if cache.get(key) is not None:
+        cache.delete_many([key, BREAKER_PROBE_KEY.format(endpoint=endpoint)])
+
+
+def record_failure(endpoint):
+    """Учитывает ошибку соединения или таймаут; при достижении порога размыкает выключатель"""
+    state = _get_state(endpoint)
+    state['failures'] += 1
+    if state['failures'] >= settings.RAC_BREAKER_FAILURES:
+        state['opened_until'] = time.time() + settings.RAC_BREAKER_COOLDOWN
+        cache.delete(BREAKER_PROBE_KEY.format(endpoint=endpoint))
+    cache.set(BREAKER_KEY.format(endpoint=endpoint), state, None)
+
+
+def get_status(endpoint):
+    """Возвращает состояние выключателя для RAS: closed, open или half_open"""
+    state = _get_state(endpoint)
+    opened_until = state['opened_until']
+    if opened_until is None:
+        status = 'closed'
+    elif opened_until > time.time():
+        status = 'open'
+    else:
+        status = 'half_open'
+    return {'status': status, 'failures': state['failures'], 'opened_until': opened_until}
+
+
+def probe_endpoint(host, port, timeout=None):
+    """
+    Проверяет TCP-подключение к RAS.
+
+    Returns:
+        dict: {'status': 'up'|'down', 'latency_ms', 'error'}
+    """
+    started = time.monotonic()
+    try:
+        with socket.create_connection((host, int(port)), timeout=timeout or settings.RAC_HEALTH_CONNECT_TIMEOUT):
+            pass
+    except (OSError, ValueError) as e:
+        return {'status': 'down', 'latency_ms': None, 'error': str(e)}
+    return {'status': 'up', 'latency_ms': round((time.monotonic() - started) * 1000, 1), 'error': None}
+
+
+def _deep_check(connection, health):
+    """Дополняет результат TCP-проверки выполнением cluster list"""
+    # rac_client импортирует этот модуль - импортируем здесь
+    from .rac_client import RACClient, fix_broken_encoding
+
+    started = time.monotonic()
+    result = RACClient(connection).get_cluster_list()
+    health['rac'] = {
+        'success': result['success'],
+        'latency_ms': round((time.monotonic() - started) * 1000, 1),
+        'error': fix_broken_encoding(result['error']) if result.get('error') else None
+    }
+    if not result['success']:
+        health['status'] = 'degraded'
+    return health
+
+
+def _load_health(endpoints, max_age):
+    """
+    Последние результаты проверки {endpoint: dict} из кэша, а для отсутствующих
+    в кэше - из таблицы RasHealth, если они не старше max_age секунд.
+    """
+    from .models import RasHealth
+
+    cached = cache.get_many([HEALTH_KEY.format(endpoint=e) for e in endpoints])
+    health = {}
+    for endpoint in endpoints:
+        entry = cached.get(HEALTH_KEY.format(endpoint=endpoint))
+        if entry is not None:
+            health[endpoint] = entry
+    missing = [e for e in endpoints if e not in health]
+    if missing:
+        stored = RasHealth.objects.filter(
+            endpoint__in=missing, checked_at__gte=timezone.now() - timedelta(seconds=max_age)
+        ).values_list('endpoint', 'data')
+        health.update(stored)
+    return health
+
+
+def _store_health(probed):
+    """Сохраняет результаты проверки в кэш и в таблицу RasHealth"""
+    from .models import RasHealth
+
+    cache.set_many({HEALTH_KEY.format(endpoint=e): entry for e, entry in probed.items()},
+                   settings.RAC_HEALTH_TTL)
+    RasHealth.objects.bulk_create(
+        [
+            RasHealth(endpoint=endpoint, data=entry,
+                      checked_at=datetime.fromtimestamp(entry['checked_at'], tz=dt_timezone.utc))
+            for endpoint, entry in probed.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['endpoint'],
+        update_fields=['data', 'checked_at']
+    )
+
+
+def get_cached_health(connections):
+    """
+    Возвращает последнее известное состояние подключений {connection.id: dict | None} без проверок.
+
+    Результаты периодической задачи планировщика читаются из таблицы RasHealth.
+    """
+    keys = {conn.id: conn.get_connection_string() for conn in connections}
+    health = _load_health(list(set(keys.values())), HEALTH_MAX_AGE)
+    return {conn_id: health.get(endpoint) for conn_id, endpoint in keys.items()}
+
+
+def check_connections(connections, refresh=False, deep=False):
+    """
+    Проверяет доступность RAS для набора подключений.
+
+    Каждый адрес host:port проверяется один раз, даже если на него ссылается
+    несколько подключений. Свежие результаты берутся из кэша (RAC_HEALTH_TTL),
+    остальные адреса проверяются параллельно.
+
+    Args:
+        connections: Подключения (ServerConnection)
+        refresh: Проверить заново, не используя кэш и результаты из RasHealth
+        deep: Для доступных по TCP адресов выполнить cluster list
+
+    Returns:
+        dict: {connection.id: {'status': 'up'|'down'|'degraded', 'latency_ms', 'error',
+               'checked_at', 'cached', 'breaker', ['rac']}}
+    """
+    by_endpoint = {}
+    for conn in connections:
+        by_endpoint.setdefault(conn.get_connection_string(), conn)
+
+    cached = {} if refresh else _load_health(list(by_endpoint), settings.RAC_HEALTH_TTL)
+    health = {}
+    to_probe = []
+    for endpoint in by_endpoint:
+        entry = cached.get(endpoint)
+        # Результат без cluster list не подходит для глубокой проверки
+        if entry is not None and (not deep or 'rac' in entry or entry['status'] == 'down'):
+            health[endpoint] = dict(entry, cached=True)
+        else:
+            to_probe.append(endpoint)
+
+    if to_probe:
+        # TCP-проверки дешёвые - выполняем их шире, чем команды rac
+        workers = min(settings.RAC_HEALTH_PARALLEL, len(to_probe))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rac-health') as executor:
+            probed = list(executor.map(
+                lambda e: probe_endpoint(by_endpoint[e].server_host, by_endpoint[e].ras_port), to_probe
+            ))
+        probed = dict(zip(to_probe, probed))
+
+        if deep:
+            alive = [e for e in to_probe if probed[e]['status'] == 'up']
+            for endpoint, result in zip(alive, run_parallel(
+                    lambda e: _deep_check(by_endpoint[e], probed[e]), alive)):
+                if 'status' not in result:
+                    # Исключение внутри проверки (run_parallel вернул только ошибку)
+                    probed[endpoint].update(status='degraded', rac={'success': False, 'error': result.get('error')})
+
+        now = time.time()
+        for entry in probed.values():
+            entry['checked_at'] = now
+        _store_health(probed)
+        for endpoint, entry in probed.items():
+            health[endpoint] = dict(entry, cached=False)
+
+    for endpoint, entry in health.items():
+        entry['breaker'] = get_status(endpoint)['status']
+
+    return {conn.id: health[conn.get_connection_string()] for conn in connections}
+
+
+def refresh_health(connection_ids=None, deep=False, spread_seconds=REFRESH_SPREAD):
+    """
+    Периодическая проверка доступности всех подключений (задача планировщика).
+
+    Результаты записываются в RasHealth, откуда их читает список подключений
+    (get_cached_health). Адреса RAS проверяются не одновременно, а равномерно в
+    течение spread_seconds.
+    """
+    from .models import ServerConnection
+
+    connections = ServerConnection.objects.all()
+    if connection_ids is not None:
+        connections = connections.filter(id__in=connection_ids)
+    by_endpoint = {}
+    for conn in connections:
+        by_endpoint.setdefault(conn.get_connection_string(), []).append(conn)
+
+    health = {}
+    errors = []
+    for result in run_staggered(lambda conns: check_connections(conns, refresh=True, deep=deep),
+                                list(by_endpoint.values()), spread_seconds):
+        if 'success' in result:
+            # Исключение внутри проверки (run_staggered вернул только ошибку)
+            errors.append(result.get('error'))
+            continue
+        health.update(result)
+    down = sum(1 for entry in health.values() if entry['status'] != 'up')
+    return {'success': not errors, 'connections': len(health), 'unavailable': down, 'errors': errors}
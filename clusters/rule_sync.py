@@ -0,0 +1,188 @@
+"""
+Синхронизация требований назначения функциональности (ТНФ) с желаемым состоянием
+
+По желаемому упорядоченному списку правил и текущему выводу rule list строится
+минимальная последовательность команд rule remove / update / insert: правила,
+порядок которых уже совпадает (наибольшая возрастающая подпоследовательность),
+не трогаются, остальные перемещаются или создаются на нужных позициях.
+"""
+from bisect import bisect_left
+from collections import defaultdict, deque
+
+# Поля правила: ключ в API (как в create_rule) -> ключ в выводе rule list
+RULE_FIELDS = {
+    'object_type': 'object-type',
+    'infobase_name': 'infobase-name',
+    'rule_type': 'rule-type',
+    'application_ext': 'application-ext',
+    'priority': 'priority',
+}
+
+RULE_DEFAULTS = {
+    'object_type': '',
+    'infobase_name': '',
+    'rule_type': 'auto',
+    'application_ext': '',
+    'priority': '0',
+}
+
+# Русские названия типов правил из интерфейса
+RULE_TYPE_MAP = {'Авто': 'auto', 'Назначать': 'always', 'Не назначать': 'never'}
+
+
+def _clean(value):
+    if value is None:
+        return ''
+    return str(value).strip().strip('"')
+
+
+def normalize_rule(fields):
+    """Приводит поля правила к сравнимому виду (ключи API, строки без кавычек)"""
+    rule = {}
+    for key, default in RULE_DEFAULTS.items():
+        value = _clean(fields.get(key, default)) or default
+        if key == 'rule_type':
+            value = RULE_TYPE_MAP.get(value, value).lower()
+        elif key == 'priority':
+            try:
+                value = str(int(value))
+            except ValueError:
+                pass
+        rule[key] = value
+    return rule
+
+
+def rule_from_list_entry(entry):
+    """Преобразует элемент _parse_rule_list в нормализованное правило"""
+    data = entry.get('data', {})
+    return normalize_rule({key: data.get(rac_key) for key, rac_key in RULE_FIELDS.items()})
+
+
+def _rule_key(rule):
+    return tuple(rule[key] for key in RULE_DEFAULTS)
+
+
+def _target_key(rule):
+    return rule['object_type'], rule['infobase_name'], rule['application_ext']
+
+
+def _longest_increasing_subsequence(values):
+    """Возвращает множество индексов элементов наибольшей возрастающей подпоследовательности"""
+    tails = []
+    tails_index = []
+    previous = [-1] * len(values)
+    for i, value in enumerate(values):
+        pos = bisect_left(tails, value)
+        if pos == len(tails):
+            tails.append(value)
+            tails_index.append(i)
+        else:
+            tails[pos] = value
+            tails_index[pos] = i
+        previous[i] = tails_index[pos - 1] if pos > 0 else -1
+
+    result = set()
+    i = tails_index[-1] if tails_index else -1
+    while i != -1:
+        result.add(i)
+        i = previous[i]
+    return result
+
+
+def plan_rule_sync(current, desired):
+    """
+    Строит план команд для приведения списка правил к желаемому.
+
+    Args:
+        current: Результат _parse_rule_list (текущий порядок на сервере)
+        desired: Желаемый упорядоченный список правил; элемент может содержать
+                 uuid существующего правила, остальные поля - как в create_rule.
+                 Правила без uuid сопоставляются с текущими по полям, затем по объекту
+                 (тип объекта, информационная база, приложение)
+
+    Returns:
+        list: Операции {'action': 'remove'|'update'|'insert', 'rule_uuid', 'position', 'fields'}
+              в порядке выполнения; позиции рассчитаны с учётом предыдущих операций
+
+    Raises:
+        ValueError: Если uuid в желаемом списке не найден или повторяется
+    """
+    current_rules = {entry['uuid']: rule_from_list_entry(entry) for entry in current}
+    current_order = [entry['uuid'] for entry in current]
+    current_index = {uuid: i for i, uuid in enumerate(current_order)}
+
+    # Сопоставляем желаемые правила с текущими: сначала по uuid, затем по совпадению полей
+    desired_rules = [normalize_rule(item) for item in desired]
+    matched = [None] * len(desired)
+    used = set()
+    for i, item in enumerate(desired):
+        uuid = _clean(item.get('uuid'))
+        if not uuid:
+            continue
+        if uuid not in current_rules:
+            raise ValueError(f'Правило {uuid} не найдено на сервере')
+        if uuid in used:
+            raise ValueError(f'Правило {uuid} указано несколько раз')
+        matched[i] = uuid
+        used.add(uuid)
+
+    unmatched_by_key = defaultdict(deque)
+    for uuid in current_order:
+        if uuid not in used:
+            unmatched_by_key[_rule_key(current_rules[uuid])].append(uuid)
+    for i, rule in enumerate(desired_rules):
+        if matched[i] is None:
+            candidates = unmatched_by_key.get(_rule_key(rule))
+            if candidates:
+                matched[i] = candidates.popleft()
+                used.add(matched[i])
+
+    # Правило для того же объекта с другими параметрами обновляем, а не пересоздаём
+    unmatched_by_target = defaultdict(deque)
+    for uuid in current_order:
+        if uuid not in used:
+            unmatched_by_target[_target_key(current_rules[uuid])].append(uuid)
+    for i, rule in enumerate(desired_rules):
+        if matched[i] is None:
+            candidates = unmatched_by_target.get(_target_key(rule))
+            if candidates:
+                matched[i] = candidates.popleft()
+                used.add(matched[i])
+
+    operations = []
+
+    # 1. Удаляем правила, которых нет в желаемом списке
+    working = []
+    for uuid in current_order:
+        if uuid in used:
+            working.append(uuid)
+        else:
+            operations.append({'action': 'remove', 'rule_uuid': uuid, 'position': None, 'fields': None})
+
+    # 2. Правила из наибольшей возрастающей подпоследовательности остаются на месте
+    kept = [i for i in range(len(desired)) if matched[i] is not None]
+    stable_positions = _longest_increasing_subsequence([current_index[matched[i]] for i in kept])
+    stable = {kept[p] for p in stable_positions}
+
+    # 3. Остальные ставим сразу после предыдущего желаемого правила (слева направо)
+    previous_uuid = None
+    for i, rule in enumerate(desired_rules):
+        uuid = matched[i]
+        changed = uuid is not None and rule != current_rules[uuid]
+
+        if uuid is None:
+            position = working.index(previous_uuid) + 1 if previous_uuid else 0
+            uuid = f'new:{i}'
+            working.insert(position, uuid)
+            operations.append({'action': 'insert', 'rule_uuid': None, 'position': position, 'fields': rule})
+        elif i not in stable:
+            working.remove(uuid)
+            position = working.index(previous_uuid) + 1 if previous_uuid else 0
+            working.insert(position, uuid)
+            operations.append({'action': 'update', 'rule_uuid': uuid, 'position': position, 'fields': rule})
+        elif changed:
+            operations.append({'action': 'update', 'rule_uuid': uuid, 'position': working.index(uuid), 'fields': rule})
+
+        previous_uuid = uuid
+
+    return operations
@@ -0,0 +1,264 @@
+"""
+Журнал событий жизненного цикла сеансов
+
+Сборщик (задача планировщика collect_session_events) периодически выполняет
+session list для всех кластеров (подключения опрашиваются не одновременно, а
+равномерно в течение POLL_SPREAD секунд) и сравнивает снимок с предыдущим по
+UUID сеанса: новые UUID дают событие начала (время - started-at сеанса),
+пропавшие - событие окончания (время снимка). Сравнение - разность множеств,
+события записываются пачками bulk_create, поэтому опрос кластера с 10 тыс.
+сеансов занимает доли секунды сверх самого rac.
+
+Предыдущий снимок хранится в памяти процесса планировщика поколоночно
+(ColumnarSnapshot) и только с полями, нужными для событий. После перезапуска он
+восстанавливается из журнала (сеансы, у которых есть начало и нет окончания),
+чтобы не дублировать события.
+
+События завершения администратором записываются в момент вызова terminate
+(record_terminations) из всех путей завершения сеансов.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from .models import ServerConnection, SessionEvent
+from .parallel import run_staggered
+from .rac_client import RACClient, fix_broken_encoding
+from .session_selectors import parse_rac_datetime
+from .snapshots import ColumnarSnapshot
+from .views import _parse_session_list, _parse_cluster_list
+
+logger = logging.getLogger(__name__)
+
+# Размер пачки при записи событий
+INSERT_BATCH_SIZE = 1000
+# Период удаления устаревших событий (сек)
+CLEANUP_INTERVAL = 3600
+# Окно, по которому распределяется опрос подключений (сек); интервал задачи по умолчанию - 15 сек
+POLL_SPREAD = 10
+
+# Поля session list, сохраняемые в событиях
+EVENT_FIELDS = ('session-id', 'infobase', 'user-name', 'app-id', 'host')
+
+# (connection_id, cluster_uuid) -> ColumnarSnapshot предыдущего session list (поля EVENT_FIELDS)
+_baselines = {}
+_lock = threading.Lock()
+_last_cleanup = None
+
+
+def _clean(value):
+    if value is None:
+        return ''
+    return str(value).strip().strip('"')
+
+
+def _session_fields(data):
+    session_id = _clean(data.get('session-id'))
+    return (
+        int(session_id) if session_id.isdigit() else None,
+        _clean(data.get('infobase')),
+        _clean(data.get('user-name'))[:255],
+        _clean(data.get('app-id'))[:64],
+        _clean(data.get('host'))[:255],
+    )
+
+
+def _to_aware(value, default):
+    """started-at из rac - локальное время без часового пояса"""
+    moment = parse_rac_datetime(value)
+    if moment is None:
+        return default
+    try:
+        return timezone.make_aware(moment)
+    except Exception:
+        return default
+
+
+def _make_event(connection_id, cluster_uuid, session_uuid, fields, kind, occurred_at, actor=''):
+    session_id, infobase, user_name, app_id, host = fields
+    return SessionEvent(
+        connection_id=connection_id,
+        cluster_uuid=cluster_uuid,
+        session_uuid=session_uuid,
+        session_id=session_id,
+        kind=kind,
+        occurred_at=occurred_at,
+        infobase=infobase,
+        user_name=user_name,
+        app_id=app_id,
+        host=host,
+        actor=actor,
+    )
+
+
+def _restore_baseline(connection_id, cluster_uuid, now):
+    """Открытые сеансы кластера по журналу: есть начало и нет окончания"""
+    since = now - timedelta(days=settings.RAC_SESSION_EVENTS_RETENTION_DAYS)
+    # Открытость считает база: начало без более позднего окончания того же сеанса.
+    # UUID сеанса уникален, поэтому подзапрос идет только по индексу session_uuid
+    ended = SessionEvent.objects.filter(
+        session_uuid=OuterRef('session_uuid'), kind=SessionEvent.KIND_END, id__gt=OuterRef('id')
+    )
+    rows = SessionEvent.objects.filter(
+        connection_id=connection_id, cluster_uuid=cluster_uuid, occurred_at__gte=since,
+        kind=SessionEvent.KIND_START
+    ).filter(~Exists(ended)).order_by('id').values_list(
+        'session_uuid', 'session_id', 'infobase', 'user_name', 'app_id', 'host'
+    )
+
+    # При повторном начале того же сеанса решает последнее
+    sessions = {}
+    for session_uuid, session_id, *fields in rows.iterator(chunk_size=5000):
+        values = ('' if session_id is None else str(session_id), *fields)
+        sessions[session_uuid] = {'uuid': session_uuid, 'data': dict(zip(EVENT_FIELDS, values))}
+    return ColumnarSnapshot.from_items(list(sessions.values()), fields=EVENT_FIELDS)
+
+
+def record_snapshot(connection_id, cluster_uuid, sessions, now=None):
+    """
+    Сравнивает снимок session list с предыдущим и записывает события.
+
+    Args:
+        sessions: Результат _parse_session_list
+        now: Время снимка
+
+    Returns:
+        tuple: (число начавшихся, число закончившихся сеансов)
+    """
+    now = now or timezone.now()
+    key = (connection_id, cluster_uuid)
+    current = {s['uuid']: s['data'] for s in sessions}
+
+    with _lock:
+        previous = _baselines.get(key)
+    if previous is None:
+        previous = _restore_baseline(connection_id, cluster_uuid, now)
+
+    started = current.keys() - previous.index.keys()
+    ended = previous.index.keys() - current.keys()
+
+    events = []
+    for session_uuid in started:
+        data = current[session_uuid]
+        events.append(_make_event(connection_id, cluster_uuid, session_uuid, _session_fields(data),
+                                  SessionEvent.KIND_START, _to_aware(data.get('started-at'), now)))
+    for session_uuid in ended:
+        events.append(_make_event(connection_id, cluster_uuid, session_uuid,
+                                  _session_fields(previous.get(session_uuid)['data']), SessionEvent.KIND_END, now))
+
+    if events:
+        SessionEvent.objects.bulk_create(events, batch_size=INSERT_BATCH_SIZE)
+    # Базовый снимок обновляется только после успешной записи событий
+    with _lock:
+        _baselines[key] = ColumnarSnapshot.from_items(sessions, fields=EVENT_FIELDS)
+    return len(started), len(ended)
+
+
+def record_terminations(connection_id, cluster_uuid, session_uuids, actor='', session_data=None):
+    """
+    Записывает события завершения сеансов администратором.
+
+    Args:
+        session_data: {uuid: data из session list} - сведения о сеансах, если они уже получены;
+                      для остальных сеансов сведения берутся из события начала
+    """
+    session_uuids = list(session_uuids)
+    if not session_uuids:
+        return
+    session_data = session_data or {}
+    known = {uuid: _session_fields(data) for uuid, data in session_data.items()}
+    missing = [uuid for uuid in session_uuids if uuid not in known]
+    if missing:
+        known.update(
+            (row[0], tuple(row[1:]))
+            for row in SessionEvent.objects.filter(
+                session_uuid__in=missing, kind=SessionEvent.KIND_START
+            ).values_list('session_uuid', 'session_id', 'infobase', 'user_name', 'app_id', 'host')
+        )
+    now = timezone.now()
+    SessionEvent.objects.bulk_create([
+        _make_event(connection_id, cluster_uuid, session_uuid, known.get(session_uuid, (None, '', '', '', '')),
+                    SessionEvent.KIND_TERMINATE, now, actor[:150])
+        for session_uuid in session_uuids
+    ], batch_size=INSERT_BATCH_SIZE)
+
+
+def _cleanup(now):
+    """Удаляет события старше RAC_SESSION_EVENTS_RETENTION_DAYS (не чаще раза в CLEANUP_INTERVAL)"""
+    global _last_cleanup
+    if _last_cleanup is not None and time.monotonic() - _last_cleanup < CLEANUP_INTERVAL:
+        return 0
+    _last_cleanup = time.monotonic()
+    deleted, _ = SessionEvent.objects.filter(
+        occurred_at__lt=now - timedelta(days=settings.RAC_SESSION_EVENTS_RETENTION_DAYS)
+    ).delete()
+    return deleted
+
+
+def _client_for(connection):
+    return RACClient(connection, cluster_admin=connection.cluster_admin, cluster_password=connection.cluster_password)
+
+
+def _poll_connection(connection):
+    """
+    Выполняет cluster list и session list каждого кластера подключения (в потоке пула).
+
+    Кластеры одного подключения опрашиваются последовательно: одновременно к
+    одному RAS выполняется одна команда сборщика.
+
+    Returns:
+        dict: {'success', 'error', 'clusters': [(cluster_uuid, {'success', 'sessions', 'taken_at', 'error'})]}
+    """
+    client = _client_for(connection)
+    result = client.get_cluster_list()
+    if not result['success']:
+        return result
+    clusters = []
+    for cluster in _parse_cluster_list(result['output']):
+        sessions = client.get_session_list(cluster['uuid'])
+        if sessions['success']:
+            sessions = {'success': True, 'sessions': _parse_session_list(sessions['output']), 'taken_at': timezone.now()}
+        clusters.append((cluster['uuid'], sessions))
+    return {'success': True, 'clusters': clusters}
+
+
+def collect_session_events(connection_ids=None, spread_seconds=POLL_SPREAD):
+    """
+    Опрашивает все кластеры подключений (или только connection_ids) и записывает события сеансов.
+
+    Опрос подключений распределяется равномерно в течение spread_seconds, чтобы
+    команды к десяткам RAS не запускались одновременно.
+
+    Returns:
+        dict: {'success', 'clusters', 'sessions', 'started', 'ended', 'errors': [...]}
+    """
+    connections = ServerConnection.objects.all()
+    if connection_ids is not None:
+        connections = connections.filter(id__in=connection_ids)
+    connections = list(connections)
+
+    errors = []
+    summary = {'success': True, 'clusters': 0, 'sessions': 0, 'started': 0, 'ended': 0}
+    for connection, polled in zip(connections, run_staggered(_poll_connection, connections, spread_seconds)):
+        if not polled['success']:
+            errors.append({'connection_id': connection.id, 'error': fix_broken_encoding(polled.get('error'))})
+            continue
+        for cluster_uuid, result in polled['clusters']:
+            summary['clusters'] += 1
+            if not result['success']:
+                # Без снимка базовый снимок не меняется - ложных окончаний не будет
+                errors.append({'connection_id': connection.id, 'cluster_uuid': cluster_uuid,
+                               'error': fix_broken_encoding(result.get('error'))})
+                continue
+            started, ended = record_snapshot(connection.id, cluster_uuid, result['sessions'], result['taken_at'])
+            summary['sessions'] += len(result['sessions'])
+            summary['started'] += started
+            summary['ended'] += ended
+
+    summary['deleted'] = _cleanup(timezone.now())
+    summary['errors'] = errors
+    summary['success'] = not errors
+    return summary
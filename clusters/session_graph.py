@@ -0,0 +1,198 @@
+"""
+Граф блокировок сеансов
+
+Строится по одному снимку session list: поле blocked-by-ls содержит номер сеанса,
+удерживающего управляемую блокировку, blocked-by-dbms - номер соединения,
+удерживающего блокировку СУБД (сопоставляется с сеансом по connection list).
+Номера сеансов и соединений уникальны в пределах информационной базы.
+
+Каждый ожидающий сеанс получает одного основного блокировщика (управляемая
+блокировка приоритетнее), поэтому граф - лес с возможными циклами (взаимные
+блокировки). Все величины вычисляются за линейное время от числа сеансов.
+"""
+import heapq
+from collections import deque
+
+EMPTY_VALUES = ('', '0', '00000000-0000-0000-0000-000000000000')
+
+
+def _clean(value):
+    if value is None:
+        return ''
+    return str(value).strip().strip('"')
+
+
+def _to_int(value):
+    try:
+        return int(_clean(value))
+    except ValueError:
+        return 0
+
+
+def _session_summary(session, infobase_names):
+    data = session.get('data', {})
+    infobase = _clean(data.get('infobase'))
+    return {
+        'uuid': session['uuid'],
+        'session_id': _clean(data.get('session-id')),
+        'infobase': infobase,
+        'infobase_name': infobase_names.get(infobase, infobase),
+        'user_name': _clean(data.get('user-name')),
+        'app_id': _clean(data.get('app-id')),
+        'host': _clean(data.get('host')),
+        'duration_current': _to_int(data.get('duration-current')),
+        'duration_current_dbms': _to_int(data.get('duration-current-dbms')),
+        'last_active_at': _clean(data.get('last-active-at')),
+    }
+
+
+def build_blocking_graph(sessions, connections=None, infobase_names=None, top=20):
+    """
+    Строит граф блокировок.
+
+    Args:
+        sessions: Результат _parse_session_list
+        connections: Результат _parse_connection_list (нужен для blocked-by-dbms); None - не сопоставлять
+        infobase_names: {uuid информационной базы: имя}
+        top: Число блокировщиков и цепочек в ответе
+
+    Returns:
+        dict: edges (кто кого ждёт), top_blockers (по числу ожидающих с учётом цепочек),
+              chains (самые длинные цепочки от корневого блокировщика), cycles, счётчики
+    """
+    infobase_names = infobase_names or {}
+    by_uuid = {s['uuid']: s for s in sessions}
+    by_number = {}
+    for s in sessions:
+        data = s.get('data', {})
+        by_number[(_clean(data.get('infobase')), _clean(data.get('session-id')))] = s['uuid']
+
+    connection_owner = {}
+    for conn in connections or []:
+        data = conn.get('data', {})
+        session_number = _clean(data.get('session-number'))
+        if session_number not in EMPTY_VALUES:
+            infobase = _clean(data.get('infobase'))
+            connection_owner[(infobase, _clean(data.get('conn-id')))] = by_number.get((infobase, session_number))
+
+    # 1. Рёбра: ожидающий -> блокировщик
+    edges = []
+    parent = {}
+    unresolved = 0
+    for s in sessions:
+        data = s.get('data', {})
+        infobase = _clean(data.get('infobase'))
+        for field, kind in (('blocked-by-ls', 'ls'), ('blocked-by-dbms', 'dbms')):
+            number = _clean(data.get(field))
+            if number in EMPTY_VALUES:
+                continue
+            if kind == 'ls':
+                blocker = by_number.get((infobase, number))
+            else:
+                blocker = connection_owner.get((infobase, number))
+            if blocker is None or blocker == s['uuid']:
+                unresolved += 1
+                edges.append({'session': s['uuid'], 'blocked_by': None, 'type': kind, 'number': number})
+                continue
+            edges.append({'session': s['uuid'], 'blocked_by': blocker, 'type': kind, 'number': number})
+            parent.setdefault(s['uuid'], blocker)
+
+    children_count = {}
+    for child, blocker in parent.items():
+        children_count[blocker] = children_count.get(blocker, 0) + 1
+
+    # 2. Обход от листьев к корням (алгоритм Кана): размер поддерева = число ожидающих по цепочке.
+    # Узлы, которые не удалось обработать, лежат на циклах
+    nodes = set(parent) | set(children_count)
+    pending = dict(children_count)
+    subtree = {node: 1 for node in nodes}
+    queue = deque(node for node in nodes if node not in pending)
+    order = []
+    while queue:
+        node = queue.popleft()
+        order.append(node)
+        blocker = parent.get(node)
+        if blocker is not None:
+            subtree[blocker] += subtree[node]
+            pending[blocker] -= 1
+            if pending[blocker] == 0:
+                queue.append(blocker)
+
+    in_cycle = {node for node in nodes if pending.get(node, 0) > 0}
+    cycles = []
+    seen = set()
+    for node in in_cycle:
+        if node in seen:
+            continue
+        cycle = []
+        current = node
+        while current not in seen:
+            seen.add(current)
+            cycle.append(current)
+            current = parent[current]
+        cycles.append(cycle)
+
+    # Сеансы цикла блокируют друг друга и всех, кто ждёт любого из них: каждому
+    # участнику - размер всей компоненты (цикл и присоединённые к нему поддеревья)
+    for cycle in cycles:
+        total = sum(subtree[node] for node in cycle)
+        for node in cycle:
+            subtree[node] = total
+
+    # 3. Глубина от корня (обратный порядок: блокировщик раньше ожидающих)
+    depth = {}
+    root_of = {}
+    for node in reversed(order):
+        blocker = parent.get(node)
+        if blocker is None or blocker in in_cycle:
+            depth[node] = 0
+            root_of[node] = blocker if blocker in in_cycle else node
+        else:
+            depth[node] = depth[blocker] + 1
+            root_of[node] = root_of[blocker]
+
+    # Самая глубокая вершина каждого корня задаёт самую длинную цепочку
+    deepest = {}
+    for node, root in root_of.items():
+        if node not in children_count and (root not in deepest or depth[node] > depth[deepest[root]]):
+            deepest[root] = node
+
+    def chain_from(leaf):
+        chain = [leaf]
+        while depth.get(chain[-1], 0) > 0:
+            chain.append(parent[chain[-1]])
+        chain.reverse()
+        return chain
+
+    longest = heapq.nlargest(top, deepest.items(), key=lambda item: depth[item[1]])
+    chains = [
+        {'root': root, 'length': depth[leaf] + 1, 'sessions': chain_from(leaf)}
+        for root, leaf in longest if depth[leaf] > 0
+    ]
+
+    blockers = heapq.nlargest(top, children_count, key=lambda node: (subtree[node], children_count[node]))
+    top_blockers = []
+    for node in blockers:
+        if node not in by_uuid:
+            continue
+        item = _session_summary(by_uuid[node], infobase_names)
+        item.update(
+            blocked_directly=children_count[node],
+            blocked_total=subtree[node] - 1,
+            is_root=node not in parent,
+            in_cycle=node in in_cycle
+        )
+        top_blockers.append(item)
+
+    roots = [node for node in children_count if node not in parent]
+    return {
+        'sessions_total': len(sessions),
+        'blocked_total': len(parent),
+        'blockers_total': len(children_count),
+        'roots_total': len(roots),
+        'unresolved': unresolved,
+        'edges': edges,
+        'top_blockers': top_blockers,
+        'chains': chains,
+        'cycles': cycles,
+    }
@@ -0,0 +1,116 @@
+"""
+Скорости потребления ресурсов сеансами между двумя снимками session list
+
+Счётчики session list накопительные (cpu-time-total, bytes-all и т.д.), поэтому
+«кто нагружает сервер сейчас» видно только по разнице двух снимков. Для каждого
+кластера в памяти процесса хранится предыдущий снимок в компактном виде
+(ColumnarSnapshot): список UUID и по массиву array('d') на каждый счётчик.
+Разности считаются поэлементно над массивами (map/itemgetter выполняются на
+уровне C), без промежуточных словарей на каждый сеанс.
+"""
+import heapq
+import math
+import threading
+import time
+from array import array
+from operator import itemgetter, sub
+from django.conf import settings
+from .snapshots import ColumnarSnapshot
+
+# Метрика -> накопительный счётчик из session list
+METRICS = {
+    'cpu': 'cpu-time-total',
+    'dbms': 'duration-all-dbms',
+    'duration': 'duration-all',
+    'traffic': 'bytes-all',
+    'dbms_traffic': 'dbms-bytes-all',
+    'calls': 'calls-all',
+}
+
+_snapshots = {}
+_lock = threading.Lock()
+
+
+class SessionSnapshot(ColumnarSnapshot):
+    """Снимок счётчиков сеансов кластера: по массиву array('d') на каждую метрику"""
+    __slots__ = ()
+
+    @classmethod
+    def from_sessions(cls, sessions, taken_at=None):
+        """Создаёт снимок из результата _parse_session_list (только UUID и счётчики METRICS)"""
+        fields = list(METRICS.values())
+        return cls.from_items(sessions, fields=fields, numeric=fields,
+                              taken_at=taken_at if taken_at is not None else time.monotonic())
+
+    @property
+    def uuids(self):
+        return list(map(self.keys['uuid'].__getitem__, self.rows))
+
+    def counter(self, metric):
+        return self.columns[METRICS[metric]].values
+
+
+def update_snapshot(key, sessions, now=None):
+    """
+    Сохраняет новый снимок кластера и возвращает (текущий, предыдущий).
+
+    Базовый снимок заменяется, только если новый старше его хотя бы на
+    RAC_HOT_SESSIONS_MIN_INTERVAL секунд: частые запросы нескольких пользователей
+    не сокращают интервал до долей секунды.
+    """
+    current = SessionSnapshot.from_sessions(sessions, now)
+    with _lock:
+        previous = _snapshots.get(key)
+        if previous is None or current.taken_at - previous.taken_at >= settings.RAC_HOT_SESSIONS_MIN_INTERVAL:
+            _snapshots[key] = current
+        # Снимки кластеров, которые давно не запрашивали, удаляем
+        expired = [k for k, s in _snapshots.items() if current.taken_at - s.taken_at > settings.RAC_HOT_SESSIONS_TTL]
+        for k in expired:
+            del _snapshots[k]
+    return current, previous
+
+
+def compute_deltas(current, previous):
+    """
+    Возвращает {metric: array приращений} для сеансов текущего снимка.
+
+    Для сеансов, которых не было в предыдущем снимке, приращение - NaN.
+    """
+    missing = len(previous)
+    positions = [previous.index.get(uuid, missing) for uuid in current.uuids]
+    if not positions:
+        return {metric: array('d') for metric in METRICS}
+
+    gather = itemgetter(*positions)
+    deltas = {}
+    for metric in METRICS:
+        # Последний элемент - NaN для новых сеансов
+        before = gather(previous.counter(metric) + array('d', [math.nan]))
+        if len(positions) == 1:
+            before = (before,)
+        deltas[metric] = array('d', map(sub, current.counter(metric), before))
+    return deltas
+
+
+def top_sessions(current, previous, metric, top=20):
+    """
+    Возвращает сеансы с наибольшей скоростью роста метрики за интервал между снимками.
+
+    Returns:
+        list: [(позиция сеанса в текущем снимке, приращение, скорость в секунду, {metric: скорость})]
+    """
+    interval = current.taken_at - previous.taken_at
+    if interval <= 0:
+        return []
+
+    deltas = compute_deltas(current, previous)
+    values = deltas[metric]
+    # NaN (новый сеанс) и отрицательные значения (сброс счётчика) не учитываются
+    positive = [i for i, value in enumerate(values) if value > 0]
+    best = heapq.nlargest(top, positive, key=values.__getitem__)
+    return [
+        (i, values[i], values[i] / interval, {
+            name: (deltas[name][i] / interval if deltas[name][i] >= 0 else None) for name in METRICS
+        })
+        for i in best
+    ]
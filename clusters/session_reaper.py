@@ -0,0 +1,156 @@
+"""
+Автоматическое завершение простаивающих сеансов по правилам
+
+Правила (SessionReaperPolicy) задают селектор сеансов в формате
+session_selectors и окно времени действия. За один запуск для каждого кластера
+выполняется ровно один session list, все правила этого кластера проверяются по
+одному снимку (сеанс, подходящий нескольким правилам, завершается один раз -
+по первому рабочему правилу; пробные правила сеансы не занимают), после чего все завершения по всем кластерам выполняются
+одним параллельным проходом с ограничением RAC_MAX_PARALLEL.
+
+Результат каждого правила записывается в SessionReaperRun. Функция run_reaper
+рассчитана на периодический вызов планировщиком.
+"""
+import logging
+from django.utils import timezone
+from .models import SessionReaperPolicy, SessionReaperRun
+from .parallel import run_parallel
+from .session_events import record_terminations
+from .rac_client import RACClient, fix_broken_encoding
+from .session_selectors import parse_selector, match_sessions, summarize_session
+from .views import _parse_session_list
+
+logger = logging.getLogger(__name__)
+
+# Сколько сеансов сохраняется в отчёте запуска
+REPORT_LIMIT = 500
+
+
+def _client_for(policy):
+    connection = policy.connection
+    return RACClient(
+        connection,
+        cluster_admin=policy.cluster_admin or connection.cluster_admin,
+        cluster_password=policy.cluster_password or connection.cluster_password
+    )
+
+
+def _fetch_snapshot(group):
+    """Выполняет session list для кластера группы правил"""
+    policies = group['policies']
+    # Если все правила относятся к одной базе, rac сам отфильтрует сеансы
+    infobases = {(p.selector or {}).get('infobase') or None for p in policies}
+    infobase = infobases.pop() if len(infobases) == 1 else None
+    return _client_for(policies[0]).get_session_list(group['cluster_uuid'], infobase)
+
+
+def run_reaper(policy_ids=None, dry_run=None, ignore_window=False, now=None):
+    """
+    Выполняет включённые правила (или только policy_ids), действующие в текущее время.
+
+    Args:
+        policy_ids: Ограничить запуск указанными правилами
+        dry_run: Переопределить режим правил (None - как в правиле)
+        ignore_window: Не проверять окно времени действия правил
+        now: Текущее локальное время (для проверки окна)
+
+    Returns:
+        dict: {'success', 'policies', 'matched', 'terminated', 'failed', 'runs': [...]}
+    """
+    now = now or timezone.localtime()
+    policies = SessionReaperPolicy.objects.filter(enabled=True).select_related('connection').order_by('id')
+    if policy_ids is not None:
+        policies = policies.filter(id__in=policy_ids)
+    policies = [p for p in policies if ignore_window or p.is_active_at(now.time())]
+    if not policies:
+        return {'success': True, 'policies': 0, 'matched': 0, 'terminated': 0, 'failed': 0, 'runs': []}
+
+    # 1. Один снимок session list на кластер
+    groups = {}
+    for policy in policies:
+        key = (policy.connection_id, policy.cluster_uuid)
+        groups.setdefault(key, {'cluster_uuid': policy.cluster_uuid, 'policies': []})['policies'].append(policy)
+    groups = list(groups.values())
+    snapshots = run_parallel(_fetch_snapshot, groups)
+
+    # 2. Отбор по снимку: одно сопоставление на правило, без обращений к rac
+    started_at = timezone.now()
+    runs = {}
+    tasks = []
+    for group, snapshot in zip(groups, snapshots):
+        sessions = _parse_session_list(snapshot['output']) if snapshot['success'] else []
+        claimed = set()
+        for policy in group['policies']:
+            policy_dry_run = policy.dry_run if dry_run is None else dry_run
+            run = SessionReaperRun(policy=policy, started_at=started_at, dry_run=policy_dry_run,
+                                   sessions_total=len(sessions))
+            runs[policy.id] = run
+            if not snapshot['success']:
+                run.error = fix_broken_encoding(snapshot.get('error')) or 'session list failed'
+                continue
+            try:
+                selector = parse_selector(policy.selector)
+            except ValueError as e:
+                run.error = str(e)
+                continue
+
+            matched = [s for s in match_sessions(sessions, selector) if s['uuid'] not in claimed]
+            # Первыми завершаются сеансы, простаивающие дольше всех
+            matched.sort(key=lambda s: s['data'].get('last-active-at', ''))
+            run.matched = len(matched)
+            # Пробный запуск показывает то же, что завершил бы рабочий, но не забирает
+            # сеансы у следующих правил: они ничего не завершают за пробное правило
+            selected = matched[:policy.max_sessions]
+            run.report = [summarize_session(s) for s in selected[:REPORT_LIMIT]]
+            if not policy_dry_run:
+                claimed.update(s['uuid'] for s in selected)
+                tasks.extend((policy, session) for session in selected)
+
+    # 3. Завершение всех отобранных сеансов одним параллельным проходом
+    clients = {}
+
+    def terminate(task):
+        policy, session = task
+        client = clients.get(policy.id) or clients.setdefault(policy.id, _client_for(policy))
+        return client.terminate_session(policy.cluster_uuid, session['uuid'], policy.error_message or None)
+
+    outcomes = run_parallel(terminate, tasks)
+    reported = {run_id: {item['uuid']: item for item in run.report} for run_id, run in runs.items()}
+    terminated = {}
+    for (policy, session), outcome in zip(tasks, outcomes):
+        run = runs[policy.id]
+        if outcome['success']:
+            run.terminated += 1
+            terminated.setdefault(policy, []).append(session)
+        else:
+            run.failed += 1
+        item = reported[policy.id].get(session['uuid'])
+        if item is not None:
+            item['success'] = outcome['success']
+            item['error'] = fix_broken_encoding(outcome['error']) if outcome.get('error') else None
+
+    for policy, sessions in terminated.items():
+        record_terminations(policy.connection_id, policy.cluster_uuid, [s['uuid'] for s in sessions],
+                            f'Правило: {policy.name}', {s['uuid']: s['data'] for s in sessions})
+
+    finished_at = timezone.now()
+    for run in runs.values():
+        run.finished_at = finished_at
+    SessionReaperRun.objects.bulk_create(runs.values())
+    SessionReaperPolicy.objects.filter(id__in=list(runs)).update(last_run_at=finished_at)
+
+    runs = list(runs.values())
+    summary = {
+        'success': not any(run.error for run in runs),
+        'policies': len(runs),
+        'matched': sum(run.matched for run in runs),
+        'terminated': sum(run.terminated for run in runs),
+        'failed': sum(run.failed for run in runs),
+        'runs': [run.to_dict(include_report=False) for run in runs],
+    }
+    if summary['terminated'] or summary['failed']:
+        logger.info(
+            f"Session reaper: terminated {summary['terminated']}, failed {summary['failed']} "
+            f"sessions by {len(runs)} policies"
+        )
+    return summary
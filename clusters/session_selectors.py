@@ -0,0 +1,154 @@
+"""
+Отбор сеансов по селектору
+
+Селектор описывает группу сеансов условиями (информационная база, маска имени
+пользователя, приложение, время простоя, спящий режим). Условия объединяются
+по И и проверяются за один проход по снимку session list.
+"""
+import fnmatch
+import re
+from datetime import datetime
+
+# Поля селектора, которые считаются условиями отбора
+SELECTOR_CONDITIONS = ('infobase', 'user_name', 'app_id', 'idle_seconds', 'hibernate')
+
+
+def _clean(value):
+    """Убирает кавычки, которыми rac обрамляет строковые значения"""
+    if isinstance(value, str):
+        return value.strip().strip('"')
+    return value
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def parse_rac_datetime(value):
+    """Разбирает дату вида 2024-01-31T10:15:00 из вывода rac (None, если не удалось)"""
+    value = _clean(value)
+    if not value or value.startswith('0001-01-01'):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def parse_selector(data):
+    """
+    Проверяет и нормализует селектор из запроса.
+
+    Args:
+        data: dict с ключами infobase, user_name (маска с * и ?), app_id (строка или список),
+              idle_seconds, hibernate, exclude_sessions (список UUID)
+
+    Returns:
+        dict: Нормализованный селектор
+
+    Raises:
+        ValueError: Если селектор пуст или значения некорректны
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Селектор должен быть объектом')
+
+    selector = {}
+
+    infobase = _clean(data.get('infobase'))
+    if infobase:
+        selector['infobase'] = infobase
+
+    user_name = _clean(data.get('user_name'))
+    if user_name:
+        # Маска в стиле shell (Иванов*, *бухгалтер?), без учёта регистра
+        selector['user_name'] = re.compile(fnmatch.translate(user_name), re.IGNORECASE)
+
+    app_id = data.get('app_id')
+    if app_id:
+        if isinstance(app_id, str):
+            app_id = [app_id]
+        selector['app_id'] = {_clean(a).lower() for a in app_id if _clean(a)}
+
+    idle_seconds = data.get('idle_seconds')
+    if idle_seconds not in (None, ''):
+        try:
+            idle_seconds = int(idle_seconds)
+        except (ValueError, TypeError):
+            raise ValueError('idle_seconds должен быть целым числом')
+        if idle_seconds < 0:
+            raise ValueError('idle_seconds не может быть отрицательным')
+        selector['idle_seconds'] = idle_seconds
+
+    hibernate = data.get('hibernate')
+    if hibernate not in (None, ''):
+        selector['hibernate'] = _parse_bool(hibernate)
+
+    if not any(key in selector for key in SELECTOR_CONDITIONS):
+        raise ValueError('Укажите хотя бы одно условие отбора сеансов')
+
+    selector['exclude_sessions'] = set(data.get('exclude_sessions') or [])
+    return selector
+
+
+def match_sessions(sessions, selector, now=None):
+    """
+    Возвращает сеансы, удовлетворяющие всем условиям селектора.
+
+    Args:
+        sessions: Результат _parse_session_list ({'uuid': ..., 'data': {...}})
+        selector: Результат parse_selector
+        now: Текущее время для расчёта простоя (по умолчанию - локальное время сервера)
+
+    Returns:
+        list: Подходящие сеансы в исходном порядке
+    """
+    infobase = selector.get('infobase')
+    user_pattern = selector.get('user_name')
+    app_ids = selector.get('app_id')
+    idle_seconds = selector.get('idle_seconds')
+    hibernate = selector.get('hibernate')
+    excluded = selector.get('exclude_sessions') or set()
+
+    if idle_seconds is not None and now is None:
+        # rac выводит время сервера кластера без часового пояса
+        now = datetime.now()
+
+    matched = []
+    for session in sessions:
+        if session.get('uuid') in excluded:
+            continue
+        data = session.get('data', {})
+
+        if infobase and _clean(data.get('infobase')) != infobase:
+            continue
+        if user_pattern and not user_pattern.match(_clean(data.get('user-name', '')) or ''):
+            continue
+        if app_ids and (_clean(data.get('app-id', '')) or '').lower() not in app_ids:
+            continue
+        if hibernate is not None and _parse_bool(_clean(data.get('hibernate', 'no'))) != hibernate:
+            continue
+        if idle_seconds is not None:
+            last_active = parse_rac_datetime(data.get('last-active-at'))
+            if last_active is None or (now - last_active).total_seconds() < idle_seconds:
+                continue
+
+        matched.append(session)
+
+    return matched
+
+
+def summarize_session(session):
+    """Краткое описание сеанса для ответа API"""
+    data = session.get('data', {})
+    return {
+        'uuid': session.get('uuid'),
+        'session_id': _clean(data.get('session-id')),
+        'infobase': _clean(data.get('infobase')),
+        'user_name': _clean(data.get('user-name')),
+        'app_id': _clean(data.get('app-id')),
+        'host': _clean(data.get('host')),
+        'last_active_at': _clean(data.get('last-active-at')),
+        'hibernate': _clean(data.get('hibernate')),
+    }
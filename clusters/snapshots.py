@@ -0,0 +1,509 @@
+"""
+Компактное поколоночное представление списков RAC в памяти
+
+Разобранные списки (session list, process list, infobase summary list) - это
+списки словарей, в которых одни и те же ключи и значения ('1CV8C', имена
+компьютеров, UUID баз) повторяются тысячи раз. ColumnarSnapshot хранит каждое
+поле отдельной колонкой:
+
+- числовые поля с большим числом различных значений - массивом array('q'/'d');
+- строки с повторами - словарём различных значений (интернированных) и массивом
+  кодов минимальной ширины (1, 2 или 4 байта на строку);
+- уникальные строки (UUID) - обычным списком.
+
+Записи отдаются представлениями Record с __slots__, которые ведут себя как
+исходные словари ({'uuid': ..., 'data': {...}}), поэтому с ними работают
+match_sessions, summarize_session и другие функции, принимающие результат
+_parse_session_list. Отбор и сортировка возвращают новый снимок над теми же
+колонками (меняется только список номеров строк), группировка и кодирование
+в JSON выполняются один раз на различное значение, а не на каждую строку.
+
+Снимок 10 тыс. сеансов занимает в несколько раз меньше памяти, чем список
+словарей (см. memory_usage).
+"""
+import sys
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+from itertools import compress
+from json.encoder import encode_basestring
+from operator import itemgetter
+
+
+def _code_typecode(count):
+    """Наименьший тип массива для кодов словаря из count значений"""
+    if count <= 0xFF:
+        return 'B'
+    if count <= 0xFFFF:
+        return 'H'
+    return 'I'
+
+
+def _parse_number(value):
+    """Число из строки rac, если строка однозначно восстанавливается из числа; иначе None"""
+    try:
+        number = int(value)
+        if str(number) == value:
+            return number
+    except (TypeError, ValueError):
+        pass
+    try:
+        number = float(value)
+        if repr(number) == value:
+            return number
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _sort_key(value):
+    # Отсутствующие значения - первыми, числа - по величине, строки - по алфавиту
+    if value is None:
+        return (0, 0, '')
+    number = _parse_number(value) if isinstance(value, str) else value
+    if number is not None:
+        return (1, number, '')
+    return (2, 0, value)
+
+
+class DictColumn:
+    """Строковая колонка со словарным кодированием: различные значения + массив кодов"""
+    __slots__ = ('values', 'codes', '_lookup')
+
+    def __init__(self, values, codes):
+        self.values = values
+        self.codes = codes
+        self._lookup = None
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+    def lookup(self):
+        """{значение: код}"""
+        if self._lookup is None:
+            self._lookup = {value: code for code, value in enumerate(self.values)}
+        return self._lookup
+
+    def mask(self, wanted):
+        """Признак совпадения со значениями wanted для каждой строки"""
+        lookup = self.lookup()
+        codes = {lookup[value] for value in wanted if value in lookup}
+        return list(map(codes.__contains__, self.codes))
+
+    def sort_keys(self):
+        """Ранг значения каждой строки для сортировки (значения сравниваются один раз)"""
+        order = sorted(range(len(self.values)), key=lambda code: _sort_key(self.values[code]))
+        rank = [0] * len(self.values)
+        for position, code in enumerate(order):
+            rank[code] = position
+        return list(map(rank.__getitem__, self.codes))
+
+    def group_codes(self):
+        return self.codes, self.values
+
+    def numbers(self):
+        """Числовое значение каждой строки (None - нечисловое)"""
+        decoded = [_parse_number(value) if value is not None else None for value in self.values]
+        return list(map(decoded.__getitem__, self.codes))
+
+    def json_values(self, prefix=''):
+        encoded = [prefix + encode_basestring(value) if value is not None else None for value in self.values]
+        return list(map(encoded.__getitem__, self.codes))
+
+    def remap(self, mapping):
+        """Новая колонка с заменой значений по mapping (выполняется над словарём, а не над строками)"""
+        return DictColumn([mapping.get(value, value) if value is not None else None for value in self.values],
+                          self.codes)
+
+    def memory_usage(self):
+        return (sys.getsizeof(self.codes) + sys.getsizeof(self.values)
+                + sum(sys.getsizeof(value) for value in self.values if value is not None))
+
+
+class PlainColumn:
+    """Колонка уникальных строк (UUID): кодирование словарём не даёт выигрыша"""
+    __slots__ = ('values',)
+
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, row):
+        return self.values[row]
+
+    def mask(self, wanted):
+        wanted = set(wanted)
+        return list(map(wanted.__contains__, self.values))
+
+    def sort_keys(self):
+        return [_sort_key(value) for value in self.values]
+
+    def group_codes(self):
+        return self.values, None
+
+    def numbers(self):
+        return [_parse_number(value) if value is not None else None for value in self.values]
+
+    def json_values(self, prefix=''):
+        return [prefix + encode_basestring(value) if value is not None else None for value in self.values]
+
+    def remap(self, mapping):
+        return PlainColumn([mapping.get(value, value) if value is not None else None for value in self.values])
+
+    def memory_usage(self):
+        return sys.getsizeof(self.values) + sum(sys.getsizeof(value) for value in self.values if value is not None)
+
+
+class NumberColumn:
+    """
+    Числовая колонка в массиве array('q') или array('d').
+
+    Строка значения восстанавливается из числа, поэтому записи выглядят как
+    исходные данные rac.
+    """
+    __slots__ = ('values',)
+
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, row):
+        value = self.values[row]
+        return str(value) if self.values.typecode == 'q' else repr(value)
+
+    def mask(self, wanted):
+        numbers = {_parse_number(value) if isinstance(value, str) else value for value in wanted}
+        return list(map(numbers.__contains__, self.values))
+
+    def sort_keys(self):
+        return self.values
+
+    def group_codes(self):
+        return self.values, None
+
+    def numbers(self):
+        return self.values
+
+    def json_values(self, prefix=''):
+        # Значения в исходном выводе - строки
+        prefix += '"'
+        return [prefix + value + '"' for value in map(str if self.values.typecode == 'q' else repr, self.values)]
+
+    def remap(self, mapping):
+        return self
+
+    def memory_usage(self):
+        return sys.getsizeof(self.values)
+
+
+def _build_column(raw, numeric=False):
+    """Выбирает представление колонки по значениям raw (None - поле отсутствует)"""
+    if numeric:
+        # Поле явно запрошено числовым (счётчики для вычислений) - всегда array('d')
+        return NumberColumn(array('d', map(_to_float, raw)))
+
+    lookup = {}
+    codes = [lookup.setdefault(value, len(lookup)) for value in raw]
+    values = list(lookup)
+    # Массив чисел выгоднее кодов, только если различных значений больше 255
+    if len(values) > 0xFF and None not in lookup and _parse_number(values[0]) is not None:
+        numbers = [_parse_number(value) for value in values]
+        for typecode, kind in (('q', int), ('d', float)):
+            if all(type(number) is kind for number in numbers):
+                try:
+                    return NumberColumn(array(typecode, map(numbers.__getitem__, codes)))
+                except OverflowError:
+                    break
+
+    if len(raw) > 1 and len(values) == len(raw):
+        return PlainColumn(raw)
+
+    values = [sys.intern(value) if isinstance(value, str) else value for value in values]
+    return DictColumn(values, array(_code_typecode(len(values)), codes))
+
+
+class RecordData(Mapping):
+    """Представление поля 'data' записи снимка"""
+    __slots__ = ('_columns', '_row')
+
+    def __init__(self, columns, row):
+        self._columns = columns
+        self._row = row
+
+    def __getitem__(self, key):
+        value = self._columns[key][self._row]
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        column = self._columns.get(key)
+        if column is None:
+            return default
+        value = column[self._row]
+        return default if value is None else value
+
+    def __iter__(self):
+        row = self._row
+        return (key for key, column in self._columns.items() if column[row] is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class Record:
+    """Представление элемента снимка в виде исходного словаря {'uuid': ..., 'data': {...}}"""
+    __slots__ = ('snapshot', 'row')
+
+    def __init__(self, snapshot, row):
+        self.snapshot = snapshot
+        self.row = row
+
+    def __getitem__(self, key):
+        if key == 'data':
+            return RecordData(self.snapshot.columns, self.row)
+        value = self.snapshot.keys[key][self.row]
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def to_dict(self):
+        item = {key: column[self.row] for key, column in self.snapshot.keys.items() if column[self.row] is not None}
+        item['data'] = dict(self['data'])
+        return item
+
+
+class ColumnarSnapshot:
+    """
+    Поколоночный снимок списка rac.
+
+    keys - колонки полей верхнего уровня (uuid, name), columns - колонки полей
+    data, rows - номера строк снимка (после отбора и сортировки).
+    """
+    __slots__ = ('keys', 'columns', 'rows', 'taken_at', '_index')
+
+    def __init__(self, keys, columns, rows=None, taken_at=None):
+        self.keys = keys
+        self.columns = columns
+        size = len(next(iter(keys.values()))) if keys else 0
+        self.rows = range(size) if rows is None else rows
+        self.taken_at = taken_at
+        self._index = None
+
+    @classmethod
+    def from_items(cls, items, fields=None, numeric=(), taken_at=None):
+        """
+        Создаёт снимок из результата _parse_*_list.
+
+        Args:
+            items: [{'uuid': ..., 'data': {...}}, ...]
+            fields: Сохранить только эти поля data (по умолчанию - все)
+            numeric: Поля, которые всегда хранятся числами array('d') (отсутствующие - 0)
+            taken_at: Время снимка
+        """
+        numeric = set(numeric)
+        data = [item.get('data', {}) for item in items]
+        if fields is None:
+            # Порядок полей - порядок первого появления в выводе rac
+            fields = {}
+            for entry in data:
+                fields.update(dict.fromkeys(entry))
+        # Поля верхнего уровня (uuid, name, ...) - в порядке первого появления
+        top_level = {}
+        for item in items:
+            top_level.update(dict.fromkeys(item))
+        keys = {
+            key: _build_column([item.get(key) for item in items])
+            for key in (top_level if items else {'uuid': None}) if key != 'data'
+        }
+        fields = list(fields)
+        values = None
+        if len(fields) > 1 and data:
+            try:
+                # Элементы вывода rac обычно содержат одинаковый набор полей - транспонируем кортежами
+                values = list(zip(*map(itemgetter(*fields), data)))
+            except KeyError:
+                pass
+        if values is None:
+            values = [[entry.get(field) for entry in data] for field in fields]
+        columns = {
+            field: _build_column(list(raw), field in numeric)
+            for field, raw in zip(fields, values)
+        }
+        return cls(keys, columns, taken_at=taken_at)
+
+    def _derive(self, rows=None, keys=None, columns=None):
+        return ColumnarSnapshot(
+            self.keys if keys is None else keys,
+            self.columns if columns is None else columns,
+            self.rows if rows is None else rows,
+            self.taken_at
+        )
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return (Record(self, row) for row in self.rows)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return self._derive(rows=self.rows[position])
+        return Record(self, self.rows[position])
+
+    def column(self, field):
+        """Колонка поля data или поля верхнего уровня"""
+        column = self.columns.get(field)
+        return self.keys.get(field) if column is None else column
+
+    @property
+    def index(self):
+        """{uuid: номер строки}"""
+        if self._index is None:
+            uuids = self.keys['uuid']
+            self._index = {uuids[row]: row for row in self.rows}
+        return self._index
+
+    def record(self, row):
+        return Record(self, row)
+
+    def get(self, uuid):
+        """Запись по UUID или None"""
+        row = self.index.get(uuid)
+        return None if row is None else Record(self, row)
+
+    def where(self, field, *values):
+        """Записи, у которых поле равно одному из values (сравнение по кодам колонки)"""
+        column = self.column(field)
+        if column is None:
+            return self._derive(rows=[])
+        mask = column.mask(values)
+        if isinstance(self.rows, range) and len(self.rows) == len(mask):
+            return self._derive(rows=array('I', compress(self.rows, mask)))
+        return self._derive(rows=array('I', compress(self.rows, map(mask.__getitem__, self.rows))))
+
+    def filter(self, predicate):
+        """Записи, для которых predicate(record) истинно"""
+        return self._derive(rows=array('I', [row for row in self.rows if predicate(Record(self, row))]))
+
+    def sort(self, field, reverse=False):
+        """
+        Сортирует записи по полю: отсутствующие значения - первыми, числа - по
+        величине, строки - по алфавиту. Сортировка устойчивая.
+        """
+        column = self.column(field)
+        if column is None:
+            return self._derive()
+        keys = column.sort_keys()
+        return self._derive(rows=array('I', sorted(self.rows, key=keys.__getitem__, reverse=reverse)))
+
+    def count_by(self, field):
+        """{значение поля: число записей}"""
+        column = self.column(field)
+        if column is None:
+            return {None: len(self.rows)}
+        codes, values = column.group_codes()
+        counts = Counter(map(codes.__getitem__, self.rows))
+        if values is None:
+            return dict(counts)
+        return {values[code]: count for code, count in counts.items()}
+
+    def aggregate(self, by, field):
+        """
+        Группирует записи по полю by и считает числовое поле field.
+
+        Returns:
+            dict: {значение by: {'count', 'sum', 'min', 'max'}}; нечисловые значения не учитываются
+        """
+        group_column = self.column(by)
+        value_column = self.column(field)
+        if group_column is None:
+            return {}
+        codes, values = group_column.group_codes()
+        numbers = value_column.numbers() if value_column is not None else None
+
+        groups = {}
+        for row in self.rows:
+            code = codes[row]
+            group = groups.get(code)
+            if group is None:
+                group = groups[code] = {'count': 0, 'sum': 0, 'min': None, 'max': None}
+            group['count'] += 1
+            number = numbers[row] if numbers is not None else None
+            if number is None:
+                continue
+            group['sum'] += number
+            if group['min'] is None or number < group['min']:
+                group['min'] = number
+            if group['max'] is None or number > group['max']:
+                group['max'] = number
+        if values is None:
+            return groups
+        return {values[code]: group for code, group in groups.items()}
+
+    def remap(self, field, mapping):
+        """Снимок с заменой значений поля (например, UUID базы на имя)"""
+        if field in self.columns:
+            return self._derive(columns=dict(self.columns, **{field: self.columns[field].remap(mapping)}))
+        return self._derive()
+
+    def to_items(self):
+        """Список словарей в формате _parse_*_list"""
+        return [Record(self, row).to_dict() for row in self.rows]
+
+    def to_json(self):
+        """
+        JSON-массив записей в формате _parse_*_list.
+
+        Каждое различное значение колонки кодируется один раз. Результат
+        семантически равен json.dumps(to_items()): поля записей следуют в порядке
+        колонок, поэтому у записей с разным набором полей порядок ключей может
+        отличаться от исходного.
+        """
+        def encode(columns):
+            # Фрагменты '"поле": значение' для каждой строки; None - поле отсутствует
+            fragments = [column.json_values(encode_basestring(key) + ': ')
+                         for key, column in columns.items()]
+            if not fragments:
+                return [()] * len(self.rows)
+            return zip(*(map(encoded.__getitem__, self.rows) for encoded in fragments))
+
+        chunks = [
+            '{' + ''.join(f'{fragment}, ' for fragment in keys if fragment is not None)
+            + '"data": {' + ', '.join(filter(None, data)) + '}}'
+            for keys, data in zip(encode(self.keys), encode(self.columns))
+        ]
+        return '[' + ', '.join(chunks) + ']'
+
+    def memory_usage(self):
+        """Приблизительный объём памяти снимка в байтах"""
+        size = sys.getsizeof(self.rows) if not isinstance(self.rows, range) else 0
+        for columns in (self.keys, self.columns):
+            size += sys.getsizeof(columns)
+            size += sum(sys.getsizeof(key) + column.memory_usage() for key, column in columns.items())
+        if self._index is not None:
+            size += sys.getsizeof(self._index)
+        return size
@@ -0,0 +1,121 @@
+from datetime import time
+from pathlib import Path
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from users.models import UserGroup
+from .models import ServerConnection, SessionReaperPolicy
+from .rac_client import RACClient
+from .session_graph import build_blocking_graph
+from .session_reaper import run_reaper
+from .views import _parse_cluster_list
+
+FAKE_RAC_PATH = str(Path(__file__).resolve().parent / 'fake_rac.py')
+
+
+def _session(uuid, number, blocked_by=''):
+    return {'uuid': uuid, 'data': {'infobase': 'ib', 'session-id': str(number), 'blocked-by-ls': str(blocked_by)}}
+
+
+class BlockingGraphCycleTests(SimpleTestCase):
+    """Граф блокировок: цикл с присоединёнными ожидающими"""
+
+    def test_cycle_members_block_whole_component(self):
+        # x <-> y - взаимная блокировка, z ждёт x, w ждёт z
+        sessions = [
+            _session('x', 1, blocked_by=2),
+            _session('y', 2, blocked_by=1),
+            _session('z', 3, blocked_by=1),
+            _session('w', 4, blocked_by=3),
+        ]
+        graph = build_blocking_graph(sessions)
+
+        self.assertEqual([sorted(cycle) for cycle in graph['cycles']], [['x', 'y']])
+        blockers = {item['uuid']: item for item in graph['top_blockers']}
+        self.assertEqual(blockers['x']['blocked_total'], 3)
+        self.assertEqual(blockers['y']['blocked_total'], 3)
+        self.assertEqual(blockers['z']['blocked_total'], 1)
+        self.assertTrue(blockers['x']['in_cycle'] and blockers['y']['in_cycle'])
+        self.assertFalse(blockers['z']['in_cycle'])
+        self.assertEqual(blockers['x']['blocked_directly'], 2)
+        self.assertEqual(blockers['y']['blocked_directly'], 1)
+        self.assertEqual([item['uuid'] for item in graph['top_blockers']][2], 'z')
+
+    def test_tree_totals_unchanged(self):
+        # a <- b <- c, a <- d: корень a блокирует троих
+        sessions = [
+            _session('a', 1),
+            _session('b', 2, blocked_by=1),
+            _session('c', 3, blocked_by=2),
+            _session('d', 4, blocked_by=1),
+        ]
+        graph = build_blocking_graph(sessions)
+
+        self.assertEqual(graph['cycles'], [])
+        blockers = {item['uuid']: item for item in graph['top_blockers']}
+        self.assertEqual(blockers['a']['blocked_total'], 3)
+        self.assertTrue(blockers['a']['is_root'])
+        self.assertEqual(blockers['b']['blocked_total'], 1)
+        self.assertEqual(graph['chains'][0]['sessions'], ['a', 'b', 'c'])
+
+
+@override_settings(RAC_PATH=FAKE_RAC_PATH)
+class SessionReaperTests(TestCase):
+    """Правила завершения сеансов на имитаторе rac"""
+
+    def setUp(self):
+        user = User.objects.create_user('reaper', password='reaper')
+        group = UserGroup.objects.create(name='reaper', created_by=user)
+        self.connection = ServerConnection.objects.create(
+            user_group=group, display_name='fake', server_host='fake-reaper', ras_port=1545
+        )
+        result = RACClient(self.connection).get_cluster_list()
+        self.cluster_uuid = _parse_cluster_list(result['output'])[0]['uuid']
+
+    def _policy(self, name, dry_run, max_sessions=100):
+        return SessionReaperPolicy.objects.create(
+            connection=self.connection, cluster_uuid=self.cluster_uuid, name=name,
+            dry_run=dry_run, selector={'app_id': '1CV8C'}, max_sessions=max_sessions
+        )
+
+    def test_dry_run_policy_does_not_claim_sessions(self):
+        dry = self._policy('report', dry_run=True, max_sessions=5)
+        live = self._policy('live', dry_run=False, max_sessions=3)
+
+        result = run_reaper(ignore_window=True)
+
+        runs = {run['policy_id']: run for run in result['runs']}
+        self.assertGreater(runs[dry.id]['matched'], 5)
+        self.assertEqual(runs[dry.id]['terminated'], 0)
+        self.assertEqual(runs[live.id]['matched'], runs[dry.id]['matched'])
+        self.assertEqual(runs[live.id]['terminated'], 3)
+        # Отчёт пробного запуска - то, что завершил бы рабочий запуск
+        self.assertEqual(len(dry.runs.get().report), 5)
+
+    def test_live_policy_claims_sessions(self):
+        first = self._policy('first', dry_run=False, max_sessions=1000)
+        second = self._policy('second', dry_run=False)
+
+        result = run_reaper(ignore_window=True)
+
+        runs = {run['policy_id']: run for run in result['runs']}
+        self.assertGreater(runs[first.id]['terminated'], 0)
+        self.assertEqual(runs[second.id]['matched'], 0)
+
+
+class SessionReaperWindowTests(SimpleTestCase):
+    """Окно действия правила"""
+
+    def test_window_wraps_midnight(self):
+        policy = SessionReaperPolicy(active_from=time(22, 0), active_to=time(6, 0))
+        self.assertTrue(policy.is_active_at(time(23, 30)))
+        self.assertTrue(policy.is_active_at(time(0, 0)))
+        self.assertTrue(policy.is_active_at(time(5, 59)))
+        self.assertFalse(policy.is_active_at(time(6, 0)))
+        self.assertFalse(policy.is_active_at(time(12, 0)))
+        self.assertTrue(policy.is_active_at(time(22, 0)))
+
+    def test_plain_window_and_no_window(self):
+        policy = SessionReaperPolicy(active_from=time(9, 0), active_to=time(18, 0))
+        self.assertTrue(policy.is_active_at(time(9, 0)))
+        self.assertFalse(policy.is_active_at(time(18, 0)))
+        self.assertTrue(SessionReaperPolicy().is_active_at(time(3, 0)))
@@ -1,29 +1,64 @@
 from django.urls import path
 from . import views
 from . import views_folders
+from . import views_sessions
+from . import views_jobs
+from . import views_rules
+from . import views_config
+from . import views_health
+from . import views_watchdog
+from . import views_reaper
+from . import views_licenses
+from . import views_topology
+from . import views_batch
 
 urlpatterns = [
     path('connections/', views.server_connections, name='server_connections'),
+    # Пакетное чтение: несколько запросов одним HTTP-запросом
+    path('batch/', views_batch.batch_read, name='batch_read'),
     path('connections/count/', views.connections_count, name='connections_count'),
+    path('connections/health/', views_health.connections_health, name='connections_health'),
     path('connections/create/', views.create_connection, name='create_connection'),
     path('connections/update/<int:connection_id>/', views.update_connection, name='update_connection'),
     path('connections/delete/<int:connection_id>/', views.delete_connection, name='delete_connection'),
+    path('clusters/config/plan/', views_config.plan_cluster_config, name='plan_cluster_config'),
+    path('clusters/config/apply/', views_config.apply_cluster_config, name='apply_cluster_config'),
     path('clusters/<int:connection_id>/', views.get_clusters, name='get_clusters'),
     path('clusters/<int:connection_id>/insert/', views.insert_cluster, name='insert_cluster'),
     path('clusters/<int:connection_id>/<str:cluster_uuid>/', views.get_cluster_details, name='get_cluster_details'),
+    path('clusters/<int:connection_id>/<str:cluster_uuid>/topology/', views_topology.cluster_topology, name='cluster_topology'),
     path('clusters/<int:connection_id>/<str:cluster_uuid>/update/', views.update_cluster, name='update_cluster'),
     path('clusters/<int:connection_id>/<str:cluster_uuid>/remove/', views.remove_cluster, name='remove_cluster'),
     path('sessions/<int:connection_id>/', views.get_sessions, name='get_sessions'),
     path('sessions/<int:connection_id>/<str:cluster_uuid>/info/', views.get_session_info, name='get_session_info'),
+    path('sessions/<int:connection_id>/<str:cluster_uuid>/blocking/', views_sessions.session_blocking_graph, name='session_blocking_graph'),
+    path('sessions/<int:connection_id>/<str:cluster_uuid>/hot/', views_sessions.hot_sessions, name='hot_sessions'),
+    path('sessions/events/', views_sessions.session_events, name='session_events'),
     path('sessions/terminate/', views.terminate_sessions, name='terminate_sessions'),
     path('sessions/interrupt/', views.interrupt_server_calls, name='interrupt_server_calls'),
+    path('sessions/terminate-by-selector/', views_sessions.terminate_sessions_by_selector, name='terminate_sessions_by_selector'),
+    # Правила завершения простаивающих сеансов
+    path('sessions/reaper/policies/', views_reaper.reaper_policies, name='reaper_policies'),
+    path('sessions/reaper/policies/<int:policy_id>/update/', views_reaper.update_reaper_policy, name='update_reaper_policy'),
+    path('sessions/reaper/policies/<int:policy_id>/delete/', views_reaper.delete_reaper_policy, name='delete_reaper_policy'),
+    path('sessions/reaper/policies/<int:policy_id>/run/', views_reaper.run_reaper_policy, name='run_reaper_policy'),
+    path('sessions/reaper/runs/', views_reaper.reaper_runs, name='reaper_runs'),
     path('processes/<int:connection_id>/', views.get_processes, name='get_processes'),
     path('processes/<int:connection_id>/<str:cluster_uuid>/info/', views.get_process_info, name='get_process_info'),
     path('processes/<int:connection_id>/<str:cluster_uuid>/turn-off/', views.turn_off_process, name='turn_off_process'),
+    # Контроль рабочих процессов по памяти и производительности
+    path('watchdog/policies/', views_watchdog.watchdog_policies, name='watchdog_policies'),
+    path('watchdog/policies/<int:policy_id>/update/', views_watchdog.update_watchdog_policy, name='update_watchdog_policy'),
+    path('watchdog/policies/<int:policy_id>/delete/', views_watchdog.delete_watchdog_policy, name='delete_watchdog_policy'),
+    path('watchdog/policies/<int:policy_id>/run/', views_watchdog.run_watchdog_policy, name='run_watchdog_policy'),
+    path('watchdog/actions/', views_watchdog.watchdog_actions, name='watchdog_actions'),
+    # Использование лицензий по всем кластерам
+    path('licenses/usage/', views_licenses.license_usage, name='license_usage'),
     path('managers/<int:connection_id>/', views.get_managers, name='get_managers'),
     path('managers/<int:connection_id>/<str:cluster_uuid>/info/', views.get_manager_info, name='get_manager_info'),
     path('infobases/<int:connection_id>/', views.get_infobases, name='get_infobases'),
     path('infobases/<int:connection_id>/<str:cluster_uuid>/info/', views.get_infobase_info, name='get_infobase_info'),
+    path('infobases/<int:connection_id>/<str:cluster_uuid>/info/batch/', views.get_infobases_info_batch, name='get_infobases_info_batch'),
     path('infobases/<int:connection_id>/<str:cluster_uuid>/create/', views.create_infobase, name='create_infobase'),
     path('infobases/<int:connection_id>/<str:cluster_uuid>/update/', views.update_infobase, name='update_infobase'),
     path('infobases/<int:connection_id>/<str:cluster_uuid>/drop/', views.drop_infobase, name='drop_infobase'),
@@ -39,6 +74,8 @@ urlpatterns = [
     path('rules/<int:connection_id>/<str:cluster_uuid>/<str:server_uuid>/<str:rule_uuid>/update/', views.update_rule, name='update_rule'),
     path('rules/<int:connection_id>/<str:cluster_uuid>/<str:server_uuid>/<str:rule_uuid>/delete/', views.delete_rule, name='delete_rule'),
     path('rules/<int:connection_id>/<str:cluster_uuid>/<str:server_uuid>/apply/', views.apply_rules, name='apply_rules'),
+    path('rules/<int:connection_id>/<str:cluster_uuid>/<str:server_uuid>/sync/', views_rules.sync_rules, name='sync_rules'),
+    path('rules/apply-fleet/', views_rules.apply_rules_fleet, name='apply_rules_fleet'),
     # Агенты кластера
     path('agents/<int:connection_id>/', views.get_agents, name='get_agents'),
     path('agents/<int:connection_id>/create/', views.create_agent, name='create_agent'),
@@ -53,4 +90,7 @@ urlpatterns = [
     path('folders/<int:folder_id>/delete/', views_folders.delete_folder, name='delete_folder'),
     path('folders/<int:folder_id>/move/', views_folders.move_folder, name='move_folder'),
     path('connections/<int:connection_id>/move/', views_folders.move_connection, name='move_connection'),
+    # Фоновые задачи
+    path('jobs/', views_jobs.job_list, name='job_list'),
+    path('jobs/<int:job_id>/', views_jobs.job_status, name='job_status'),
 ]
\ No newline at end of file
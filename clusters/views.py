@@ -7,6 +7,10 @@ from django.db import models
 from .models import ServerConnection, ConnectionFolder
 from users.models import UserGroup
 from .rac_client import RACClient, fix_broken_encoding
+from .jobs import submit_job, get_job_timeout
+from .parallel import run_parallel
+from . import rac_cache
+from . import rac_health
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +42,9 @@ def server_connections(request):
     connections = ServerConnection.objects.filter(user_group__in=user_groups)
     folders = ConnectionFolder.objects.filter(user_group__in=user_groups)
     
+    # Последний известный результат проверки доступности RAS (без новых проверок)
+    health = rac_health.get_cached_health(connections)
+    
     # Формируем данные о подключениях
     connections_data = []
     for conn in connections:
@@ -62,6 +69,7 @@ def server_connections(request):
             'user_connections_in_group': connections_in_group,  # Все подключения в группе
             'folder_id': conn.folder.id if conn.folder else None,
             'order': conn.order,
+            'health': health.get(conn.id),
         })
     
     # Формируем данные о папках
@@ -438,6 +446,43 @@ def _parse_session_list(output):
     
     return sessions
 
+def _parse_connection_list(output):
+    """Парсит вывод команды connection list и извлекает информацию о соединениях"""
+    connections = []
+    if not output:
+        return connections
+    
+    lines = output.strip().split('\n')
+    current_connection = None
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if current_connection:
+                connections.append(current_connection)
+                current_connection = None
+            continue
+        
+        if ':' in line:
+            parts = line.split(':', 1)
+            key = parts[0].strip()
+            value = parts[1].strip() if len(parts) > 1 else ''
+            
+            if key == 'connection':
+                if current_connection:
+                    connections.append(current_connection)
+                current_connection = {
+                    'uuid': value,
+                    'data': {}
+                }
+            elif current_connection:
+                current_connection['data'][key] = value
+    
+    if current_connection:
+        connections.append(current_connection)
+    
+    return connections
+
 def _parse_process_list(output):
     """Парсит вывод команды process list и извлекает информацию о процессах"""
     processes = []
@@ -909,6 +954,9 @@ def get_sessions(request, connection_id):
         
         if result['success']:
             sessions = _parse_session_list(result['output'])
+            # Индексируем сеансы по UUID до подстановки имён - из индекса отвечает get_session_info
+            rac_cache.set_list_entries('session', connection.id, cluster_uuid, sessions, include_licenses,
+                                       cluster_admin, cluster_password)
             
             # Получаем список информационных баз для преобразования UUID в имена
             infobases_map = {}
@@ -1187,24 +1235,43 @@ def terminate_sessions(request):
             session_uuids = data['session_uuids']
             cluster_uuid = data['cluster_uuid']
             error_message = data.get('error_message')
+            background = bool(data.get('background'))
             
             connection = ServerConnection.objects.get(id=connection_id, user_group__members=request.user)
             
             # Получаем учетные данные администратора кластера из запроса
             cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
             
-            rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password)
+            rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password,
+                                   timeout=get_job_timeout() if background else None)
             
-            results = []
-            for session_uuid in session_uuids:
-                result = rac_client.terminate_session(cluster_uuid, session_uuid, error_message)
-                results.append({
-                    'session_uuid': session_uuid,
-                    'success': result['success'],
-                    'error': result.get('error')
-                })
+            def run(progress=None):
+                def terminate(session_uuid):
+                    if progress:
+                        return progress.step(f'Завершение сеанса {session_uuid}', rac_client.terminate_session,
+                                             cluster_uuid, session_uuid, error_message)
+                    return rac_client.terminate_session(cluster_uuid, session_uuid, error_message)
+                
+                outcomes = run_parallel(terminate, session_uuids, data.get('max_workers'))
+                results = []
+                for session_uuid, result in zip(session_uuids, outcomes):
+                    results.append({
+                        'session_uuid': session_uuid,
+                        'success': result['success'],
+                        'error': result.get('error')
+                    })
+                # session_events импортирует views - импортируем здесь
+                from .session_events import record_terminations
+                record_terminations(connection.id, cluster_uuid,
+                                    [r['session_uuid'] for r in results if r['success']], request.user.username)
+                return {'success': True, 'results': results}
             
-            return JsonResponse({'success': True, 'results': results}, json_dumps_params={'ensure_ascii': False})
+            if background:
+                job = submit_job(request.user, 'terminate_sessions', f'Завершение сеансов ({len(session_uuids)})', run,
+                                 server_connection=connection, steps_total=len(session_uuids))
+                return JsonResponse({'success': True, 'job_id': job.id}, json_dumps_params={'ensure_ascii': False})
+            
+            return JsonResponse(run(), json_dumps_params={'ensure_ascii': False})
             
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
@@ -1260,6 +1327,18 @@ def get_session_info(request, connection_id, cluster_uuid):
         # Получаем учетные данные администратора кластера из запроса
         cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
         
+        # session list, полученный несколько секунд назад с теми же учётными данными, содержит те же поля, что и session info
+        if request.GET.get('refresh', 'false').lower() != 'true':
+            cached = rac_cache.get_list_entry('session', connection.id, cluster_uuid, session_uuid, include_licenses,
+                                              cluster_admin, cluster_password)
+            if cached is not None:
+                return JsonResponse({
+                    'success': True,
+                    'session': cached,
+                    'output': rac_cache.entry_to_output('session', cached),
+                    'cached': True
+                }, json_dumps_params={'ensure_ascii': False})
+        
         rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password)
         result = rac_client.get_session_info(cluster_uuid, session_uuid, include_licenses)
         
@@ -1544,6 +1623,9 @@ def get_processes(request, connection_id):
         
         if result['success']:
             processes = _parse_process_list(result['output'])
+            # Индексируем процессы по UUID - из индекса отвечает get_process_info
+            rac_cache.set_list_entries('process', connection.id, cluster_uuid, processes, include_licenses,
+                                       cluster_admin, cluster_password)
             return JsonResponse({
                 'success': True,
                 'processes': processes,
@@ -1788,6 +1870,18 @@ def get_process_info(request, connection_id, cluster_uuid):
         # Получаем учетные данные администратора кластера из запроса
         cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
         
+        # process list, полученный несколько секунд назад с теми же учётными данными, содержит те же поля, что и process info
+        if request.GET.get('refresh', 'false').lower() != 'true':
+            cached = rac_cache.get_list_entry('process', connection.id, cluster_uuid, process_uuid, include_licenses,
+                                              cluster_admin, cluster_password)
+            if cached is not None:
+                return JsonResponse({
+                    'success': True,
+                    'process': cached,
+                    'output': rac_cache.entry_to_output('process', cached),
+                    'cached': True
+                }, json_dumps_params={'ensure_ascii': False})
+        
         rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password)
         result = rac_client.get_process_info(cluster_uuid, process_uuid, include_licenses)
         
@@ -4277,13 +4371,71 @@ def apply_rules(request, connection_id, cluster_uuid, server_uuid):
 # Endpoints для работы с информационными базами
 # ============================================
 
+def _requires_infobase_credentials(error_msg):
+    """Проверяет, что ошибка rac означает недостаточность прав пользователя информационной базы"""
+    error_lower = error_msg.lower()
+    # Ищем ключевые слова: "недостаточно" + "прав" + ("пользователя" или "информационную базу")
+    if 'недостаточно' in error_lower and 'прав' in error_lower:
+        if ('пользователя' in error_lower or
+                'информационную' in error_lower or
+                'информационной базы' in error_lower):
+            logger.info(f"Detected insufficient rights error, requires credentials: {error_msg}")
+            return True
+    return False
+
+def _fetch_infobase_info(rac_client, connection_id, cluster_uuid, infobase_uuid, infobase_name,
+                         infobase_user, infobase_pwd, refresh=False):
+    """
+    Получает infobase info с использованием кэша.
+    
+    Кэш учитывает учетные данные базы и администратора кластера: сведения,
+    полученные с одними учетными данными, не выдаются по другим.
+    
+    Returns:
+        dict: {'success', 'infobase', 'output', 'cached'} или {'success': False, 'error', 'requires_credentials'}
+    """
+    cache_key = infobase_uuid or f'name:{infobase_name}'
+    if not refresh:
+        cached = rac_cache.get_infobase_info(
+            connection_id, cluster_uuid, cache_key, infobase_user, infobase_pwd,
+            rac_client.cluster_admin, rac_client.cluster_password
+        )
+        if cached is not None:
+            return dict(cached, cached=True)
+    
+    result = rac_client.get_infobase_info(
+        cluster_uuid,
+        infobase_uuid,
+        infobase_name,
+        infobase_user=infobase_user,
+        infobase_pwd=infobase_pwd
+    )
+    
+    if result['success']:
+        # Парсим вывод и извлекаем структурированные данные (только первая информационная база)
+        data = {
+            'success': True,
+            'output': result['output'],
+            'infobase': _parse_infobase_info(result['output'])
+        }
+        rac_cache.set_infobase_info(
+            connection_id, cluster_uuid, cache_key, data, infobase_user, infobase_pwd,
+            rac_client.cluster_admin, rac_client.cluster_password
+        )
+        return dict(data, cached=False)
+    
+    # Исправляем "битую" кодировку, если ошибка уже была неправильно декодирована
+    error_msg = fix_broken_encoding(result.get('error', 'Ошибка получения информации'))
+    return {
+        'success': False,
+        'error': error_msg,
+        'requires_credentials': _requires_infobase_credentials(error_msg)
+    }
+
 @login_required
 @csrf_exempt
 def get_infobase_info(request, connection_id, cluster_uuid):
     """Получает информацию об информационной базе"""
-    import logging
-    logger = logging.getLogger('clusters')
-    
     # Логируем запрос
     logger.debug(f"GET /api/clusters/infobases/{connection_id}/{cluster_uuid}/info/ - User: {request.user.username}")
     
@@ -4298,65 +4450,18 @@ def get_infobase_info(request, connection_id, cluster_uuid):
             infobase_pwd = request.GET.get('infobase_pwd', '')
         elif 'infobase_pwd' in request.POST:
             infobase_pwd = request.POST.get('infobase_pwd', '')
+        # refresh=true - игнорировать кэш (например, после ручного обновления)
+        refresh = request.GET.get('refresh', 'false').lower() == 'true'
         
         # Получаем учетные данные администратора кластера из запроса
         cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
         
         rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password)
-        result = rac_client.get_infobase_info(
-            cluster_uuid, 
-            infobase_uuid, 
-            infobase_name,
-            infobase_user=infobase_user,
-            infobase_pwd=infobase_pwd
-        )
+        result = _fetch_infobase_info(rac_client, connection.id, cluster_uuid, infobase_uuid, infobase_name,
+                                      infobase_user, infobase_pwd, refresh)
         
-        if result['success']:
-            # Парсим вывод и извлекаем структурированные данные (только первая информационная база)
-            infobase = _parse_infobase_info(result['output'])
-            
-            return JsonResponse({
-                'success': True,
-                'output': result['output'],  # Оставляем для обратной совместимости
-                'infobase': infobase  # Структурированные данные
-            }, json_dumps_params={'ensure_ascii': False})
-        else:
-            error_msg = result.get('error', 'Ошибка получения информации')
-            # Исправляем "битую" кодировку, если ошибка уже была неправильно декодирована
-            error_msg = fix_broken_encoding(error_msg)
-            
-            # Проверяем на ошибку недостаточности прав
-            requires_credentials = False
-            error_lower = error_msg.lower()
-            
-            # Проверяем различные варианты сообщения об ошибке
-            # Ищем ключевые слова: "недостаточно" + "прав" + ("пользователя" или "информационную базу")
-            # Упрощенная проверка: если есть "недостаточно прав" и упоминание информационной базы или пользователя
-            if 'недостаточно' in error_lower and 'прав' in error_lower:
-                # Если есть упоминание пользователя или информационной базы - это точно наша ошибка
-                if ('пользователя' in error_lower or 
-                    'информационную базу' in error_lower or 
-                    'информационной базы' in error_lower or
-                    'информационную' in error_lower):
-                    requires_credentials = True
-                    logger.info(f"Detected insufficient rights error, requires credentials: {error_msg}")
-            
-            # Дополнительная проверка: если ошибка содержит "информационную базу" и "недостаточно прав" 
-            # (даже если порядок слов другой или есть дополнительные слова)
-            if not requires_credentials and 'информационную базу' in error_lower and 'недостаточно' in error_lower and 'прав' in error_lower:
-                requires_credentials = True
-                logger.info(f"Detected insufficient rights error (alternative check), requires credentials: {error_msg}")
-            
-            # Еще одна проверка: если есть "недостаточно" и "прав" и "информационную" (в любом порядке)
-            if not requires_credentials and 'недостаточно' in error_lower and 'прав' in error_lower and 'информационную' in error_lower:
-                requires_credentials = True
-                logger.info(f"Detected insufficient rights error (final check), requires credentials: {error_msg}")
-            
-            return JsonResponse({
-                'success': False,
-                'error': error_msg,
-                'requires_credentials': requires_credentials
-            }, json_dumps_params={'ensure_ascii': False})
+        # output оставляем для обратной совместимости, infobase - структурированные данные
+        return JsonResponse(result, json_dumps_params={'ensure_ascii': False})
             
     except ServerConnection.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Connection not found'}, json_dumps_params={'ensure_ascii': False})
@@ -4364,6 +4469,58 @@ def get_infobase_info(request, connection_id, cluster_uuid):
         error_msg = fix_broken_encoding(str(e))
         return JsonResponse({'success': False, 'error': error_msg}, json_dumps_params={'ensure_ascii': False})
 
+@login_required
+@csrf_exempt
+def get_infobases_info_batch(request, connection_id, cluster_uuid):
+    """
+    Получает infobase info сразу для нескольких информационных баз.
+    
+    Команды выполняются параллельно, уже известные сведения берутся из кэша.
+    Учетные данные можно передать общие (infobase_user/infobase_pwd) или
+    для каждой базы отдельно в credentials: {uuid: {infobase_user, infobase_pwd}}.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'})
+    
+    try:
+        connection = ServerConnection.objects.get(id=connection_id, user_group__members=request.user)
+        data = json.loads(request.body)
+        infobase_uuids = [uuid for uuid in dict.fromkeys(data.get('infobases') or []) if uuid]
+        credentials = data.get('credentials') or {}
+        default_user = data.get('infobase_user')
+        default_pwd = data.get('infobase_pwd')
+        refresh = bool(data.get('refresh', False))
+        
+        if not infobase_uuids:
+            return JsonResponse({'success': False, 'error': 'infobases required'})
+        
+        # Получаем учетные данные администратора кластера из запроса
+        cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
+        
+        rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password)
+        
+        def fetch(infobase_uuid):
+            creds = credentials.get(infobase_uuid) or {}
+            infobase_user = creds.get('infobase_user', default_user)
+            infobase_pwd = creds.get('infobase_pwd', default_pwd)
+            result = _fetch_infobase_info(rac_client, connection.id, cluster_uuid, infobase_uuid, None,
+                                          infobase_user, infobase_pwd, refresh)
+            # Сырой вывод в пакетном ответе не нужен
+            result.pop('output', None)
+            return result
+        
+        results = run_parallel(fetch, infobase_uuids, data.get('max_workers'))
+        return JsonResponse({
+            'success': True,
+            'infobases': dict(zip(infobase_uuids, results))
+        }, json_dumps_params={'ensure_ascii': False})
+    
+    except ServerConnection.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Connection not found'}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        error_msg = fix_broken_encoding(str(e))
+        return JsonResponse({'success': False, 'error': error_msg}, json_dumps_params={'ensure_ascii': False})
+
 # ============================================
 # Требования назначения функциональности (ТНФ)
 # ============================================
@@ -4593,9 +4750,12 @@ def create_infobase(request, connection_id, cluster_uuid):
         # Получаем учетные данные администратора кластера из запроса
         cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
         
-        rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password)
-        
         data = json.loads(request.body)
+        # Создание базы на сервере СУБД может длиться дольше таймаута запроса - выполняем в фоне
+        background = bool(data.get('background'))
+        
+        rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password,
+                               timeout=get_job_timeout() if background else None)
         
         # Обязательные поля
         name = data.get('name')
@@ -4632,18 +4792,22 @@ def create_infobase(request, connection_id, cluster_uuid):
         if 'license_distribution' in data:
             kwargs['license_distribution'] = data['license_distribution']
         
-        result = rac_client.create_infobase(cluster_uuid, name, dbms, db_server, db_name, locale, **kwargs)
+        def run(progress=None):
+            if progress:
+                result = progress.step('Создание информационной базы', rac_client.create_infobase,
+                                       cluster_uuid, name, dbms, db_server, db_name, locale, **kwargs)
+            else:
+                result = rac_client.create_infobase(cluster_uuid, name, dbms, db_server, db_name, locale, **kwargs)
+            if result['success']:
+                return {'success': True, 'message': 'Информационная база успешно создана'}
+            return {'success': False, 'error': result.get('error', 'Ошибка создания информационной базы')}
         
-        if result['success']:
-            return JsonResponse({
-                'success': True,
-                'message': 'Информационная база успешно создана'
-            }, json_dumps_params={'ensure_ascii': False})
-        else:
-            return JsonResponse({
-                'success': False,
-                'error': result.get('error', 'Ошибка создания информационной базы')
-            }, json_dumps_params={'ensure_ascii': False})
+        if background:
+            job = submit_job(request.user, 'create_infobase', f'Создание информационной базы {name}', run,
+                             server_connection=connection)
+            return JsonResponse({'success': True, 'job_id': job.id}, json_dumps_params={'ensure_ascii': False})
+        
+        return JsonResponse(run(), json_dumps_params={'ensure_ascii': False})
             
     except ServerConnection.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Connection not found'}, json_dumps_params={'ensure_ascii': False})
@@ -5002,6 +5166,7 @@ def update_infobase(request, connection_id, cluster_uuid):
         result = rac_client.update_infobase(cluster_uuid, infobase_uuid, infobase_name, **kwargs)
         
         if result['success']:
+            rac_cache.invalidate_infobases(connection.id, cluster_uuid)
             return JsonResponse({
                 'success': True,
                 'message': 'Информационная база успешно обновлена'
@@ -5264,16 +5429,18 @@ def drop_infobase(request, connection_id, cluster_uuid):
         # Получаем учетные данные администратора кластера из запроса
         cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
         
-        rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password)
-        
         data = json.loads(request.body)
         infobase_uuid = data.get('infobase_uuid')
         infobase_name = data.get('infobase_name')
+        # Удаление базы на сервере СУБД может длиться дольше таймаута запроса - выполняем в фоне
+        background = bool(data.get('background'))
         
         if not infobase_uuid and not infobase_name:
             return JsonResponse({'success': False, 'error': 'infobase_uuid or infobase_name required'})
         
-        result = rac_client.drop_infobase(
+        rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password,
+                               timeout=get_job_timeout() if background else None)
+        drop_args = (
             cluster_uuid,
             infobase_uuid,
             infobase_name,
@@ -5283,16 +5450,23 @@ def drop_infobase(request, connection_id, cluster_uuid):
             data.get('clear_database', False)
         )
         
-        if result['success']:
-            return JsonResponse({
-                'success': True,
-                'message': 'Информационная база успешно удалена'
-            }, json_dumps_params={'ensure_ascii': False})
-        else:
-            return JsonResponse({
-                'success': False,
-                'error': result.get('error', 'Ошибка удаления информационной базы')
-            }, json_dumps_params={'ensure_ascii': False})
+        def run(progress=None):
+            if progress:
+                result = progress.step('Удаление информационной базы', rac_client.drop_infobase, *drop_args)
+            else:
+                result = rac_client.drop_infobase(*drop_args)
+            if result['success']:
+                rac_cache.invalidate_infobases(connection.id, cluster_uuid)
+                return {'success': True, 'message': 'Информационная база успешно удалена'}
+            return {'success': False, 'error': result.get('error', 'Ошибка удаления информационной базы')}
+        
+        if background:
+            job = submit_job(request.user, 'drop_infobase',
+                             f'Удаление информационной базы {infobase_name or infobase_uuid}', run,
+                             server_connection=connection)
+            return JsonResponse({'success': True, 'job_id': job.id}, json_dumps_params={'ensure_ascii': False})
+        
+        return JsonResponse(run(), json_dumps_params={'ensure_ascii': False})
             
     except ServerConnection.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Connection not found'}, json_dumps_params={'ensure_ascii': False})
@@ -6527,11 +6701,25 @@ def apply_rules(request, connection_id, cluster_uuid, server_uuid):
             data = json.loads(request.body)
             
             full = data.get('full', True)
+            # Полное применение (--full) перезапускает соединения и может длиться дольше таймаута запроса
+            background = bool(data.get('background'))
             
             # Получаем учетные данные администратора кластера из запроса
             cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
             
-            rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password)
+            rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password,
+                                   timeout=get_job_timeout() if background else None)
+            
+            if background:
+                def run(progress):
+                    result = progress.step('Применение требований назначения', rac_client.apply_rules,
+                                           cluster_uuid, server_uuid, full=full)
+                    return {'success': result['success'], 'error': result.get('error')}
+                
+                job = submit_job(request.user, 'apply_rules', 'Применение требований назначения', run,
+                                 server_connection=connection)
+                return JsonResponse({'success': True, 'job_id': job.id}, json_dumps_params={'ensure_ascii': False})
+            
             result = rac_client.apply_rules(cluster_uuid, server_uuid, full=full)
             
             if result['success']:
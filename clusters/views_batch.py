@@ -0,0 +1,171 @@
+"""
+Пакетное чтение: несколько запросов на чтение одним HTTP-запросом
+
+Каждая операция пакета выполняется существующим view (тот же ответ, что и при
+отдельном запросе), операции выполняются параллельно. Все команды rac пакета,
+включая параллельные команды внутри операций (topology, licenses, health),
+ограничены общим лимитом RAC_MAX_PARALLEL (command_budget) и лимитом на один
+RAS RAC_MAX_PARALLEL_PER_CONNECTION.
+"""
+import copy
+import json
+import logging
+import time
+from django.http import HttpResponse, JsonResponse, QueryDict
+from django.urls import NoReverseMatch, resolve, reverse
+from django.utils.datastructures import MultiValueDict
+from django.views.decorators.csrf import csrf_exempt
+from django.contrib.auth.decorators import login_required
+from .parallel import command_budget, run_parallel
+
+logger = logging.getLogger(__name__)
+
+# Максимальное число операций в одном пакете
+BATCH_MAX_OPERATIONS = 50
+
+# Операция -> (имя URL, параметры пути). Только запросы на чтение.
+OPERATIONS = {
+    'connections': ('server_connections', ()),
+    'health': ('connections_health', ()),
+    'licenses': ('license_usage', ()),
+    'jobs': ('job_list', ()),
+    'session_events': ('session_events', ()),
+    'clusters': ('get_clusters', ('connection_id',)),
+    'cluster': ('get_cluster_details', ('connection_id', 'cluster_uuid')),
+    'topology': ('cluster_topology', ('connection_id', 'cluster_uuid')),
+    'agents': ('get_agents', ('connection_id',)),
+    'cluster_admins': ('get_cluster_admins', ('connection_id', 'cluster_uuid')),
+    'servers': ('get_servers', ('connection_id',)),
+    'server': ('get_server_info', ('connection_id', 'cluster_uuid', 'server_uuid')),
+    'processes': ('get_processes', ('connection_id',)),
+    'process': ('get_process_info', ('connection_id', 'cluster_uuid')),
+    'managers': ('get_managers', ('connection_id',)),
+    'manager': ('get_manager_info', ('connection_id', 'cluster_uuid')),
+    'sessions': ('get_sessions', ('connection_id',)),
+    'session': ('get_session_info', ('connection_id', 'cluster_uuid')),
+    'session_blocking': ('session_blocking_graph', ('connection_id', 'cluster_uuid')),
+    'hot_sessions': ('hot_sessions', ('connection_id', 'cluster_uuid')),
+    'infobases': ('get_infobases', ('connection_id',)),
+    'infobase': ('get_infobase_info', ('connection_id', 'cluster_uuid')),
+    'rules': ('get_rules', ('connection_id', 'cluster_uuid', 'server_uuid')),
+    'rule': ('get_rule_info', ('connection_id', 'cluster_uuid', 'server_uuid', 'rule_uuid')),
+}
+
+PATH_PARAMS = ('connection_id', 'cluster_uuid', 'server_uuid', 'rule_uuid')
+
+
+def _error(message):
+    return json.dumps({'success': False, 'error': message}, ensure_ascii=False)
+
+
+def _prepare(operation, defaults):
+    """
+    Проверяет операцию и возвращает (view, kwargs пути, параметры запроса).
+
+    Raises:
+        ValueError: Неизвестная операция или не хватает параметров
+    """
+    name = operation.get('op')
+    if name not in OPERATIONS:
+        raise ValueError(f'Unknown op: {name}')
+    url_name, path_params = OPERATIONS[name]
+
+    missing = [param for param in path_params if operation.get(param) in (None, '')]
+    if missing:
+        raise ValueError(f"{name} requires {', '.join(missing)}")
+
+    params = dict(defaults)
+    params.update(operation.get('params') or {})
+    # Списки принимают кластер параметром запроса - cluster_uuid операции подставляется в него
+    if 'cluster_uuid' not in path_params and operation.get('cluster_uuid') and 'cluster' not in params:
+        params['cluster'] = operation['cluster_uuid']
+
+    try:
+        path = reverse(url_name, kwargs={param: operation[param] for param in path_params})
+    except NoReverseMatch:
+        raise ValueError(f"Invalid parameters for {name}")
+    match = resolve(path)
+    query = QueryDict(mutable=True)
+    for key, value in params.items():
+        if isinstance(value, (list, tuple)):
+            query.setlist(key, [str(item) for item in value])
+        elif value is not None:
+            query[key] = str(value).lower() if isinstance(value, bool) else str(value)
+    return match.func, match.kwargs, path, query
+
+
+def _subrequest(request, path, query):
+    """Копия запроса пользователя в виде GET-запроса к view операции"""
+    sub = copy.copy(request)
+    sub.method = 'GET'
+    sub.path = sub.path_info = path
+    sub.GET = query
+    sub._post = QueryDict()
+    sub._files = MultiValueDict()
+    return sub
+
+
+@login_required
+@csrf_exempt
+def batch_read(request):
+    """
+    Выполняет несколько операций чтения одним запросом.
+
+    Тело: {"operations": [{"id": "s", "op": "sessions", "connection_id": 1,
+    "cluster_uuid": "...", "params": {...}}, ...], "cluster_admin": ..., "cluster_password": ...}.
+    Параметры пути (connection_id, cluster_uuid, server_uuid, rule_uuid) - поля
+    операции, остальные параметры - в params, как в строке запроса отдельного view.
+    Учётные данные верхнего уровня подставляются во все операции.
+
+    Ответ: {"success": true, "results": {id: ответ view}, "duration": ...}; ошибка
+    отдельной операции не прерывает пакет.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'}, json_dumps_params={'ensure_ascii': False})
+
+    try:
+        data = json.loads(request.body)
+    except (json.JSONDecodeError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, json_dumps_params={'ensure_ascii': False})
+
+    operations = data.get('operations') or []
+    if not isinstance(operations, list) or not operations:
+        return JsonResponse({'success': False, 'error': 'operations required'}, json_dumps_params={'ensure_ascii': False})
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return JsonResponse({
+            'success': False,
+            'error': f'Too many operations (max {BATCH_MAX_OPERATIONS})'
+        }, json_dumps_params={'ensure_ascii': False})
+    ids = [str(operation.get('id', '')) if isinstance(operation, dict) else '' for operation in operations]
+    if '' in ids or len(set(ids)) != len(ids):
+        return JsonResponse({'success': False, 'error': 'Each operation requires a unique id'}, json_dumps_params={'ensure_ascii': False})
+
+    defaults = {key: data[key] for key in ('cluster_admin', 'cluster_password') if data.get(key)}
+
+    def execute(operation):
+        try:
+            view, kwargs, path, query = _prepare(operation, defaults)
+        except ValueError as e:
+            return _error(str(e))
+        try:
+            response = view(_subrequest(request, path, query), **kwargs)
+        except Exception as e:
+            logger.error(f"Batch operation {operation.get('op')} failed: {e}")
+            return _error(str(e))
+        if not response.get('Content-Type', '').startswith('application/json'):
+            return _error(f'HTTP {response.status_code}')
+        return response.content.decode(response.charset or 'utf-8')
+
+    started = time.monotonic()
+    with command_budget():
+        results = run_parallel(execute, operations)
+    # run_parallel возвращает словарь, если задача завершилась исключением
+    results = [result if isinstance(result, str) else _error(result.get('error')) for result in results]
+
+    # Ответы view уже закодированы в JSON - собираем ответ без повторного разбора
+    body = '{"success": true, "results": {%s}, "duration": %s}' % (
+        ', '.join(f'{json.dumps(operation_id, ensure_ascii=False)}: {result}'
+                  for operation_id, result in zip(ids, results)),
+        json.dumps(round(time.monotonic() - started, 3))
+    )
+    return HttpResponse(body, content_type='application/json')
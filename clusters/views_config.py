@@ -0,0 +1,138 @@
+"""
+Views для декларативной конфигурации кластеров (plan / apply)
+"""
+import json
+import logging
+import time
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.contrib.auth.decorators import login_required
+from .models import ServerConnection
+from .rac_client import RACClient, fix_broken_encoding
+from .parallel import get_max_workers, run_parallel
+from .jobs import submit_job, get_job_timeout
+from .cluster_config import ConfigError, load_config, fetch_state, plan_changes, public_changes, apply_changes
+
+logger = logging.getLogger(__name__)
+
+
+def _run_cluster_config(request, apply):
+    """
+    Общая часть plan и apply: для каждой цели (connection_id, cluster_uuid)
+    читает состояние, строит план и при apply выполняет изменения.
+    Цели обрабатываются параллельно.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'})
+
+    try:
+        data = json.loads(request.body)
+        targets = data.get('targets') or []
+        background = apply and bool(data.get('background'))
+
+        if not targets:
+            return JsonResponse({'success': False, 'error': 'targets required'})
+        if any(not t.get('connection_id') or not t.get('cluster_uuid') for t in targets):
+            return JsonResponse({'success': False, 'error': 'Each target requires connection_id and cluster_uuid'})
+
+        try:
+            config = load_config(data.get('config'))
+        except ConfigError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+        connection_ids = {int(t['connection_id']) for t in targets}
+        connections = {
+            c.id: c for c in ServerConnection.objects.filter(
+                id__in=connection_ids, user_group__members=request.user
+            ).distinct()
+        }
+
+        default_admin = data.get('cluster_admin')
+        default_password = data.get('cluster_password')
+        timeout = get_job_timeout() if background else None
+        # Кластеры обрабатываются параллельно; команды внутри кластера - в пределах
+        # остатка лимита RAC_MAX_PARALLEL, чтобы общее число процессов rac его не превышало
+        workers = min(get_max_workers(data.get('max_workers')), len(targets))
+        inner_workers = max(1, get_max_workers() // workers)
+
+        def run(progress=None):
+            def process_target(target):
+                connection_id = int(target['connection_id'])
+                cluster_uuid = target['cluster_uuid']
+                item = {'connection_id': connection_id, 'cluster_uuid': cluster_uuid}
+
+                connection = connections.get(connection_id)
+                if connection is None:
+                    return dict(item, success=False, error='Connection not found')
+
+                cluster_admin = target.get('cluster_admin') or default_admin
+                rac_client = RACClient(
+                    connection,
+                    cluster_admin=cluster_admin,
+                    cluster_password=target.get('cluster_password') or default_password,
+                    timeout=timeout
+                )
+                started = time.monotonic()
+                try:
+                    state = fetch_state(rac_client, cluster_uuid, config, inner_workers)
+                except ConfigError as e:
+                    return dict(item, success=False, error=fix_broken_encoding(str(e)))
+
+                changes, errors = plan_changes(config, state, current_admin=cluster_admin)
+                item.update(
+                    connection_name=connection.display_name,
+                    changes=public_changes(changes),
+                    errors=errors,
+                    success=not errors
+                )
+
+                if apply and changes:
+                    results = apply_changes(rac_client, cluster_uuid, changes, config['apply_rules'], inner_workers)
+                    for result in results:
+                        if result['error']:
+                            result['error'] = fix_broken_encoding(result['error'])
+                    item['results'] = results
+                    item['success'] = item['success'] and all(r['success'] for r in results)
+
+                item['duration'] = round(time.monotonic() - started, 3)
+                if progress:
+                    progress.step(f'{connection.display_name}: {cluster_uuid}',
+                                  lambda: {'success': item['success'], 'error': '; '.join(errors) or None})
+                return item
+
+            results = run_parallel(process_target, targets, workers)
+            if apply:
+                logger.info(
+                    f"User {request.user.username} applied cluster config to {len(results)} clusters: "
+                    f"{sum(len(r.get('changes', [])) for r in results)} changes"
+                )
+            return {
+                'success': all(r['success'] for r in results),
+                'mode': 'apply' if apply else 'plan',
+                'targets': results,
+                'changes': sum(len(r.get('changes', [])) for r in results)
+            }
+
+        if background:
+            job = submit_job(request.user, 'cluster_config', f'Применение конфигурации ({len(targets)} кластеров)',
+                             run, steps_total=len(targets))
+            return JsonResponse({'success': True, 'job_id': job.id}, json_dumps_params={'ensure_ascii': False})
+
+        return JsonResponse(run(), json_dumps_params={'ensure_ascii': False})
+
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+@csrf_exempt
+def plan_cluster_config(request):
+    """Показывает, какие изменения потребуются для приведения кластеров к описанию"""
+    return _run_cluster_config(request, apply=False)
+
+
+@login_required
+@csrf_exempt
+def apply_cluster_config(request):
+    """Приводит кластеры к описанию, выполняя только отличающиеся изменения"""
+    return _run_cluster_config(request, apply=True)
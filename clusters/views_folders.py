@@ -6,12 +6,87 @@ import logging
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.db.models import Max
 from .models import ServerConnection, ConnectionFolder
 from users.models import UserGroup
 
 logger = logging.getLogger(__name__)
 
+# Разреженная нумерация порядка: между соседними элементами оставляется зазор,
+# поэтому перемещение обычно меняет только одну строку. Полная перенумерация
+# выполняется только когда зазор между соседями исчерпан.
+ORDER_STEP = 1024
+# Граница значений, чтобы не выйти за пределы IntegerField
+ORDER_LIMIT = 2 ** 31 - ORDER_STEP
+
+
+def _rebalance_order(siblings, position):
+    """
+    Перенумеровывает элементы с шагом ORDER_STEP одним bulk_update.
+    
+    Args:
+        siblings: QuerySet соседних элементов (без перемещаемого), упорядоченный как в дереве
+        position: Позиция, на которую вставляется перемещаемый элемент
+    
+    Returns:
+        int: Новое значение order для перемещаемого элемента
+    """
+    items = list(siblings.only('id', 'order'))
+    position = min(position, len(items))
+    
+    changed = []
+    for index, sibling in enumerate(items):
+        slot = index if index < position else index + 1
+        new_value = slot * ORDER_STEP
+        if sibling.order != new_value:
+            sibling.order = new_value
+            changed.append(sibling)
+    
+    if changed:
+        siblings.model.objects.bulk_update(changed, ['order'])
+    
+    logger.debug(f'Перенумерация порядка: {len(changed)} из {len(items)} элементов')
+    return position * ORDER_STEP
+
+
+def _order_for_position(siblings, position):
+    """
+    Вычисляет значение order для вставки элемента на позицию position среди siblings.
+    
+    Читает не более двух соседних значений; при отсутствии зазора между соседями
+    выполняет перенумерацию (_rebalance_order). Вызывать внутри transaction.atomic().
+    """
+    position = max(0, int(position))
+    
+    if position == 0:
+        prev_order = None
+        next_order = siblings.values_list('order', flat=True).first()
+    else:
+        neighbours = list(siblings.values_list('order', flat=True)[position - 1:position + 1])
+        if not neighbours:
+            # Позиция за концом списка - ставим после последнего элемента
+            prev_order = siblings.reverse().values_list('order', flat=True).first()
+            next_order = None
+        else:
+            prev_order = neighbours[0]
+            next_order = neighbours[1] if len(neighbours) > 1 else None
+    
+    if prev_order is None and next_order is None:
+        return 0
+    if prev_order is None:
+        new_order = next_order - ORDER_STEP
+    elif next_order is None:
+        new_order = prev_order + ORDER_STEP
+    elif next_order - prev_order >= 2:
+        new_order = (prev_order + next_order) // 2
+    else:
+        new_order = None
+    
+    if new_order is None or abs(new_order) > ORDER_LIMIT:
+        return _rebalance_order(siblings, position)
+    return new_order
+
 @login_required
 @csrf_exempt
 def create_folder(request):
@@ -35,9 +110,9 @@ def create_folder(request):
             if ConnectionFolder.objects.filter(user_group=user_group, name=name).exists():
                 return JsonResponse({'success': False, 'error': 'Папка с таким именем уже существует'}, json_dumps_params={'ensure_ascii': False})
             
-            # Определяем порядок (максимальный + 1)
-            max_order = ConnectionFolder.objects.filter(user_group=user_group).aggregate(Max('order'))['order__max'] or -1
-            order = max_order + 1
+            # Определяем порядок (после последней папки)
+            max_order = ConnectionFolder.objects.filter(user_group=user_group).aggregate(Max('order'))['order__max']
+            order = 0 if max_order is None else max_order + ORDER_STEP
             
             folder = ConnectionFolder.objects.create(
                 user_group=user_group,
@@ -137,21 +212,14 @@ def move_folder(request, folder_id):
             if new_order is None:
                 return JsonResponse({'success': False, 'error': 'Порядок не указан'}, json_dumps_params={'ensure_ascii': False})
             
-            # Обновляем порядок всех папок в группе
-            user_group = folder.user_group
-            folders = list(ConnectionFolder.objects.filter(user_group=user_group).order_by('order'))
-            
-            # Удаляем текущую папку из списка
-            folders = [f for f in folders if f.id != folder_id]
+            # Вычисляем новый порядок относительно соседей (обычно меняется одна строка)
+            siblings = ConnectionFolder.objects.filter(
+                user_group=folder.user_group
+            ).exclude(id=folder.id).order_by('order', 'name', 'id')
             
-            # Вставляем папку на новую позицию
-            new_order = max(0, min(new_order, len(folders)))
-            folders.insert(new_order, folder)
-            
-            # Обновляем порядок всех папок
-            for index, f in enumerate(folders):
-                f.order = index
-                f.save()
+            with transaction.atomic():
+                folder.order = _order_for_position(siblings, new_order)
+                folder.save(update_fields=['order', 'updated_at'])
             
             return JsonResponse({
                 'success': True,
@@ -187,27 +255,17 @@ def move_connection(request, connection_id):
                 folder = ConnectionFolder.objects.get(id=folder_id, user_group__members=request.user)
                 connection.folder = folder
             
-            # Обновляем порядок
-            if new_order is not None:
-                connection.order = new_order
-                
-                # Обновляем порядок других подключений в той же папке (или без папки)
-                user_group = connection.user_group
-                connections_in_folder = ServerConnection.objects.filter(
-                    user_group=user_group,
-                    folder=connection.folder
-                ).exclude(id=connection_id).order_by('order')
+            with transaction.atomic():
+                # Обновляем порядок относительно соседей в той же папке (или без папки)
+                if new_order is not None:
+                    siblings = ServerConnection.objects.filter(
+                        user_group=connection.user_group,
+                        folder=connection.folder
+                    ).exclude(id=connection.id).order_by('order', 'display_name', 'id')
+                    connection.order = _order_for_position(siblings, new_order)
                 
-                connections_list = list(connections_in_folder)
-                new_order = max(0, min(new_order, len(connections_list)))
-                connections_list.insert(new_order, connection)
-                
-                # Обновляем порядок всех подключений
-                for index, conn in enumerate(connections_list):
-                    conn.order = index
-                    conn.save()
-            else:
-                connection.save()
+                # update_fields - чтобы не перешифровывать пароли подключения
+                connection.save(update_fields=['folder', 'order', 'updated_at'])
             
             return JsonResponse({
                 'success': True,
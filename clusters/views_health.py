@@ -0,0 +1,37 @@
+"""
+Views для проверки доступности серверов администрирования (RAS)
+"""
+import logging
+from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from .models import ServerConnection
+from . import rac_health
+
+logger = logging.getLogger(__name__)
+
+
+@login_required
+def connections_health(request):
+    """
+    Возвращает доступность RAS для подключений пользователя.
+
+    Параметры: ids - список id через запятую (по умолчанию все подключения),
+    refresh=true - проверить заново, deep=true - дополнительно выполнить cluster list.
+    """
+    connections = ServerConnection.objects.filter(user_group__in=request.user.user_groups.all())
+
+    ids = request.GET.get('ids')
+    if ids:
+        try:
+            connections = connections.filter(id__in=[int(i) for i in ids.split(',') if i.strip()])
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'ids must be a comma-separated list of integers'})
+
+    refresh = request.GET.get('refresh', 'false').lower() == 'true'
+    deep = request.GET.get('deep', 'false').lower() == 'true'
+
+    health = rac_health.check_connections(list(connections), refresh=refresh, deep=deep)
+    return JsonResponse({
+        'success': True,
+        'health': health
+    }, json_dumps_params={'ensure_ascii': False})
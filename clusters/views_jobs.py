@@ -0,0 +1,38 @@
+"""
+Views для опроса фоновых задач
+"""
+import logging
+from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+
+@login_required
+def job_list(request):
+    """Возвращает последние фоновые задачи пользователя"""
+    jobs = BackgroundJob.objects.filter(user=request.user)
+    if request.GET.get('active', 'false').lower() == 'true':
+        jobs = jobs.filter(status__in=[BackgroundJob.STATUS_PENDING, BackgroundJob.STATUS_RUNNING])
+
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 50)), 200))
+    except ValueError:
+        limit = 50
+
+    return JsonResponse({
+        'success': True,
+        'jobs': [job.to_dict(include_steps=False) for job in jobs[:limit]]
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+def job_status(request, job_id):
+    """Возвращает состояние и прогресс фоновой задачи"""
+    try:
+        job = BackgroundJob.objects.get(id=job_id, user=request.user)
+    except BackgroundJob.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Job not found'}, json_dumps_params={'ensure_ascii': False})
+
+    return JsonResponse({'success': True, 'job': job.to_dict()}, json_dumps_params={'ensure_ascii': False})
@@ -0,0 +1,49 @@
+"""
+Views для сводки использования лицензий по всем кластерам
+"""
+import logging
+from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from .models import ServerConnection
+from . import rac_cache
+from .license_usage import collect_license_usage
+from .views import _get_cluster_admin_from_request
+
+logger = logging.getLogger(__name__)
+
+
+@login_required
+def license_usage(request):
+    """
+    Использование лицензий по всем кластерам подключений пользователя.
+
+    Параметры: ids - список id подключений через запятую (по умолчанию все),
+    refresh=true - собрать заново, не используя кэш. Результат кэшируется на
+    RAC_LICENSE_USAGE_TTL секунд.
+    """
+    connections = ServerConnection.objects.filter(user_group__members=request.user).distinct().order_by('id')
+
+    ids = request.GET.get('ids')
+    if ids:
+        try:
+            connections = connections.filter(id__in=[int(i) for i in ids.split(',') if i.strip()])
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'ids must be a comma-separated list of integers'})
+
+    try:
+        connections = list(connections)
+        connection_ids = [connection.id for connection in connections]
+        cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
+        refresh = request.GET.get('refresh', 'false').lower() == 'true'
+
+        usage = None if refresh else rac_cache.get_license_usage(connection_ids, cluster_admin, cluster_password)
+        cached = usage is not None
+        if not cached:
+            usage = collect_license_usage(connections, cluster_admin, cluster_password)
+            rac_cache.set_license_usage(connection_ids, usage, cluster_admin, cluster_password)
+
+        return JsonResponse(dict(usage, cached=cached), json_dumps_params={'ensure_ascii': False})
+
+    except Exception as e:
+        logger.error(f"Failed to collect license usage: {e}")
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
@@ -0,0 +1,221 @@
+"""
+Views для правил завершения простаивающих сеансов и отчётов об их запусках
+"""
+import json
+import logging
+from datetime import datetime
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.contrib.auth.decorators import login_required
+from .models import ServerConnection, SessionReaperPolicy, SessionReaperRun
+from .rac_client import RACClient
+from .session_reaper import run_reaper
+from .session_selectors import parse_selector
+from .views import _get_cluster_admin_from_request
+from .views_sessions import _resolve_infobase_name
+
+logger = logging.getLogger(__name__)
+
+
+def _user_policies(user):
+    return SessionReaperPolicy.objects.filter(connection__user_group__members=user).select_related('connection')
+
+
+def _parse_time(value, field):
+    if value in (None, ''):
+        return None
+    try:
+        return datetime.strptime(str(value).strip(), '%H:%M').time()
+    except ValueError:
+        raise ValueError(f'Поле {field} должно быть временем в формате ЧЧ:ММ')
+
+
+def _apply_fields(request, policy, data):
+    """
+    Переносит значения из запроса в правило.
+
+    Имя информационной базы в селекторе (selector.infobase_name) преобразуется
+    в UUID запросом к кластеру.
+
+    Raises:
+        ValueError: Если значения некорректны
+    """
+    for field in ('name', 'cluster_name', 'error_message'):
+        if field in data:
+            setattr(policy, field, (data[field] or '').strip())
+    for field in ('enabled', 'dry_run'):
+        if field in data:
+            setattr(policy, field, bool(data[field]))
+    for field in ('active_from', 'active_to'):
+        if field in data:
+            setattr(policy, field, _parse_time(data[field], field))
+    if 'max_sessions' in data:
+        try:
+            policy.max_sessions = int(data['max_sessions'])
+        except (TypeError, ValueError):
+            raise ValueError('Поле max_sessions должно быть целым числом')
+        if policy.max_sessions < 1:
+            raise ValueError('Поле max_sessions должно быть не меньше 1')
+    # Пустые учётные данные - использовать заданные в подключении
+    for field in ('cluster_admin', 'cluster_password'):
+        if field in data:
+            setattr(policy, field, (data[field] or '').strip() or None)
+
+    if 'selector' in data:
+        selector = dict(data['selector'] or {})
+        selector.pop('exclude_sessions', None)
+        infobase_name = selector.pop('infobase_name', None)
+        if infobase_name and not selector.get('infobase'):
+            cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
+            rac_client = RACClient(
+                policy.connection,
+                cluster_admin=cluster_admin or policy.cluster_admin or policy.connection.cluster_admin,
+                cluster_password=cluster_password or policy.cluster_password or policy.connection.cluster_password
+            )
+            infobase_uuid = _resolve_infobase_name(rac_client, policy.cluster_uuid, infobase_name)
+            if not infobase_uuid:
+                raise ValueError(f'Информационная база "{infobase_name}" не найдена')
+            selector['infobase'] = infobase_uuid
+        policy.selector = selector
+
+    if not policy.name:
+        raise ValueError('Укажите название правила')
+    if (policy.active_from is None) != (policy.active_to is None):
+        raise ValueError('Укажите начало и конец окна действия правила')
+    # Проверяем селектор тем же разбором, что и при запуске
+    parse_selector(policy.selector)
+
+
+@login_required
+@csrf_exempt
+def reaper_policies(request):
+    """
+    GET - список правил завершения сеансов пользователя (?connection_id= для отбора).
+    POST - создание правила: connection_id, cluster_uuid, name, selector, active_from/active_to.
+    """
+    if request.method == 'GET':
+        policies = _user_policies(request.user)
+        connection_id = request.GET.get('connection_id')
+        if connection_id:
+            policies = policies.filter(connection_id=connection_id)
+        return JsonResponse({
+            'success': True,
+            'policies': [policy.to_dict() for policy in policies]
+        }, json_dumps_params={'ensure_ascii': False})
+
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only GET and POST allowed'}, json_dumps_params={'ensure_ascii': False})
+
+    try:
+        data = json.loads(request.body)
+        connection = ServerConnection.objects.get(id=data.get('connection_id'), user_group__members=request.user)
+        cluster_uuid = (data.get('cluster_uuid') or '').strip()
+        if not cluster_uuid:
+            return JsonResponse({'success': False, 'error': 'Cluster UUID required'}, json_dumps_params={'ensure_ascii': False})
+
+        policy = SessionReaperPolicy(connection=connection, cluster_uuid=cluster_uuid, created_by=request.user)
+        _apply_fields(request, policy, data)
+        policy.save()
+        return JsonResponse({'success': True, 'policy': policy.to_dict()}, json_dumps_params={'ensure_ascii': False})
+
+    except ServerConnection.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Connection not found'}, json_dumps_params={'ensure_ascii': False})
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        logger.error(f"Failed to create reaper policy: {e}")
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+@csrf_exempt
+def update_reaper_policy(request, policy_id):
+    """Изменяет условия, окно действия и режим правила"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'}, json_dumps_params={'ensure_ascii': False})
+
+    try:
+        policy = _user_policies(request.user).get(id=policy_id)
+        _apply_fields(request, policy, json.loads(request.body))
+        policy.save()
+        return JsonResponse({'success': True, 'policy': policy.to_dict()}, json_dumps_params={'ensure_ascii': False})
+
+    except SessionReaperPolicy.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Policy not found'}, json_dumps_params={'ensure_ascii': False})
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        logger.error(f"Failed to update reaper policy {policy_id}: {e}")
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+@csrf_exempt
+def delete_reaper_policy(request, policy_id):
+    """Удаляет правило вместе с отчётами о запусках"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'}, json_dumps_params={'ensure_ascii': False})
+
+    deleted, _ = _user_policies(request.user).filter(id=policy_id).delete()
+    if not deleted:
+        return JsonResponse({'success': False, 'error': 'Policy not found'}, json_dumps_params={'ensure_ascii': False})
+    return JsonResponse({'success': True}, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+@csrf_exempt
+def run_reaper_policy(request, policy_id):
+    """
+    Выполняет правило сейчас, не дожидаясь планировщика.
+
+    Тело запроса (необязательно): {"dry_run": true} - только отчёт о подходящих
+    сеансах; {"ignore_window": true} - выполнить вне окна действия правила.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'}, json_dumps_params={'ensure_ascii': False})
+
+    try:
+        policy = _user_policies(request.user).get(id=policy_id)
+        if not policy.enabled:
+            return JsonResponse({'success': False, 'error': 'Правило отключено'}, json_dumps_params={'ensure_ascii': False})
+
+        data = json.loads(request.body) if request.body else {}
+        dry_run = data.get('dry_run')
+        summary = run_reaper(
+            policy_ids=[policy.id],
+            dry_run=None if dry_run is None else bool(dry_run),
+            ignore_window=bool(data.get('ignore_window'))
+        )
+        if not summary['runs']:
+            return JsonResponse({'success': False, 'error': 'Правило не действует в текущее время'}, json_dumps_params={'ensure_ascii': False})
+
+        run = policy.runs.first()
+        return JsonResponse(dict(summary, run=run.to_dict()), json_dumps_params={'ensure_ascii': False})
+
+    except SessionReaperPolicy.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Policy not found'}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        logger.error(f"Failed to run reaper policy {policy_id}: {e}")
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+def reaper_runs(request):
+    """Отчёты о запусках правил (?policy_id=, ?report=true - со списком сеансов, ?limit=)"""
+    runs = SessionReaperRun.objects.filter(policy__connection__user_group__members=request.user)
+    policy_id = request.GET.get('policy_id')
+    if policy_id:
+        runs = runs.filter(policy_id=policy_id)
+    include_report = request.GET.get('report', 'false').lower() == 'true'
+    if not include_report:
+        runs = runs.defer('report')
+
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 50)), 500))
+    except ValueError:
+        limit = 50
+
+    return JsonResponse({
+        'success': True,
+        'runs': [run.to_dict(include_report=include_report) for run in runs[:limit]]
+    }, json_dumps_params={'ensure_ascii': False})
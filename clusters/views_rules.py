@@ -0,0 +1,200 @@
+"""
+Views для групповых операций с требованиями назначения функциональности (ТНФ)
+"""
+import json
+import logging
+import time
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.contrib.auth.decorators import login_required
+from .models import ServerConnection
+from .rac_client import RACClient, fix_broken_encoding
+from .parallel import run_parallel
+from .jobs import submit_job, get_job_timeout
+from .rule_sync import plan_rule_sync
+from .views import _get_cluster_admin_from_request, _parse_rule_list
+
+logger = logging.getLogger(__name__)
+
+
+@login_required
+@csrf_exempt
+def apply_rules_fleet(request):
+    """
+    Применяет требования назначения сразу на наборе кластеров.
+
+    Принимает список целей (connection_id, cluster_uuid и, при необходимости,
+    cluster_admin/cluster_password) и выполняет rule apply параллельно с
+    ограничением числа одновременных команд. Время и ошибка собираются по каждой цели.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'})
+
+    try:
+        data = json.loads(request.body)
+        targets = data.get('targets') or []
+        full = data.get('full', True)
+        background = bool(data.get('background'))
+
+        if not targets:
+            return JsonResponse({'success': False, 'error': 'targets required'})
+        if any(not t.get('connection_id') or not t.get('cluster_uuid') for t in targets):
+            return JsonResponse({'success': False, 'error': 'Each target requires connection_id and cluster_uuid'})
+
+        # Все подключения одним запросом; недоступные пользователю цели получат ошибку
+        connection_ids = {int(t['connection_id']) for t in targets}
+        connections = {
+            c.id: c for c in ServerConnection.objects.filter(
+                id__in=connection_ids, user_group__members=request.user
+            ).distinct()
+        }
+
+        # Учетные данные по умолчанию, если для цели они не указаны
+        default_admin = data.get('cluster_admin')
+        default_password = data.get('cluster_password')
+        timeout = get_job_timeout() if background else None
+
+        def run(progress=None):
+            def apply_target(target):
+                connection_id = int(target['connection_id'])
+                cluster_uuid = target['cluster_uuid']
+                item = {'connection_id': connection_id, 'cluster_uuid': cluster_uuid}
+
+                connection = connections.get(connection_id)
+                if connection is None:
+                    return dict(item, success=False, error='Connection not found', duration=0)
+
+                rac_client = RACClient(
+                    connection,
+                    cluster_admin=target.get('cluster_admin') or default_admin,
+                    cluster_password=target.get('cluster_password') or default_password,
+                    timeout=timeout
+                )
+                started = time.monotonic()
+                if progress:
+                    result = progress.step(f'{connection.display_name}: {cluster_uuid}', rac_client.apply_rules,
+                                           cluster_uuid, full=full)
+                else:
+                    result = rac_client.apply_rules(cluster_uuid, full=full)
+                return dict(
+                    item,
+                    connection_name=connection.display_name,
+                    success=result['success'],
+                    error=fix_broken_encoding(result['error']) if result.get('error') else None,
+                    duration=round(time.monotonic() - started, 3)
+                )
+
+            started = time.monotonic()
+            results = run_parallel(apply_target, targets, data.get('max_workers'))
+            applied = sum(1 for r in results if r['success'])
+            logger.info(
+                f"User {request.user.username} applied rules on {applied}/{len(results)} clusters "
+                f"({'full' if full else 'partial'})"
+            )
+            return {
+                'success': True,
+                'results': results,
+                'applied': applied,
+                'failed': len(results) - applied,
+                'duration': round(time.monotonic() - started, 3)
+            }
+
+        if background:
+            job = submit_job(request.user, 'apply_rules', f'Применение требований назначения ({len(targets)} кластеров)',
+                             run, steps_total=len(targets))
+            return JsonResponse({'success': True, 'job_id': job.id}, json_dumps_params={'ensure_ascii': False})
+
+        return JsonResponse(run(), json_dumps_params={'ensure_ascii': False})
+
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+@csrf_exempt
+def sync_rules(request, connection_id, cluster_uuid, server_uuid):
+    """
+    Приводит список требований назначения сервера к желаемому.
+
+    Желаемый упорядоченный список сравнивается с текущим rule list, и выполняются
+    только необходимые команды remove/update/insert. При apply = full|partial после
+    успешной синхронизации требования применяются одной командой.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'})
+
+    try:
+        connection = ServerConnection.objects.get(id=connection_id, user_group__members=request.user)
+        data = json.loads(request.body)
+        desired = data.get('rules')
+        apply_mode = data.get('apply')
+        dry_run = bool(data.get('dry_run', False))
+
+        if not isinstance(desired, list):
+            return JsonResponse({'success': False, 'error': 'rules must be a list'})
+        if apply_mode not in (None, '', 'full', 'partial'):
+            return JsonResponse({'success': False, 'error': 'apply must be full or partial'})
+
+        # Получаем учетные данные администратора кластера из запроса
+        cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
+
+        rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password)
+        result = rac_client.get_rule_list(cluster_uuid, server_uuid)
+        if not result['success']:
+            error_msg = fix_broken_encoding(result['error'])
+            return JsonResponse({'success': False, 'error': error_msg}, json_dumps_params={'ensure_ascii': False})
+
+        try:
+            operations = plan_rule_sync(_parse_rule_list(result['output']), desired)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+        if dry_run:
+            return JsonResponse({
+                'success': True,
+                'dry_run': True,
+                'operations': operations
+            }, json_dumps_params={'ensure_ascii': False})
+
+        # Команды выполняются строго последовательно: позиции зависят от предыдущих операций
+        executed = []
+        for operation in operations:
+            action = operation['action']
+            if action == 'remove':
+                op_result = rac_client.remove_rule(cluster_uuid, server_uuid, operation['rule_uuid'])
+            elif action == 'update':
+                op_result = rac_client.update_rule(cluster_uuid, server_uuid, operation['rule_uuid'],
+                                                   operation['position'], **operation['fields'])
+            else:
+                op_result = rac_client.insert_rule(cluster_uuid, server_uuid, operation['position'],
+                                                   **operation['fields'])
+
+            if not op_result['success']:
+                return JsonResponse({
+                    'success': False,
+                    'error': fix_broken_encoding(op_result['error']),
+                    'failed_operation': operation,
+                    'executed': executed,
+                    'operations': operations
+                }, json_dumps_params={'ensure_ascii': False})
+            executed.append(operation)
+
+        response = {'success': True, 'operations': operations, 'applied': False}
+        # Без изменений применять нечего
+        if apply_mode and operations:
+            apply_result = rac_client.apply_rules(cluster_uuid, server_uuid, full=apply_mode == 'full')
+            if not apply_result['success']:
+                response['success'] = False
+                response['error'] = fix_broken_encoding(apply_result['error'])
+            response['applied'] = apply_result['success']
+
+        logger.info(
+            f"User {request.user.username} synced rules on server {server_uuid}: "
+            f"{len(operations)} operations, applied={response['applied']}"
+        )
+        return JsonResponse(response, json_dumps_params={'ensure_ascii': False})
+
+    except ServerConnection.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Connection not found'}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
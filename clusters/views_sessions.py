@@ -0,0 +1,340 @@
+"""
+Views для массовых операций над сеансами
+"""
+import json
+import logging
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.contrib.auth.decorators import login_required
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+from .models import ServerConnection, SessionEvent
+from .rac_client import RACClient, fix_broken_encoding
+from .parallel import run_parallel
+from .jobs import submit_job, get_job_timeout
+from .session_selectors import parse_selector, match_sessions, summarize_session
+from .session_graph import build_blocking_graph
+from . import session_rates
+from .session_events import record_terminations
+from .views import _get_cluster_admin_from_request, _parse_session_list, _parse_infobase_list, _parse_connection_list
+
+logger = logging.getLogger(__name__)
+
+
+def _resolve_infobase_name(rac_client, cluster_uuid, infobase_name):
+    """Находит UUID информационной базы по имени (без учёта регистра)"""
+    result = rac_client.get_infobase_summary_list(cluster_uuid)
+    if not result['success']:
+        raise ValueError(fix_broken_encoding(result['error']))
+
+    target = infobase_name.strip().lower()
+    for ib in _parse_infobase_list(result['output']):
+        if ib.get('name', '').strip().strip('"').lower() == target:
+            return ib.get('uuid')
+    return None
+
+
+@login_required
+@csrf_exempt
+def terminate_sessions_by_selector(request):
+    """
+    Завершает сеансы, отобранные по селектору, на стороне сервера.
+
+    Селектор сопоставляется со свежим session list, подходящие сеансы
+    завершаются параллельно. При dry_run возвращается только список сеансов,
+    которые были бы завершены.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'})
+
+    try:
+        data = json.loads(request.body)
+        connection_id = data['connection_id']
+        cluster_uuid = data['cluster_uuid']
+        selector_data = dict(data.get('selector') or {})
+        dry_run = bool(data.get('dry_run', False))
+        background = bool(data.get('background'))
+        error_message = data.get('error_message')
+
+        connection = ServerConnection.objects.get(id=connection_id, user_group__members=request.user)
+
+        # Получаем учетные данные администратора кластера из запроса
+        cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
+
+        rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password)
+
+        # Имя информационной базы преобразуем в UUID, чтобы rac сам отфильтровал сеансы
+        infobase_name = selector_data.pop('infobase_name', None)
+        if infobase_name and not selector_data.get('infobase'):
+            infobase_uuid = _resolve_infobase_name(rac_client, cluster_uuid, infobase_name)
+            if not infobase_uuid:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'Информационная база "{infobase_name}" не найдена'
+                }, json_dumps_params={'ensure_ascii': False})
+            selector_data['infobase'] = infobase_uuid
+
+        try:
+            selector = parse_selector(selector_data)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+        result = rac_client.get_session_list(cluster_uuid, selector.get('infobase'))
+        if not result['success']:
+            error_msg = fix_broken_encoding(result['error'])
+            return JsonResponse({'success': False, 'error': error_msg}, json_dumps_params={'ensure_ascii': False})
+
+        matched = match_sessions(_parse_session_list(result['output']), selector)
+        response = {
+            'success': True,
+            'dry_run': dry_run,
+            'matched': len(matched),
+            'sessions': [summarize_session(s) for s in matched],
+        }
+
+        if dry_run or not matched:
+            return JsonResponse(response, json_dumps_params={'ensure_ascii': False})
+
+        # Отбор выполнен в запросе; завершение в фоновой задаче - с таймаутом RAC_JOB_TIMEOUT
+        terminate_client = rac_client
+        if background:
+            terminate_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password,
+                                         timeout=get_job_timeout())
+
+        def run(progress=None):
+            def terminate(session):
+                if progress:
+                    return progress.step(f"Завершение сеанса {session['uuid']}", terminate_client.terminate_session,
+                                         cluster_uuid, session['uuid'], error_message)
+                return terminate_client.terminate_session(cluster_uuid, session['uuid'], error_message)
+
+            outcomes = run_parallel(terminate, matched, data.get('max_workers'))
+            results = []
+            for session, outcome in zip(matched, outcomes):
+                results.append({
+                    'session_uuid': session['uuid'],
+                    'success': outcome['success'],
+                    'error': fix_broken_encoding(outcome['error']) if outcome.get('error') else None
+                })
+            record_terminations(connection.id, cluster_uuid,
+                                [r['session_uuid'] for r in results if r['success']], request.user.username,
+                                {s['uuid']: s['data'] for s in matched})
+            summary = dict(response, results=results)
+            summary['terminated'] = sum(1 for r in results if r['success'])
+            summary['failed'] = len(results) - summary['terminated']
+            logger.info(
+                f"User {request.user.username} terminated {summary['terminated']}/{len(results)} "
+                f"sessions by selector on cluster {cluster_uuid}"
+            )
+            return summary
+
+        if background:
+            job = submit_job(request.user, 'terminate_sessions', f'Завершение сеансов по селектору ({len(matched)})',
+                             run, server_connection=connection, steps_total=len(matched))
+            response['job_id'] = job.id
+            return JsonResponse(response, json_dumps_params={'ensure_ascii': False})
+
+        return JsonResponse(run(), json_dumps_params={'ensure_ascii': False})
+
+    except ServerConnection.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Connection not found'}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+def session_blocking_graph(request, connection_id, cluster_uuid):
+    """
+    Возвращает граф блокировок сеансов кластера по текущему снимку session list:
+    кто кого ждёт, главные блокировщики, самые длинные цепочки и взаимные блокировки.
+    """
+    try:
+        connection = ServerConnection.objects.get(id=connection_id, user_group__members=request.user)
+        infobase_uuid = request.GET.get('infobase')
+        try:
+            top = max(1, min(int(request.GET.get('top', 20)), 200))
+        except ValueError:
+            top = 20
+
+        # Получаем учетные данные администратора кластера из запроса
+        cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
+
+        rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password)
+        result = rac_client.get_session_list(cluster_uuid, infobase_uuid)
+        if not result['success']:
+            error_msg = fix_broken_encoding(result['error'])
+            return JsonResponse({'success': False, 'error': error_msg}, json_dumps_params={'ensure_ascii': False})
+
+        sessions = _parse_session_list(result['output'])
+
+        # Имена баз нужны всегда, connection list - только если есть ожидания блокировок СУБД
+        commands = [lambda: rac_client.get_infobase_summary_list(cluster_uuid)]
+        if any(s['data'].get('blocked-by-dbms', '0') not in ('', '0') for s in sessions):
+            commands.append(lambda: rac_client.get_connection_list(cluster_uuid, infobase_uuid=infobase_uuid))
+        outcomes = run_parallel(lambda command: command(), commands)
+
+        infobase_names = {}
+        if outcomes[0]['success']:
+            infobase_names = {ib['uuid']: ib['name'] for ib in _parse_infobase_list(outcomes[0]['output'])}
+        connections = None
+        if len(outcomes) > 1 and outcomes[1]['success']:
+            connections = _parse_connection_list(outcomes[1]['output'])
+
+        graph = build_blocking_graph(sessions, connections, infobase_names, top=top)
+        return JsonResponse(dict(graph, success=True), json_dumps_params={'ensure_ascii': False})
+
+    except ServerConnection.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Connection not found'}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+def hot_sessions(request, connection_id, cluster_uuid):
+    """
+    Возвращает сеансы, сильнее всего нагружающие кластер за последний интервал.
+
+    Скорость считается по разнице с предыдущим снимком session list этого кластера,
+    поэтому первый запрос только запоминает снимок (ready = false).
+    Метрики: cpu, dbms, duration, traffic, dbms_traffic, calls.
+    """
+    try:
+        connection = ServerConnection.objects.get(id=connection_id, user_group__members=request.user)
+        metric = request.GET.get('metric', 'cpu')
+        if metric not in session_rates.METRICS:
+            return JsonResponse({
+                'success': False,
+                'error': f"metric must be one of: {', '.join(session_rates.METRICS)}"
+            })
+        try:
+            top = max(1, min(int(request.GET.get('top', 20)), 500))
+        except ValueError:
+            top = 20
+
+        # Получаем учетные данные администратора кластера из запроса
+        cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
+
+        rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password)
+        session_result, infobases_result = run_parallel(lambda command: command(), [
+            lambda: rac_client.get_session_list(cluster_uuid),
+            lambda: rac_client.get_infobase_summary_list(cluster_uuid),
+        ])
+        if not session_result['success']:
+            error_msg = fix_broken_encoding(session_result['error'])
+            return JsonResponse({'success': False, 'error': error_msg}, json_dumps_params={'ensure_ascii': False})
+
+        sessions = _parse_session_list(session_result['output'])
+        current, previous = session_rates.update_snapshot((connection.id, cluster_uuid), sessions)
+        response = {
+            'success': True,
+            'metric': metric,
+            'sessions_total': len(sessions),
+            'ready': previous is not None,
+            'interval': round(current.taken_at - previous.taken_at, 3) if previous else None,
+            'sessions': [],
+        }
+        if previous is None:
+            return JsonResponse(response, json_dumps_params={'ensure_ascii': False})
+
+        infobase_names = {}
+        if infobases_result['success']:
+            infobase_names = {ib['uuid']: ib['name'] for ib in _parse_infobase_list(infobases_result['output'])}
+
+        for position, delta, rate, rates in session_rates.top_sessions(current, previous, metric, top):
+            session = sessions[position]
+            item = summarize_session(session)
+            item['infobase_name'] = infobase_names.get(item['infobase'], item['infobase'])
+            item.update(delta=delta, rate=round(rate, 3), rates={
+                name: (round(value, 3) if value is not None else None) for name, value in rates.items()
+            })
+            response['sessions'].append(item)
+
+        return JsonResponse(response, json_dumps_params={'ensure_ascii': False})
+
+    except ServerConnection.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Connection not found'}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+
+def _parse_event_time(value, name):
+    # '+' в смещении часового пояса приходит из строки запроса как пробел
+    moment = parse_datetime(value.strip().replace(' ', '+')) if value else None
+    if value and moment is None:
+        raise ValueError(f'{name}: ожидается дата и время в формате ISO 8601')
+    if moment is not None and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+@login_required
+def session_events(request):
+    """
+    Журнал событий сеансов: начало, окончание, завершение администратором.
+
+    Параметры: connection_id, cluster_uuid, from, to (ISO 8601), user, infobase (UUID),
+    session (UUID), kind (start|end|terminate), limit, cursor (из next_cursor предыдущей страницы).
+    События возвращаются от новых к старым.
+    """
+    try:
+        connection_ids = list(ServerConnection.objects.filter(
+            user_group__members=request.user).values_list('id', flat=True))
+        connection_id = request.GET.get('connection_id')
+        if connection_id:
+            if not connection_id.isdigit() or int(connection_id) not in connection_ids:
+                return JsonResponse({'success': False, 'error': 'Connection not found'}, json_dumps_params={'ensure_ascii': False})
+            events = SessionEvent.objects.filter(connection_id=int(connection_id))
+        else:
+            events = SessionEvent.objects.filter(connection_id__in=connection_ids)
+
+        for param, field in (('cluster_uuid', 'cluster_uuid'), ('user', 'user_name'),
+                             ('infobase', 'infobase'), ('session', 'session_uuid')):
+            value = request.GET.get(param)
+            if value:
+                events = events.filter(**{field: value})
+
+        kind = request.GET.get('kind')
+        if kind:
+            codes = {name: code for code, name in SessionEvent.KIND_NAMES.items()}
+            if kind not in codes:
+                return JsonResponse({'success': False, 'error': 'kind must be one of: start, end, terminate'})
+            events = events.filter(kind=codes[kind])
+
+        date_from = _parse_event_time(request.GET.get('from'), 'from')
+        date_to = _parse_event_time(request.GET.get('to'), 'to')
+        if date_from:
+            events = events.filter(occurred_at__gte=date_from)
+        if date_to:
+            events = events.filter(occurred_at__lt=date_to)
+
+        # Постраничный вывод по ключу (occurred_at, id) - без OFFSET на больших журналах
+        cursor = request.GET.get('cursor')
+        if cursor:
+            cursor_time, _, cursor_id = cursor.rpartition('_')
+            cursor_time = _parse_event_time(cursor_time, 'cursor')
+            if cursor_time is None or not cursor_id.isdigit():
+                raise ValueError('cursor: некорректное значение')
+            events = events.filter(Q(occurred_at__lt=cursor_time) | Q(occurred_at=cursor_time, id__lt=int(cursor_id)))
+
+        try:
+            limit = max(1, min(int(request.GET.get('limit', 200)), 1000))
+        except ValueError:
+            limit = 200
+
+        page = list(events.order_by('-occurred_at', '-id')[:limit + 1])
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = f"{page[-1].occurred_at.isoformat()}_{page[-1].id}"
+
+        return JsonResponse({
+            'success': True,
+            'events': [event.to_dict() for event in page],
+            'next_cursor': next_cursor,
+        }, json_dumps_params={'ensure_ascii': False})
+
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
@@ -0,0 +1,83 @@
+"""
+Views для топологии кластера: серверы, процессы, менеджеры, сеансы и базы одним запросом
+"""
+import logging
+import time
+from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from .models import ServerConnection
+from .rac_client import RACClient, fix_broken_encoding
+from .parallel import run_parallel
+from .cluster_topology import build_topology
+from . import rac_cache
+from .views import (
+    _get_cluster_admin_from_request, _parse_server_list, _parse_process_list, _parse_manager_list,
+    _parse_session_list, _parse_infobase_list
+)
+
+logger = logging.getLogger(__name__)
+
+
+@login_required
+def cluster_topology(request, connection_id, cluster_uuid):
+    """
+    Возвращает топологию кластера: сервер -> менеджеры, процессы -> сеансы; база -> сеансы.
+
+    Пять команд list выполняются параллельно одним клиентом rac, результаты
+    соединяются по UUID и имени компьютера. Ошибка отдельного списка не прерывает
+    ответ - она возвращается в errors, а соответствующий раздел остаётся пустым.
+    Параметр sessions=false - вместо сведений о сеансах только их число.
+    """
+    try:
+        connection = ServerConnection.objects.get(id=connection_id, user_group__members=request.user)
+        include_sessions = request.GET.get('sessions', 'true').lower() != 'false'
+
+        # Получаем учетные данные администратора кластера из запроса
+        cluster_admin, cluster_password = _get_cluster_admin_from_request(request)
+
+        rac_client = RACClient(connection, cluster_admin=cluster_admin, cluster_password=cluster_password)
+        commands = {
+            'servers': (rac_client.get_server_list, _parse_server_list),
+            'processes': (rac_client.get_process_list, _parse_process_list),
+            'managers': (rac_client.get_manager_list, _parse_manager_list),
+            'sessions': (rac_client.get_session_list, _parse_session_list),
+            'infobases': (rac_client.get_infobase_summary_list, _parse_infobase_list),
+        }
+        started = time.monotonic()
+        outcomes = run_parallel(lambda command: command[0](cluster_uuid), list(commands.values()))
+
+        lists = {}
+        errors = {}
+        for (name, (_, parse)), outcome in zip(commands.items(), outcomes):
+            if outcome['success']:
+                lists[name] = parse(outcome['output'])
+            else:
+                lists[name] = None
+                errors[name] = fix_broken_encoding(outcome.get('error'))
+
+        if len(errors) == len(commands):
+            return JsonResponse({'success': False, 'error': errors['servers']}, json_dumps_params={'ensure_ascii': False})
+
+        # Индексируем сеансы и процессы по UUID - из индекса отвечают get_session_info и get_process_info
+        for name, kind in (('sessions', 'session'), ('processes', 'process')):
+            if lists[name] is not None:
+                rac_cache.set_list_entries(kind, connection.id, cluster_uuid, lists[name],
+                                       cluster_admin=cluster_admin, cluster_password=cluster_password)
+
+        topology = build_topology(
+            lists['servers'], lists['processes'], lists['managers'], lists['sessions'], lists['infobases'],
+            include_sessions=include_sessions
+        )
+        return JsonResponse(dict(
+            topology,
+            success=True,
+            cluster_uuid=cluster_uuid,
+            errors=errors,
+            duration=round(time.monotonic() - started, 3)
+        ), json_dumps_params={'ensure_ascii': False})
+
+    except ServerConnection.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Connection not found'}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        logger.error(f"Failed to build topology of cluster {cluster_uuid}: {e}")
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
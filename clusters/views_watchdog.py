@@ -0,0 +1,192 @@
+"""
+Views для правил контроля рабочих процессов и журнала их действий
+"""
+import json
+import logging
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.contrib.auth.decorators import login_required
+from .models import ServerConnection, ProcessWatchdogPolicy, ProcessWatchdogAction
+from .process_watchdog import run_policy
+
+logger = logging.getLogger(__name__)
+
+# Поля правила, которые можно задать через API
+INTEGER_FIELDS = (
+    'memory_limit_mb', 'memory_release_mb', 'min_performance', 'performance_release',
+    'consecutive_checks', 'max_actions_per_hour'
+)
+BOOLEAN_FIELDS = ('enabled', 'dry_run')
+
+
+def _user_policies(user):
+    return ProcessWatchdogPolicy.objects.filter(connection__user_group__members=user).select_related('connection')
+
+
+def _apply_fields(policy, data):
+    """
+    Переносит значения из запроса в правило.
+
+    Raises:
+        ValueError: Если значения некорректны
+    """
+    for field in INTEGER_FIELDS:
+        if field in data:
+            value = data[field]
+            if value in (None, ''):
+                if field in ('consecutive_checks', 'max_actions_per_hour'):
+                    raise ValueError(f'Поле {field} обязательно')
+                setattr(policy, field, None)
+                continue
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f'Поле {field} должно быть целым числом')
+            if value < 0:
+                raise ValueError(f'Поле {field} не может быть отрицательным')
+            setattr(policy, field, value)
+    for field in BOOLEAN_FIELDS:
+        if field in data:
+            setattr(policy, field, bool(data[field]))
+    if 'cluster_name' in data:
+        policy.cluster_name = (data['cluster_name'] or '').strip()
+    # Пустые учётные данные - использовать заданные в подключении
+    for field in ('cluster_admin', 'cluster_password'):
+        if field in data:
+            setattr(policy, field, (data[field] or '').strip() or None)
+
+    if not policy.memory_limit_mb and not policy.min_performance:
+        raise ValueError('Укажите порог памяти или минимальную доступную производительность')
+    if policy.consecutive_checks < 1:
+        raise ValueError('Число проверок подряд должно быть не меньше 1')
+    if policy.memory_limit_mb and policy.memory_release_mb and policy.memory_release_mb > policy.memory_limit_mb:
+        raise ValueError('Порог сброса памяти не может превышать порог срабатывания')
+    if policy.min_performance and policy.performance_release and policy.performance_release < policy.min_performance:
+        raise ValueError('Порог сброса производительности не может быть ниже минимальной производительности')
+
+
+@login_required
+@csrf_exempt
+def watchdog_policies(request):
+    """
+    GET - список правил контроля процессов пользователя (?connection_id= для отбора).
+    POST - создание правила: connection_id, cluster_uuid и пороги.
+    """
+    if request.method == 'GET':
+        policies = _user_policies(request.user)
+        connection_id = request.GET.get('connection_id')
+        if connection_id:
+            policies = policies.filter(connection_id=connection_id)
+        return JsonResponse({
+            'success': True,
+            'policies': [policy.to_dict() for policy in policies]
+        }, json_dumps_params={'ensure_ascii': False})
+
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only GET and POST allowed'}, json_dumps_params={'ensure_ascii': False})
+
+    try:
+        data = json.loads(request.body)
+        connection = ServerConnection.objects.get(id=data.get('connection_id'), user_group__members=request.user)
+        cluster_uuid = (data.get('cluster_uuid') or '').strip()
+        if not cluster_uuid:
+            return JsonResponse({'success': False, 'error': 'Cluster UUID required'}, json_dumps_params={'ensure_ascii': False})
+        if ProcessWatchdogPolicy.objects.filter(connection=connection, cluster_uuid=cluster_uuid).exists():
+            return JsonResponse({'success': False, 'error': 'Правило для этого кластера уже существует'}, json_dumps_params={'ensure_ascii': False})
+
+        policy = ProcessWatchdogPolicy(connection=connection, cluster_uuid=cluster_uuid, created_by=request.user)
+        _apply_fields(policy, data)
+        policy.save()
+        return JsonResponse({'success': True, 'policy': policy.to_dict()}, json_dumps_params={'ensure_ascii': False})
+
+    except ServerConnection.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Connection not found'}, json_dumps_params={'ensure_ascii': False})
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        logger.error(f"Failed to create watchdog policy: {e}")
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+@csrf_exempt
+def update_watchdog_policy(request, policy_id):
+    """Изменяет пороги и режим правила; изменение порогов сбрасывает накопленное состояние"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'}, json_dumps_params={'ensure_ascii': False})
+
+    try:
+        policy = _user_policies(request.user).get(id=policy_id)
+        data = json.loads(request.body)
+        _apply_fields(policy, data)
+        if any(field in data for field in INTEGER_FIELDS):
+            policy.state = {}
+        policy.save()
+        return JsonResponse({'success': True, 'policy': policy.to_dict()}, json_dumps_params={'ensure_ascii': False})
+
+    except ProcessWatchdogPolicy.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Policy not found'}, json_dumps_params={'ensure_ascii': False})
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        logger.error(f"Failed to update watchdog policy {policy_id}: {e}")
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+@csrf_exempt
+def delete_watchdog_policy(request, policy_id):
+    """Удаляет правило; записи журнала сохраняются"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'}, json_dumps_params={'ensure_ascii': False})
+
+    deleted, _ = _user_policies(request.user).filter(id=policy_id).delete()
+    if not deleted:
+        return JsonResponse({'success': False, 'error': 'Policy not found'}, json_dumps_params={'ensure_ascii': False})
+    return JsonResponse({'success': True}, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+@csrf_exempt
+def run_watchdog_policy(request, policy_id):
+    """
+    Выполняет проверку правила сейчас, не дожидаясь планировщика.
+
+    Тело запроса (необязательно): {"dry_run": true} - только записать в журнал,
+    что было бы выключено, независимо от режима правила.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'}, json_dumps_params={'ensure_ascii': False})
+
+    try:
+        policy = _user_policies(request.user).get(id=policy_id)
+        data = json.loads(request.body) if request.body else {}
+        dry_run = data.get('dry_run')
+        result = run_policy(policy, dry_run=None if dry_run is None else bool(dry_run))
+        return JsonResponse(result, json_dumps_params={'ensure_ascii': False})
+
+    except ProcessWatchdogPolicy.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Policy not found'}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        logger.error(f"Failed to run watchdog policy {policy_id}: {e}")
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+def watchdog_actions(request):
+    """Журнал действий контроля процессов (?policy_id=, ?connection_id=, ?action=, ?limit=)"""
+    actions = ProcessWatchdogAction.objects.filter(connection__user_group__members=request.user)
+    for param, field in (('policy_id', 'policy_id'), ('connection_id', 'connection_id'), ('action', 'action')):
+        value = request.GET.get(param)
+        if value:
+            actions = actions.filter(**{field: value})
+
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 100)), 1000))
+    except ValueError:
+        limit = 100
+
+    return JsonResponse({
+        'success': True,
+        'actions': [action.to_dict() for action in actions[:limit]]
+    }, json_dumps_params={'ensure_ascii': False})
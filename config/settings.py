@@ -131,6 +131,16 @@ DATABASES = {
 #     }
 # }
 
+# Кэш (используется для флага смены пароля и результатов RAC)
+# По умолчанию - память процесса (подходит для runserver в одном процессе).
+# При запуске в нескольких процессах укажите общий backend (например, Redis или Memcached).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'landysh-default',
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -154,6 +164,34 @@ LOGOUT_REDIRECT_URL = '/accounts/login/'
 
 # Настройки проекта
 RAC_PATH = os.getenv('RAC_PATH', '/opt/1cv8/x86_64/8.3.27.1860/rac')
+# Максимальное число одновременно выполняемых команд rac (массовые операции)
+RAC_MAX_PARALLEL = int(os.getenv('RAC_MAX_PARALLEL', '8'))
+# Максимальное число одновременно выполняемых команд rac к одному серверу RAS (host:port) в процессе
+RAC_MAX_PARALLEL_PER_CONNECTION = int(os.getenv('RAC_MAX_PARALLEL_PER_CONNECTION', '4'))
+# Фоновые задачи: число одновременно выполняемых задач и таймаут команды rac внутри задачи (сек)
+RAC_JOB_WORKERS = int(os.getenv('RAC_JOB_WORKERS', '4'))
+RAC_JOB_TIMEOUT = int(os.getenv('RAC_JOB_TIMEOUT', '900'))
+# Таймауты команд rac по классам (сек): чтение (list/info), изменение, создание и удаление баз
+RAC_TIMEOUT_READ = int(os.getenv('RAC_TIMEOUT_READ', '15'))
+RAC_TIMEOUT_WRITE = int(os.getenv('RAC_TIMEOUT_WRITE', '30'))
+RAC_TIMEOUT_LONG = int(os.getenv('RAC_TIMEOUT_LONG', '300'))
+# Автоматический выключатель: число ошибок соединения подряд и пауза перед пробной командой (сек)
+RAC_BREAKER_FAILURES = int(os.getenv('RAC_BREAKER_FAILURES', '3'))
+RAC_BREAKER_COOLDOWN = int(os.getenv('RAC_BREAKER_COOLDOWN', '30'))
+# Проверка доступности RAS: таймаут TCP-подключения (сек), время кэширования результата (сек), число параллельных проверок
+RAC_HEALTH_CONNECT_TIMEOUT = float(os.getenv('RAC_HEALTH_CONNECT_TIMEOUT', '2'))
+RAC_HEALTH_TTL = int(os.getenv('RAC_HEALTH_TTL', '20'))
+RAC_HEALTH_PARALLEL = int(os.getenv('RAC_HEALTH_PARALLEL', '32'))
+# Активные сеансы: минимальный интервал между снимками для расчёта скоростей и время хранения снимка (сек)
+RAC_HOT_SESSIONS_MIN_INTERVAL = int(os.getenv('RAC_HOT_SESSIONS_MIN_INTERVAL', '5'))
+RAC_HOT_SESSIONS_TTL = int(os.getenv('RAC_HOT_SESSIONS_TTL', '3600'))
+# Журнал сеансов: срок хранения событий (дней)
+RAC_SESSION_EVENTS_RETENTION_DAYS = int(os.getenv('RAC_SESSION_EVENTS_RETENTION_DAYS', '90'))
+# Сводка использования лицензий: время кэширования результата (сек)
+RAC_LICENSE_USAGE_TTL = int(os.getenv('RAC_LICENSE_USAGE_TTL', '30'))
+# Планировщик периодических задач (manage.py scheduler): число одновременно выполняемых задач и период опроса таблицы задач (сек)
+SCHEDULER_WORKERS = int(os.getenv('SCHEDULER_WORKERS', '4'))
+SCHEDULER_POLL_INTERVAL = float(os.getenv('SCHEDULER_POLL_INTERVAL', '1'))
 DEFAULT_ADMIN_USERNAME = os.getenv('DEFAULT_ADMIN_USERNAME', 'Администратор')
 DEFAULT_ADMIN_PASSWORD = os.getenv('DEFAULT_ADMIN_PASSWORD', '123')
 
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
-from .models import Profile
+from .models import Profile, ScheduledTask
 
 class ProfileInline(admin.StackedInline):
     model = Profile
@@ -18,4 +18,17 @@ class CustomUserAdmin(UserAdmin):
     get_role.short_description = 'Роль'
 
 admin.site.unregister(User)
-admin.site.register(User, CustomUserAdmin)
\ No newline at end of file
+admin.site.register(User, CustomUserAdmin)
+
+
+@admin.register(ScheduledTask)
+class ScheduledTaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'task', 'enabled', 'schedule_display', 'next_run_at', 'last_started_at',
+                    'last_status', 'last_duration', 'run_count', 'failure_count')
+    list_filter = ('enabled', 'task', 'last_status')
+    readonly_fields = ('next_run_at', 'running_until', 'last_started_at', 'last_finished_at', 'last_status',
+                       'last_duration', 'last_result', 'last_error', 'run_count', 'failure_count')
+
+    def schedule_display(self, obj):
+        return obj.schedule_display()
+    schedule_display.short_description = 'Расписание'
@@ -0,0 +1,305 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment, CaptureQueriesContext
+from django.contrib.auth.models import User
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import json
+import math
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FAKE_RAC_PATH = Path(__file__).resolve().parents[3] / 'clusters' / 'fake_rac.py'
+
+DEFAULT_ENDPOINTS = [
+    'server_connections', 'get_clusters', 'get_sessions', 'get_session_info', 'get_processes',
+    'get_process_info', 'get_infobases', 'get_infobase_info', 'get_servers', 'get_rules',
+    'terminate_sessions', 'connections_health',
+]
+
+
+def _percentile(sorted_values, percent):
+    """Процентиль по методу ближайшего ранга"""
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def _peak_rss_kb(who):
+    """
+    Пиковый объём памяти (КБ) процесса или дочерних процессов rac за всё время
+    работы процесса (ru_maxrss не сбрасывается, поэтому не подходит для отдельного endpoint)
+    """
+    if resource is None:
+        return None
+    value = resource.getrusage(who).ru_maxrss
+    # В macOS ru_maxrss в байтах, в Linux - в килобайтах
+    return value // 1024 if sys.platform == 'darwin' else value
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный тест API кластеров на имитаторе rac (задержки, пропускная способность, запросы к БД, память)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoints', default=','.join(DEFAULT_ENDPOINTS),
+                            help='Проверяемые endpoints через запятую')
+        parser.add_argument('--requests', type=int, default=50, help='Число запросов к каждому endpoint')
+        parser.add_argument('--concurrency', type=int, default=4, help='Число одновременных клиентов')
+        parser.add_argument('--warmup', type=int, default=2, help='Число прогревочных запросов (не учитываются)')
+        parser.add_argument('--sessions', type=int, default=2000, help='Число сеансов в имитаторе')
+        parser.add_argument('--processes', type=int, default=8, help='Число рабочих процессов в имитаторе')
+        parser.add_argument('--infobases', type=int, default=50, help='Число информационных баз в имитаторе')
+        parser.add_argument('--latency-ms', type=float, default=20, help='Задержка каждой команды rac, мс')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Случайная добавка к задержке rac, мс')
+        parser.add_argument('--rac-path', default=str(FAKE_RAC_PATH), help='Путь к имитатору rac')
+        parser.add_argument('--output', help='Файл для результатов (JSON), по умолчанию benchmark-<время>.json')
+        parser.add_argument('--compare', help='Файл результатов предыдущего запуска для сравнения')
+
+    def handle(self, *args, **options):
+        endpoints = [e.strip() for e in options['endpoints'].split(',') if e.strip()]
+        unknown = [e for e in endpoints if e not in DEFAULT_ENDPOINTS]
+        if unknown:
+            raise CommandError(f'Неизвестные endpoints: {", ".join(unknown)}. Доступны: {", ".join(DEFAULT_ENDPOINTS)}')
+        if not os.access(options['rac_path'], os.X_OK):
+            raise CommandError(f'Имитатор rac не найден или не исполняемый: {options["rac_path"]}')
+
+        # Параметры имитатора передаются через окружение процессу rac
+        os.environ.update({
+            'FAKE_RAC_SESSIONS': str(options['sessions']),
+            'FAKE_RAC_PROCESSES': str(options['processes']),
+            'FAKE_RAC_INFOBASES': str(options['infobases']),
+            'FAKE_RAC_LATENCY_MS': str(options['latency_ms']),
+            'FAKE_RAC_JITTER_MS': str(options['jitter_ms']),
+        })
+
+        # Отдельная тестовая БД: рабочие данные не затрагиваются
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            fixture = self._create_fixture(options['rac_path'])
+            started_at = datetime.now()
+            results = {}
+            for name in endpoints:
+                results[name] = self._run_endpoint(name, fixture, options)
+                self._print_result(name, results[name])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'params': {key: options[key] for key in (
+                'requests', 'concurrency', 'warmup', 'sessions', 'processes', 'infobases', 'latency_ms', 'jitter_ms'
+            )},
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'rac_max_parallel': settings.RAC_MAX_PARALLEL,
+            },
+            # Накопленные пики за весь запуск, а не по отдельным endpoints
+            'memory': {
+                'process_max_rss_kb': _peak_rss_kb(resource.RUSAGE_SELF) if resource else None,
+                'rac_max_rss_kb': _peak_rss_kb(resource.RUSAGE_CHILDREN) if resource else None,
+            },
+            'results': results,
+        }
+        output = options['output'] or f'benchmark-{started_at:%Y%m%d-%H%M%S}.json'
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Результаты сохранены: {output}'))
+
+        if options['compare']:
+            self._compare(options['compare'], results)
+
+    def _create_fixture(self, rac_path):
+        """Создаёт пользователя и подключение, получает UUID объектов из имитатора"""
+        from core.models import Profile, SystemSettings
+        from users.models import UserGroup
+        from clusters.models import ServerConnection
+        from clusters.rac_client import RACClient
+        from clusters.views import (
+            _parse_cluster_list, _parse_session_list, _parse_process_list,
+            _parse_infobase_list, _parse_server_list,
+        )
+
+        SystemSettings.set_setting('rac_path', rac_path)
+        user = User.objects.create_user('benchmark', password='benchmark')
+        Profile.objects.create(user=user, role='admin')
+        group = UserGroup.objects.create(name='benchmark', created_by=user)
+        group.members.add(user)
+        # Порт закрыт - проверка доступности быстро получает отказ в соединении
+        server_connection = ServerConnection.objects.create(
+            user_group=group, display_name='benchmark', server_host='127.0.0.1', ras_port=1
+        )
+
+        rac_client = RACClient(server_connection)
+
+        def fetch(result, parser):
+            if not result['success']:
+                raise CommandError(f'Имитатор rac вернул ошибку: {result["error"]}')
+            return parser(result['output'])
+
+        cluster_uuid = fetch(rac_client.get_cluster_list(), _parse_cluster_list)[0]['uuid']
+        fixture = {
+            'connection_id': server_connection.id,
+            'cluster_uuid': cluster_uuid,
+            'server_uuid': fetch(rac_client.get_server_list(cluster_uuid), _parse_server_list)[0]['uuid'],
+            'sessions': [s['uuid'] for s in fetch(rac_client.get_session_list(cluster_uuid), _parse_session_list)],
+            'processes': [p['uuid'] for p in fetch(rac_client.get_process_list(cluster_uuid), _parse_process_list)],
+            'infobases': [i['uuid'] for i in fetch(rac_client.get_infobase_summary_list(cluster_uuid), _parse_infobase_list)],
+        }
+
+        client = Client()
+        client.force_login(user)
+        fixture['cookies'] = client.cookies
+        return fixture
+
+    def _build_request(self, name, fixture, i):
+        """Возвращает (method, url, body) для i-го запроса к endpoint"""
+        conn = fixture['connection_id']
+        cluster = fixture['cluster_uuid']
+        pick = lambda items: items[i % len(items)]
+        if name == 'server_connections':
+            return 'get', '/api/clusters/connections/', None
+        if name == 'get_clusters':
+            return 'get', f'/api/clusters/clusters/{conn}/', None
+        if name == 'get_sessions':
+            return 'get', f'/api/clusters/sessions/{conn}/?cluster={cluster}', None
+        if name == 'get_session_info':
+            return 'get', f'/api/clusters/sessions/{conn}/{cluster}/info/?session={pick(fixture["sessions"])}', None
+        if name == 'get_processes':
+            return 'get', f'/api/clusters/processes/{conn}/?cluster={cluster}', None
+        if name == 'get_process_info':
+            return 'get', f'/api/clusters/processes/{conn}/{cluster}/info/?process={pick(fixture["processes"])}', None
+        if name == 'get_infobases':
+            return 'get', f'/api/clusters/infobases/{conn}/?cluster={cluster}', None
+        if name == 'get_infobase_info':
+            return 'get', f'/api/clusters/infobases/{conn}/{cluster}/info/?infobase={pick(fixture["infobases"])}', None
+        if name == 'get_servers':
+            return 'get', f'/api/clusters/servers/{conn}/?cluster={cluster}', None
+        if name == 'get_rules':
+            return 'get', f'/api/clusters/rules/{conn}/{cluster}/{fixture["server_uuid"]}/', None
+        if name == 'terminate_sessions':
+            sessions = fixture['sessions']
+            start = i * 5 % len(sessions)
+            return 'post', '/api/clusters/sessions/terminate/', {
+                'connection_id': conn,
+                'cluster_uuid': cluster,
+                'session_uuids': (sessions[start:] + sessions[:start])[:5],
+            }
+        if name == 'connections_health':
+            return 'get', '/api/clusters/connections/health/?refresh=true', None
+        raise CommandError(f'Неизвестный endpoint: {name}')
+
+    def _run_endpoint(self, name, fixture, options):
+        """Выполняет запросы к endpoint с заданной параллельностью и собирает статистику"""
+        local = threading.local()
+
+        def get_client():
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.client.cookies = fixture['cookies']
+            return local.client
+
+        def do_request(i):
+            method, url, body = self._build_request(name, fixture, i)
+            client = get_client()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                if method == 'post':
+                    response = client.post(url, data=json.dumps(body), content_type='application/json')
+                else:
+                    response = client.get(url)
+                elapsed = time.perf_counter() - started
+            ok = response.status_code == 200
+            if ok:
+                try:
+                    ok = response.json().get('success', True) is not False
+                except ValueError:
+                    ok = False
+            return elapsed, len(queries), ok
+
+        # Кэш очищается, чтобы результат endpoint не зависел от предыдущих
+        cache.clear()
+        for i in range(options['warmup']):
+            do_request(i)
+
+        count = options['requests']
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, options['concurrency'])) as executor:
+            samples = list(executor.map(do_request, range(count)))
+        wall = time.perf_counter() - started
+
+        # Память - отдельным проходом: tracemalloc замедляет выделение памяти и исказил бы задержки.
+        # Пик считается от нуля для каждого endpoint, поэтому не зависит от предыдущих
+        traced = max(1, min(options['concurrency'], count))
+        tracemalloc.start()
+        try:
+            with ThreadPoolExecutor(max_workers=traced) as executor:
+                list(executor.map(do_request, range(traced)))
+            peak_alloc = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        latencies = sorted(s[0] * 1000 for s in samples)
+        queries = [s[1] for s in samples]
+        return {
+            'requests': count,
+            'errors': sum(1 for s in samples if not s[2]),
+            'p50_ms': round(_percentile(latencies, 50), 2),
+            'p95_ms': round(_percentile(latencies, 95), 2),
+            'p99_ms': round(_percentile(latencies, 99), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'max_ms': round(latencies[-1], 2),
+            'throughput_rps': round(count / wall, 2) if wall else None,
+            'db_queries_avg': round(sum(queries) / len(queries), 2),
+            'db_queries_max': max(queries),
+            # Пик памяти Python при concurrency одновременных запросах к этому endpoint
+            'peak_alloc_kb': peak_alloc // 1024,
+        }
+
+    def _print_result(self, name, result):
+        line = (
+            f'{name:<20} p50={result["p50_ms"]:>8} ms  p95={result["p95_ms"]:>8} ms  p99={result["p99_ms"]:>8} ms  '
+            f'{result["throughput_rps"]:>7} req/s  queries={result["db_queries_avg"]:>5}  '
+            f'alloc={result["peak_alloc_kb"]} KB'
+        )
+        if result['errors']:
+            self.stdout.write(self.style.WARNING(f'{line}  errors={result["errors"]}'))
+        else:
+            self.stdout.write(line)
+
+    def _compare(self, path, results):
+        """Выводит изменение показателей относительно предыдущего запуска"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                previous = json.load(f)['results']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Не удалось прочитать {path}: {e}')
+
+        self.stdout.write(f'\nСравнение с {path}:')
+        for name, result in results.items():
+            before = previous.get(name)
+            if not before:
+                continue
+            changes = []
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'db_queries_avg', 'peak_alloc_kb'):
+                old, new = before.get(key), result.get(key)
+                if old and new is not None:
+                    changes.append(f'{key}: {old} -> {new} ({(new - old) / old * 100:+.1f}%)')
+            self.stdout.write(f'  {name:<20} ' + '  '.join(changes))
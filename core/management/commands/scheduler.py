@@ -0,0 +1,92 @@
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.models import ScheduledTask
+from core import scheduler
+
+
+class Command(BaseCommand):
+    help = 'Запускает планировщик периодических задач (таблица ScheduledTask)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить задачи, время которых наступило, и завершиться (для запуска из cron)')
+        parser.add_argument('--run', metavar='NAME', help='Выполнить задачу с указанным названием немедленно')
+        parser.add_argument('--list', action='store_true', help='Показать задачи и результаты последних запусков')
+        parser.add_argument('--install-defaults', action='store_true',
+                            help='Создать задачи для всех известных типов, которых ещё нет в таблице')
+
+    def handle(self, *args, **options):
+        if options['install_defaults']:
+            for task in scheduler.install_defaults():
+                self.stdout.write(self.style.SUCCESS(f'Создана задача: {task.name} ({task.schedule_display()})'))
+            return
+
+        if options['list']:
+            self._print_tasks()
+            return
+
+        if options['run']:
+            try:
+                task = ScheduledTask.objects.get(name=options['run'])
+            except ScheduledTask.DoesNotExist:
+                raise CommandError(f"Задача {options['run']} не найдена")
+            result = scheduler.run_now(task)
+            if result is None:
+                raise CommandError(f'Задача {task.name} уже выполняется')
+            task.refresh_from_db()
+            style = self.style.SUCCESS if result else self.style.ERROR
+            self.stdout.write(style(f'{task.name}: {task.get_last_status_display()} за {task.last_duration} сек'))
+            if task.last_error:
+                self.stdout.write(task.last_error)
+            return
+
+        if options['once']:
+            started = scheduler.run_due()
+            self.stdout.write(f'Выполнено задач: {len(started)}')
+            return
+
+        self._serve()
+
+    def _serve(self):
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            self.stdout.write('Остановка планировщика: ожидание выполняющихся задач')
+            stop.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Планировщик запущен: {ScheduledTask.objects.filter(enabled=True).count()} задач, '
+            f'{settings.SCHEDULER_WORKERS} потоков'
+        ))
+        with ThreadPoolExecutor(max_workers=settings.SCHEDULER_WORKERS, thread_name_prefix='scheduler') as executor:
+            while not stop.is_set():
+                try:
+                    for task in scheduler.run_due(submit=executor.submit):
+                        self.stdout.write(f'{timezone.localtime():%H:%M:%S} запуск: {task.name}')
+                except Exception as e:
+                    # Ошибка БД не должна останавливать планировщик
+                    self.stderr.write(f'Ошибка планировщика: {e}')
+                stop.wait(settings.SCHEDULER_POLL_INTERVAL)
+
+    def _print_tasks(self):
+        tasks = ScheduledTask.objects.all()
+        if not tasks:
+            self.stdout.write('Задач нет (используйте --install-defaults)')
+            return
+        for task in tasks:
+            next_run = timezone.localtime(task.next_run_at).strftime('%d.%m %H:%M:%S') if task.next_run_at else '-'
+            last_run = timezone.localtime(task.last_started_at).strftime('%d.%m %H:%M:%S') if task.last_started_at else '-'
+            self.stdout.write(
+                f"{'+' if task.enabled else '-'} {task.name:<40} {task.schedule_display():<24} "
+                f"след.: {next_run:<15} посл.: {last_run:<15} {task.get_last_status_display() or '-':<12} "
+                f"запусков: {task.run_count}, ошибок: {task.failure_count}"
+            )
+            if task.last_error:
+                self.stdout.write(f'    {task.last_error}')
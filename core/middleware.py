@@ -8,6 +8,9 @@ class ForcePasswordChangeMiddleware:
     Middleware для проверки требования смены пароля.
     Если у пользователя установлен флаг force_password_change,
     перенаправляет на страницу обязательной смены пароля.
+    
+    Флаг читается через Profile.needs_password_change (кэш), поэтому
+    в установившемся режиме middleware не выполняет запросов к БД.
     """
     
     EXEMPT_URLS = [
@@ -31,12 +34,8 @@ class ForcePasswordChangeMiddleware:
                 return self.get_response(request)
         
         # Проверяем флаг force_password_change
-        try:
-            profile = Profile.objects.get(user=request.user)
-            if profile.force_password_change:
-                return redirect('force_password_change')
-        except Profile.DoesNotExist:
-            pass
+        if Profile.needs_password_change(request.user.id):
+            return redirect('force_password_change')
         
         return self.get_response(request)
 
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_profile_subject_to_password_policy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Название')),
+                ('task', models.CharField(max_length=100, verbose_name='Задача')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Параметры')),
+                ('enabled', models.BooleanField(default=True, verbose_name='Включена')),
+                ('schedule_type', models.CharField(choices=[('interval', 'Интервал'), ('cron', 'Расписание cron')], default='interval', max_length=20, verbose_name='Тип расписания')),
+                ('interval_seconds', models.PositiveIntegerField(blank=True, null=True, verbose_name='Интервал, сек')),
+                ('cron', models.CharField(blank=True, default='', max_length=100, verbose_name='Расписание cron')),
+                ('jitter_seconds', models.PositiveIntegerField(default=0, verbose_name='Случайная задержка, сек')),
+                ('timeout_seconds', models.PositiveIntegerField(default=600, verbose_name='Максимальная длительность, сек')),
+                ('next_run_at', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Следующий запуск')),
+                ('running_until', models.DateTimeField(blank=True, null=True, verbose_name='Захвачена до')),
+                ('last_started_at', models.DateTimeField(blank=True, null=True, verbose_name='Последний запуск')),
+                ('last_finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Последнее завершение')),
+                ('last_status', models.CharField(blank=True, choices=[('running', 'Выполняется'), ('success', 'Выполнена'), ('failed', 'Ошибка')], default='', max_length=20, verbose_name='Последний статус')),
+                ('last_duration', models.FloatField(blank=True, null=True, verbose_name='Длительность, сек')),
+                ('last_result', models.JSONField(blank=True, null=True, verbose_name='Последний результат')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Последняя ошибка')),
+                ('run_count', models.PositiveIntegerField(default=0, verbose_name='Запусков')),
+                ('failure_count', models.PositiveIntegerField(default=0, verbose_name='Ошибок')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Периодическая задача',
+                'verbose_name_plural': 'Периодические задачи',
+                'ordering': ['name'],
+            },
+        ),
+    ]
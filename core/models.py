@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.core.cache import cache
 from django.contrib.auth.models import User
 from django_cryptography.fields import encrypt
 
@@ -23,6 +26,44 @@ class Profile(models.Model):
     def is_admin(self):
         return self.role == 'admin'
 
+    # Флаг force_password_change кэшируется, чтобы ForcePasswordChangeMiddleware
+    # не обращалась к БД на каждом запросе. Кэш обновляется при сохранении профиля
+    # (см. _sync_force_password_change_cache), TTL - страховка для нескольких процессов.
+    FORCE_PASSWORD_CHANGE_CACHE_KEY = 'profile:force_password_change:{user_id}'
+    FORCE_PASSWORD_CHANGE_CACHE_TIMEOUT = 300
+
+    @classmethod
+    def needs_password_change(cls, user_id):
+        """Возвращает флаг force_password_change пользователя (из кэша, при промахе - из БД)"""
+        key = cls.FORCE_PASSWORD_CHANGE_CACHE_KEY.format(user_id=user_id)
+        value = cache.get(key)
+        if value is None:
+            value = cls.objects.filter(user_id=user_id).values_list('force_password_change', flat=True).first()
+            # Отсутствие профиля кэшируем как False
+            value = bool(value)
+            cache.set(key, value, cls.FORCE_PASSWORD_CHANGE_CACHE_TIMEOUT)
+        return value
+
+    @classmethod
+    def invalidate_password_change_cache(cls, user_id):
+        """Сбрасывает закэшированный флаг force_password_change пользователя"""
+        cache.delete(cls.FORCE_PASSWORD_CHANGE_CACHE_KEY.format(user_id=user_id))
+
+
+@receiver(post_save, sender=Profile)
+def _sync_force_password_change_cache(sender, instance, **kwargs):
+    """Записывает актуальный флаг в кэш при любом сохранении профиля (views, админка)"""
+    cache.set(
+        Profile.FORCE_PASSWORD_CHANGE_CACHE_KEY.format(user_id=instance.user_id),
+        bool(instance.force_password_change),
+        Profile.FORCE_PASSWORD_CHANGE_CACHE_TIMEOUT
+    )
+
+
+@receiver(post_delete, sender=Profile)
+def _drop_force_password_change_cache(sender, instance, **kwargs):
+    Profile.invalidate_password_change_cache(instance.user_id)
+
 class SystemSettings(models.Model):
     key = models.CharField(max_length=255, unique=True)
     value = models.TextField()
@@ -49,4 +90,85 @@ class SystemSettings(models.Model):
         if not created:
             setting.value = value
             setting.description = description
-            setting.save()
\ No newline at end of file
+            setting.save()
+
+class ScheduledTask(models.Model):
+    """Периодическая задача встроенного планировщика (manage.py scheduler)"""
+    SCHEDULE_INTERVAL = 'interval'
+    SCHEDULE_CRON = 'cron'
+    SCHEDULE_CHOICES = [
+        (SCHEDULE_INTERVAL, 'Интервал'),
+        (SCHEDULE_CRON, 'Расписание cron'),
+    ]
+
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_SUCCESS, 'Выполнена'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    name = models.CharField(max_length=255, unique=True, verbose_name='Название')
+    # Ключ из core.scheduler.TASK_REGISTRY
+    task = models.CharField(max_length=100, verbose_name='Задача')
+    params = models.JSONField(default=dict, blank=True, verbose_name='Параметры')
+    enabled = models.BooleanField(default=True, verbose_name='Включена')
+    schedule_type = models.CharField(max_length=20, choices=SCHEDULE_CHOICES, default=SCHEDULE_INTERVAL, verbose_name='Тип расписания')
+    interval_seconds = models.PositiveIntegerField(null=True, blank=True, verbose_name='Интервал, сек')
+    cron = models.CharField(max_length=100, blank=True, default='', verbose_name='Расписание cron')
+    jitter_seconds = models.PositiveIntegerField(default=0, verbose_name='Случайная задержка, сек')
+    # Время, на которое задача захватывается при запуске (защита от повторного запуска)
+    timeout_seconds = models.PositiveIntegerField(default=600, verbose_name='Максимальная длительность, сек')
+    next_run_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name='Следующий запуск')
+    running_until = models.DateTimeField(null=True, blank=True, verbose_name='Захвачена до')
+    last_started_at = models.DateTimeField(null=True, blank=True, verbose_name='Последний запуск')
+    last_finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Последнее завершение')
+    last_status = models.CharField(max_length=20, choices=STATUS_CHOICES, blank=True, default='', verbose_name='Последний статус')
+    last_duration = models.FloatField(null=True, blank=True, verbose_name='Длительность, сек')
+    last_result = models.JSONField(null=True, blank=True, verbose_name='Последний результат')
+    last_error = models.TextField(blank=True, default='', verbose_name='Последняя ошибка')
+    run_count = models.PositiveIntegerField(default=0, verbose_name='Запусков')
+    failure_count = models.PositiveIntegerField(default=0, verbose_name='Ошибок')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Периодическая задача'
+        verbose_name_plural = 'Периодические задачи'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def schedule_display(self):
+        if self.schedule_type == self.SCHEDULE_CRON:
+            return f'cron: {self.cron}'
+        return f'каждые {self.interval_seconds} сек'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'task': self.task,
+            'params': self.params,
+            'enabled': self.enabled,
+            'schedule_type': self.schedule_type,
+            'interval_seconds': self.interval_seconds,
+            'cron': self.cron,
+            'schedule': self.schedule_display(),
+            'jitter_seconds': self.jitter_seconds,
+            'timeout_seconds': self.timeout_seconds,
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None,
+            'running': self.last_status == self.STATUS_RUNNING,
+            'last_started_at': self.last_started_at.isoformat() if self.last_started_at else None,
+            'last_finished_at': self.last_finished_at.isoformat() if self.last_finished_at else None,
+            'last_status': self.last_status,
+            'last_status_display': self.get_last_status_display() if self.last_status else '',
+            'last_duration': self.last_duration,
+            'last_result': self.last_result,
+            'last_error': self.last_error,
+            'run_count': self.run_count,
+            'failure_count': self.failure_count,
+        }
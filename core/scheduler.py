@@ -0,0 +1,338 @@
+"""
+Встроенный планировщик периодических задач
+
+Задачи хранятся в таблице ScheduledTask и выполняются командой
+manage.py scheduler (без cron и внешних брокеров). Расписание - интервал в
+секундах или выражение cron из пяти полей (минута, час, день, месяц, день недели)
+в часовом поясе приложения.
+
+Задачи с одинаковым интервалом разносятся по времени равномерно: каждая получает
+свой сдвиг внутри интервала, поэтому десятки задач опроса разных RAS не
+запускаются одновременно. Дополнительно к каждому запуску можно добавить
+случайную задержку (jitter_seconds). Задачи, опрашивающие все подключения
+(session_events, connections_health), распределяют команды к разным RAS и
+внутри одного запуска (параметр spread_seconds).
+
+Повторный запуск исключается захватом строки задачи: running_until
+устанавливается условным UPDATE, который выполнится только в одном процессе
+планировщика. Если процесс завершился аварийно, захват истекает через
+timeout_seconds.
+"""
+import json
+import logging
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import ScheduledTask
+
+logger = logging.getLogger(__name__)
+
+# Задачи, которые можно запускать по расписанию: ключ -> функция, описание, интервал по умолчанию (сек).
+# Параметры задачи (ScheduledTask.params) передаются в функцию как именованные аргументы.
+TASK_REGISTRY = {
+    'process_watchdog': {
+        'func': 'clusters.process_watchdog.run_watchdog',
+        'title': 'Контроль рабочих процессов',
+        'interval': 60,
+    },
+    'session_reaper': {
+        'func': 'clusters.session_reaper.run_reaper',
+        'title': 'Завершение простаивающих сеансов',
+        'interval': 300,
+    },
+    'session_events': {
+        'func': 'clusters.session_events.collect_session_events',
+        'title': 'Журнал сеансов',
+        'interval': 15,
+    },
+    'connections_health': {
+        'func': 'clusters.rac_health.refresh_health',
+        'title': 'Проверка доступности RAS',
+        'interval': 30,
+    },
+}
+
+# Поля cron: (минимум, максимум); день недели 0 и 7 - воскресенье
+CRON_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+# Предел перебора при поиске следующего запуска (около пяти лет по дням)
+CRON_SEARCH_LIMIT = 50000
+
+# Задачи, выполняющиеся в этом процессе (захват в БД мог истечь раньше окончания)
+_running = set()
+_running_lock = threading.Lock()
+
+
+def _cron_int(value, text):
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'Некорректное поле cron: {text}')
+
+
+def _parse_cron_field(text, low, high):
+    values = set()
+    for part in text.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            step = _cron_int(step_text, text)
+            if step < 1:
+                raise ValueError(f'Некорректный шаг в поле cron: {text}')
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start_text, end_text = part.split('-', 1)
+            start, end = _cron_int(start_text, text), _cron_int(end_text, text)
+        else:
+            start = _cron_int(part, text)
+            # 5/15 - с 5 до конца диапазона с шагом 15
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f'Значение вне диапазона {low}-{high} в поле cron: {text}')
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Расписание cron из пяти полей: минута, час, день месяца, месяц, день недели"""
+    __slots__ = ('minutes', 'hours', 'days', 'months', 'weekdays', 'any_day', 'any_weekday')
+
+    def __init__(self, expression):
+        fields = (expression or '').split()
+        if len(fields) != 5:
+            raise ValueError('Расписание cron должно состоять из пяти полей: минута час день месяц день_недели')
+        parsed = [_parse_cron_field(field, low, high) for field, (low, high) in zip(fields, CRON_RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def _day_matches(self, day):
+        day_ok = day.day in self.days
+        weekday_ok = day.isoweekday() % 7 in self.weekdays
+        # Как в cron: если ограничены и день месяца, и день недели - достаточно любого
+        if self.any_day and self.any_weekday:
+            return True
+        if self.any_day:
+            return weekday_ok
+        if self.any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment):
+        """Возвращает ближайшее время запуска строго после moment (aware datetime)"""
+        local = timezone.localtime(moment).replace(tzinfo=None, second=0, microsecond=0)
+        candidate = local + timedelta(minutes=1)
+        for _ in range(CRON_SEARCH_LIMIT):
+            if candidate.month not in self.months:
+                year = candidate.year + candidate.month // 12
+                candidate = datetime(year, candidate.month % 12 + 1, 1)
+            elif not self._day_matches(candidate):
+                candidate = datetime(candidate.year, candidate.month, candidate.day) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                later = [m for m in self.minutes if m > candidate.minute]
+                if later:
+                    candidate = candidate.replace(minute=min(later))
+                else:
+                    candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            else:
+                return timezone.make_aware(candidate)
+        raise ValueError('Расписание cron не содержит ни одного допустимого времени')
+
+
+def validate_task(task):
+    """
+    Проверяет задачу перед сохранением.
+
+    Raises:
+        ValueError: Неизвестная задача или некорректное расписание
+    """
+    if task.task not in TASK_REGISTRY:
+        raise ValueError(f'Неизвестная задача: {task.task}')
+    if not isinstance(task.params, dict):
+        raise ValueError('Параметры задачи должны быть объектом')
+    if task.schedule_type == ScheduledTask.SCHEDULE_CRON:
+        # Выражение, которое никогда не срабатывает (например, 0 0 31 2 *), тоже ошибка
+        CronSchedule(task.cron).next_after(timezone.now())
+    elif task.schedule_type == ScheduledTask.SCHEDULE_INTERVAL:
+        if not task.interval_seconds or task.interval_seconds < 1:
+            raise ValueError('Интервал должен быть не меньше 1 секунды')
+    else:
+        raise ValueError(f'Неизвестный тип расписания: {task.schedule_type}')
+
+
+def interval_phases(tasks):
+    """
+    Сдвиги запусков внутри интервала: задачи с одинаковым интервалом
+    распределяются по нему равномерно (в порядке id).
+
+    Returns:
+        dict: {task.id: сдвиг в секундах}
+    """
+    groups = {}
+    for task in tasks:
+        if task.schedule_type == ScheduledTask.SCHEDULE_INTERVAL and task.interval_seconds:
+            groups.setdefault(task.interval_seconds, []).append(task.id)
+    phases = {}
+    for interval, ids in groups.items():
+        ids.sort()
+        for index, task_id in enumerate(ids):
+            phases[task_id] = index * interval / len(ids)
+    return phases
+
+
+def compute_next_run(task, now, phase=0.0):
+    """Время следующего запуска после now с учётом сдвига и случайной задержки"""
+    if task.schedule_type == ScheduledTask.SCHEDULE_CRON:
+        next_run = CronSchedule(task.cron).next_after(now)
+    else:
+        interval = task.interval_seconds
+        # Запуски привязаны к сетке (k * interval + phase), поэтому не накапливают сдвиг
+        slot = math.floor((now.timestamp() - phase) / interval) + 1
+        next_run = datetime.fromtimestamp(slot * interval + phase, tz=dt_timezone.utc)
+    if task.jitter_seconds:
+        next_run += timedelta(seconds=random.uniform(0, task.jitter_seconds))
+    return next_run
+
+
+def _claim(task, now, next_run=None):
+    """Захватывает задачу для выполнения; False - её уже выполняет другой процесс"""
+    values = {
+        'running_until': now + timedelta(seconds=task.timeout_seconds),
+        'last_started_at': now,
+        'last_status': ScheduledTask.STATUS_RUNNING,
+    }
+    if next_run is not None:
+        values['next_run_at'] = next_run
+    claimed = ScheduledTask.objects.filter(id=task.id).filter(
+        Q(running_until__isnull=True) | Q(running_until__lt=now)
+    ).update(**values)
+    return claimed == 1
+
+
+def _json_safe(value):
+    return json.loads(json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False, default=str))
+
+
+def execute(task):
+    """Выполняет захваченную задачу и записывает результат"""
+    started = time.monotonic()
+    result = None
+    error = ''
+    try:
+        func = import_string(TASK_REGISTRY[task.task]['func'])
+        result = func(**(task.params or {}))
+        # Функции задач возвращают {'success': ..., ...}; success=False считается ошибкой
+        failed = isinstance(result, dict) and result.get('success') is False
+        if failed:
+            error = str(result.get('error') or 'Задача завершилась с ошибкой')
+    except Exception as e:
+        logger.exception(f"Scheduled task {task.name} failed")
+        failed = True
+        error = str(e)
+    finally:
+        with _running_lock:
+            _running.discard(task.id)
+
+    try:
+        ScheduledTask.objects.filter(id=task.id).update(
+            running_until=None,
+            last_finished_at=timezone.now(),
+            last_status=ScheduledTask.STATUS_FAILED if failed else ScheduledTask.STATUS_SUCCESS,
+            last_duration=round(time.monotonic() - started, 3),
+            last_result=_json_safe(result),
+            last_error=error,
+            run_count=F('run_count') + 1,
+            failure_count=F('failure_count') + (1 if failed else 0)
+        )
+    finally:
+        # Задачи выполняются в потоках пула - закрываем соединение с БД потока
+        connection.close()
+    return not failed
+
+
+def run_due(now=None, submit=None):
+    """
+    Запускает задачи, время которых наступило.
+
+    Args:
+        now: Текущее время
+        submit: Функция запуска (например, executor.submit); по умолчанию - выполнение в текущем потоке
+
+    Returns:
+        list: Запущенные задачи
+    """
+    now = now or timezone.now()
+    tasks = list(ScheduledTask.objects.filter(enabled=True))
+    phases = interval_phases(tasks)
+    started = []
+
+    for task in tasks:
+        if task.task not in TASK_REGISTRY:
+            continue
+        try:
+            if task.next_run_at is None:
+                # Новая задача: первый запуск - в её слот сетки
+                next_run = compute_next_run(task, now, phases.get(task.id, 0.0))
+                ScheduledTask.objects.filter(id=task.id).update(next_run_at=next_run)
+                continue
+            if task.next_run_at > now:
+                continue
+            with _running_lock:
+                if task.id in _running:
+                    continue
+            next_run = compute_next_run(task, now, phases.get(task.id, 0.0))
+        except ValueError as e:
+            logger.error(f"Scheduled task {task.name} has invalid schedule: {e}")
+            continue
+
+        if not _claim(task, now, next_run):
+            continue
+        with _running_lock:
+            _running.add(task.id)
+        started.append(task)
+        if submit:
+            submit(execute, task)
+        else:
+            execute(task)
+
+    return started
+
+
+def run_now(task):
+    """
+    Выполняет задачу немедленно в текущем потоке (если её не выполняет другой процесс).
+
+    Returns:
+        bool | None: Результат выполнения; None - задача уже выполняется
+    """
+    if not _claim(task, timezone.now()):
+        return None
+    with _running_lock:
+        _running.add(task.id)
+    return execute(task)
+
+
+def install_defaults():
+    """Создаёт записи для всех задач реестра, которых ещё нет в таблице; возвращает созданные"""
+    existing = set(ScheduledTask.objects.values_list('task', flat=True))
+    created = []
+    for key, spec in TASK_REGISTRY.items():
+        if key in existing:
+            continue
+        created.append(ScheduledTask.objects.create(
+            name=spec['title'],
+            task=key,
+            schedule_type=ScheduledTask.SCHEDULE_INTERVAL,
+            interval_seconds=spec['interval']
+        ))
+    return created
@@ -4,4 +4,7 @@ from . import views
 urlpatterns = [
     path('settings/', views.system_settings, name='system_settings'),
     path('settings/update/', views.update_setting, name='update_setting'),
+    path('scheduler/tasks/', views.scheduler_tasks, name='scheduler_tasks'),
+    path('scheduler/tasks/save/', views.save_scheduled_task, name='save_scheduled_task'),
+    path('scheduler/tasks/<int:task_id>/delete/', views.delete_scheduled_task, name='delete_scheduled_task'),
 ]
\ No newline at end of file
@@ -5,8 +5,10 @@ from django.shortcuts import render, redirect
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import update_session_auth_hash
-from .models import SystemSettings, Profile
+from django.utils import timezone
+from .models import SystemSettings, Profile, ScheduledTask
 from .forms import ForcePasswordChangeForm
+from . import scheduler
 
 @login_required
 def system_settings(request):
@@ -122,4 +124,89 @@ def force_password_change(request):
         'form': form,
         'subject_to_policy': subject_to_policy,
         'policy_info': policy_info
-    })
\ No newline at end of file
+    })
+
+
+def _is_admin(user):
+    try:
+        return Profile.objects.get(user=user).is_admin()
+    except Profile.DoesNotExist:
+        return False
+
+
+@login_required
+def scheduler_tasks(request):
+    """Возвращает периодические задачи и результаты их последних запусков (только для админов)"""
+    if not _is_admin(request.user):
+        return JsonResponse({'success': False, 'error': 'Доступ запрещен'})
+
+    return JsonResponse({
+        'success': True,
+        'tasks': [task.to_dict() for task in ScheduledTask.objects.all()],
+        'registry': {key: spec['title'] for key, spec in scheduler.TASK_REGISTRY.items()},
+        'now': timezone.now().isoformat(),
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+@csrf_exempt
+def save_scheduled_task(request):
+    """
+    Создаёт (без id) или изменяет периодическую задачу (только для админов).
+
+    run_now=true - запустить задачу при следующем опросе планировщика.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'})
+    if not _is_admin(request.user):
+        return JsonResponse({'success': False, 'error': 'Доступ запрещен'})
+
+    try:
+        data = json.loads(request.body)
+        task = ScheduledTask.objects.get(id=data['id']) if data.get('id') else ScheduledTask()
+
+        for field in ('name', 'task', 'schedule_type', 'cron'):
+            if field in data:
+                setattr(task, field, (data[field] or '').strip())
+        for field in ('interval_seconds', 'jitter_seconds', 'timeout_seconds'):
+            if field in data:
+                setattr(task, field, int(data[field]) if data[field] not in (None, '') else None)
+        if 'enabled' in data:
+            task.enabled = bool(data['enabled'])
+        if 'params' in data:
+            task.params = data['params'] or {}
+        if task.jitter_seconds is None:
+            task.jitter_seconds = 0
+        if not task.timeout_seconds:
+            task.timeout_seconds = 600
+
+        if not task.name:
+            return JsonResponse({'success': False, 'error': 'Название задачи обязательно'}, json_dumps_params={'ensure_ascii': False})
+        scheduler.validate_task(task)
+
+        # Изменённое расписание вступает в силу сразу, а не после следующего запуска
+        task.next_run_at = timezone.now() if data.get('run_now') else None
+        task.save()
+        return JsonResponse({'success': True, 'task': task.to_dict()}, json_dumps_params={'ensure_ascii': False})
+
+    except ScheduledTask.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Задача не найдена'}, json_dumps_params={'ensure_ascii': False})
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+@csrf_exempt
+def delete_scheduled_task(request, task_id):
+    """Удаляет периодическую задачу (только для админов)"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Only POST allowed'})
+    if not _is_admin(request.user):
+        return JsonResponse({'success': False, 'error': 'Доступ запрещен'})
+
+    deleted, _ = ScheduledTask.objects.filter(id=task_id).delete()
+    if not deleted:
+        return JsonResponse({'success': False, 'error': 'Задача не найдена'}, json_dumps_params={'ensure_ascii': False})
+    return JsonResponse({'success': True})
@@ -66,11 +66,54 @@ async function loadConnections() {
             // Обратная совместимость: если папок нет, передаем пустой массив
             renderConnectionsTree(data.connections, []);
         }
+        
+        // Проверяем доступность RAS в фоне, не задерживая отрисовку дерева
+        if (data.connections && data.connections.length) {
+            loadConnectionsHealth();
+        }
     } catch (error) {
         showNotification('Ошибка загрузки подключений: ' + error.message, true);
     }
 }
 
+/**
+ * Загрузить состояние доступности RAS и отметить недоступные подключения
+ * @param {boolean} refresh - Проверить заново, не используя кэш сервера
+ */
+async function loadConnectionsHealth(refresh = false) {
+    try {
+        const response = await fetch(`/api/clusters/connections/health/${refresh ? '?refresh=true' : ''}`);
+        const data = await response.json();
+        if (!data.success) return;
+        
+        Object.entries(data.health).forEach(([connectionId, health]) => {
+            document.querySelectorAll(`.connection-node[data-connection-id="${connectionId}"]`).forEach(node => {
+                applyConnectionHealth(node, health);
+            });
+        });
+    } catch (error) {
+        console.warn('Ошибка проверки доступности подключений:', error);
+    }
+}
+
+/**
+ * Отметить узел подключения по результату проверки доступности
+ * @param {HTMLElement} node - Узел подключения
+ * @param {Object|null} health - Результат проверки ({status, latency_ms, error})
+ */
+function applyConnectionHealth(node, health) {
+    if (!health) return;
+    const unavailable = health.status === 'down' || health.breaker === 'open';
+    node.classList.toggle('connection-unavailable', unavailable);
+    if (unavailable) {
+        node.title = `RAS недоступен${health.error ? ': ' + health.error : ''}`;
+    } else if (health.latency_ms !== null && health.latency_ms !== undefined) {
+        node.title = `RAS доступен (${health.latency_ms} мс)`;
+    } else {
+        node.title = '';
+    }
+}
+
 /**
  * Отрисовать дерево подключений в боковой панели
  * @param {Array} connections - Массив подключений
@@ -272,6 +315,7 @@ function createConnectionNode(conn, selectionMode, folderId) {
         node.style.paddingLeft = '2rem';
     }
     node.dataset.folderId = folderId || '';
+    node.dataset.connectionId = conn.id;
     
     if (selectionMode) {
         // Режим выбора - показываем чекбокс
@@ -310,6 +354,9 @@ function createConnectionNode(conn, selectionMode, folderId) {
         initDragDrop(node, 'connection', conn.id);
     }
     
+    // Последний известный результат проверки доступности (из кэша сервера)
+    applyConnectionHealth(node, conn.health);
+    
     return node;
 }
 
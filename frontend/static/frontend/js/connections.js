@@ -718,6 +718,8 @@ async function terminateSelectedSessions(connectionId, clusterUuid, sessionUuids
             connection_id: connectionId,
             cluster_uuid: clusterUuid,
             session_uuids: sessionUuids,
+            // Массовое завершение выполняется фоновой задачей с прогрессом
+            background: count > 1,
             ...adminParams
         };
         
@@ -730,7 +732,10 @@ async function terminateSelectedSessions(connectionId, clusterUuid, sessionUuids
             body: JSON.stringify(requestData)
         });
         
-        const result = await response.json();
+        let result = await response.json();
+        if (result.success && result.job_id) {
+            result = await waitForJob(result.job_id);
+        }
         
         if (result.success) {
             const failed = result.results.filter(r => !r.success);
@@ -2454,6 +2459,8 @@ async function saveCreateInfobase(connectionId, clusterUuid) {
         // Добавляем учетные данные администратора кластера
         const adminParams = addClusterAdminParams('', connectionId, clusterUuid, 'POST');
         Object.assign(data, adminParams);
+        // Создание базы данных на сервере СУБД может быть долгим - выполняем фоновой задачей
+        data.background = data.create_database === true;
         
         const response = await fetch(`/api/clusters/infobases/${connectionId}/${clusterUuid}/create/`, {
             method: 'POST',
@@ -2464,7 +2471,10 @@ async function saveCreateInfobase(connectionId, clusterUuid) {
             body: JSON.stringify(data)
         });
         
-        const result = await response.json();
+        let result = await response.json();
+        if (result.success && result.job_id) {
+            result = await waitForJob(result.job_id);
+        }
         
         if (result.success) {
             showNotification('✅ Информационная база успешно создана', false);
@@ -3253,6 +3263,8 @@ async function confirmDeleteInfobase(connectionId, clusterUuid, infobaseUuid, in
             infobase_uuid: infobaseUuid,
             drop_database: dropDatabase,
             clear_database: clearDatabase,
+            // Удаление или очистка базы данных на сервере СУБД выполняется фоновой задачей
+            background: dropDatabase || clearDatabase,
             ...adminParams
         };
         
@@ -3265,7 +3277,10 @@ async function confirmDeleteInfobase(connectionId, clusterUuid, infobaseUuid, in
             body: JSON.stringify(requestData)
         });
         
-        const result = await response.json();
+        let result = await response.json();
+        if (result.success && result.job_id) {
+            result = await waitForJob(result.job_id);
+        }
         
         if (result.success) {
             showNotification('✅ Информационная база успешно удалена', false);
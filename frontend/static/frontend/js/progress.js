@@ -218,3 +218,71 @@ async function fetchJSONWithProgress(url, options = {}) {
     };
 })();
 
+
+// ============================================
+// Фоновые задачи
+// ============================================
+
+/**
+ * Показать прогресс фоновой задачи (в процентах) в прогресс-баре
+ * @param {number} percent - Процент выполнения
+ */
+function setProgressPercent(percent) {
+    const progressLine = document.getElementById('progressLine');
+    if (!progressLine) {
+        return;
+    }
+    progressLine.style.animation = 'none';
+    progressLine.style.width = `${Math.max(0, Math.min(100, percent))}%`;
+}
+
+/**
+ * Вернуть прогресс-бар в неопределённый режим
+ */
+function resetProgressPercent() {
+    const progressLine = document.getElementById('progressLine');
+    if (!progressLine) {
+        return;
+    }
+    progressLine.style.width = '100%';
+    progressLine.style.animation = 'progressAnimation 1.5s linear infinite';
+}
+
+/**
+ * Дождаться завершения фоновой задачи, периодически опрашивая её состояние
+ * @param {number} jobId - ID задачи, полученный от API
+ * @param {Object} options - { interval: мс между опросами, onProgress: callback(job) }
+ * @returns {Promise<Object>} - Результат задачи (формат как у синхронного ответа API)
+ */
+async function waitForJob(jobId, options = {}) {
+    const interval = options.interval || 1000;
+    
+    try {
+        while (true) {
+            const response = await fetch(`/api/clusters/jobs/${jobId}/`);
+            const data = await response.json();
+            
+            if (!data.success) {
+                return { success: false, error: data.error || 'Задача не найдена' };
+            }
+            
+            const job = data.job;
+            setProgressPercent(job.progress);
+            
+            if (options.onProgress) {
+                options.onProgress(job);
+            }
+            
+            if (job.finished) {
+                if (job.status === 'success') {
+                    return job.result || { success: true };
+                }
+                return { success: false, error: job.error || (job.result && job.result.error) || 'Ошибка выполнения задачи' };
+            }
+            
+            await new Promise(resolve => setTimeout(resolve, interval));
+        }
+    } finally {
+        resetProgressPercent();
+    }
+}
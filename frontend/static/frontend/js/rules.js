@@ -766,6 +766,8 @@ async function saveApplyRules() {
         const adminParams = addClusterAdminParams('', currentRulesConnectionId, currentRulesClusterUuid, 'POST');
         const requestData = {
             full: full,
+            // Полное применение может длиться дольше таймаута запроса - выполняем фоновой задачей
+            background: full,
             ...adminParams
         };
         
@@ -792,7 +794,10 @@ async function saveApplyRules() {
             throw new Error('Сервер вернул не JSON ответ');
         }
         
-        const result = await response.json();
+        let result = await response.json();
+        if (result.success && result.job_id) {
+            result = await waitForJob(result.job_id);
+        }
         
         if (result.success) {
             showNotification('✅ Требования применены', false);
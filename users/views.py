@@ -5,6 +5,9 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib.auth import update_session_auth_hash
+from django.db import transaction
+from django.core.paginator import Paginator, EmptyPage
+from django.db.models import Count, Q, Prefetch
 from core.models import Profile
 from .models import UserGroup
 
@@ -18,6 +21,10 @@ def check_last_admin_protection(user_to_modify, exclude_user=None):
     """
     Проверяет, останется ли хотя бы один активный администратор после операции.
     
+    Выполняется одним агрегирующим запросом: в нём одновременно определяется,
+    является ли пользователь администратором, и подсчитываются оставшиеся
+    активные администраторы.
+    
     Args:
         user_to_modify: Пользователь, которого планируется удалить/заблокировать/изменить роль
         exclude_user: Пользователь, которого нужно исключить из проверки (опционально)
@@ -27,38 +34,100 @@ def check_last_admin_protection(user_to_modify, exclude_user=None):
         - is_protected: True если операция заблокирована (последний админ)
         - message: Сообщение об ошибке или None
     """
-    try:
-        user_profile = Profile.objects.get(user=user_to_modify)
-        
-        # Если пользователь не администратор, защита не нужна
-        if not user_profile.is_admin():
-            return (False, None)
-        
-        # Подсчитываем активных администраторов
-        admin_profiles = Profile.objects.filter(role='admin')
-        active_admins = [p for p in admin_profiles if p.user.is_active]
-        
-        # Исключаем пользователя, которого планируется изменить
-        active_admins = [p for p in active_admins if p.user.id != user_to_modify.id]
-        
-        # Исключаем дополнительного пользователя, если указан
-        if exclude_user:
-            active_admins = [p for p in active_admins if p.user.id != exclude_user.id]
-        
-        # Если не осталось активных администраторов - блокируем операцию
-        if len(active_admins) == 0:
-            return (True, 'Невозможно выполнить операцию: в системе должен остаться хотя бы один активный администратор.')
-        
-        return (False, None)
-        
-    except Profile.DoesNotExist:
-        # Если профиля нет, пользователь не администратор
+    # Остальные активные администраторы (кроме изменяемого и исключённого пользователя)
+    remaining_filter = Q(role='admin', user__is_active=True) & ~Q(user_id=user_to_modify.id)
+    if exclude_user:
+        remaining_filter &= ~Q(user_id=exclude_user.id)
+    
+    stats = Profile.objects.aggregate(
+        is_target_admin=Count('id', filter=Q(user_id=user_to_modify.id, role='admin')),
+        remaining_admins=Count('id', filter=remaining_filter),
+    )
+    
+    # Если пользователь не администратор (или у него нет профиля), защита не нужна
+    if not stats['is_target_admin']:
         return (False, None)
+    
+    # Если не осталось активных администраторов - блокируем операцию
+    if stats['remaining_admins'] == 0:
+        return (True, 'Невозможно выполнить операцию: в системе должен остаться хотя бы один активный администратор.')
+    
+    return (False, None)
+
+def _paginate(request, queryset):
+    """
+    Применяет к выборке параметры постраничного вывода из GET-запроса.
+    
+    Параметры запроса:
+        page: номер страницы (с 1). Если не указан, возвращается вся выборка.
+        page_size: размер страницы (по умолчанию 50, максимум 500)
+    
+    Returns:
+        tuple: (items, pagination)
+        - items: объекты текущей страницы (или вся выборка)
+        - pagination: словарь с информацией о страницах или None, если постраничный вывод не запрошен
+    """
+    page = request.GET.get('page')
+    if not page:
+        return queryset, None
+    
+    try:
+        page_number = max(1, int(page))
+    except (ValueError, TypeError):
+        page_number = 1
+    try:
+        page_size = int(request.GET.get('page_size', 50))
+    except (ValueError, TypeError):
+        page_size = 50
+    page_size = max(1, min(page_size, 500))
+    
+    paginator = Paginator(queryset, page_size)
+    try:
+        page_obj = paginator.page(page_number)
+    except EmptyPage:
+        page_obj = paginator.page(paginator.num_pages)
+    
+    return page_obj.object_list, {
+        'page': page_obj.number,
+        'page_size': page_size,
+        'total': paginator.count,
+        'num_pages': paginator.num_pages,
+    }
+
+def _serialize_user(user, user_profile):
+    """Формирует данные пользователя для ответа"""
+    if user_profile is not None:
+        role = user_profile.role
+        last_login_at = user_profile.last_login_at.isoformat() if user_profile.last_login_at else None
+        subject_to_password_policy = user_profile.subject_to_password_policy
+    else:
+        role = 'user'
+        last_login_at = None
+        subject_to_password_policy = True
+    
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_active': user.is_active,
+        'role': role,
+        'subject_to_password_policy': subject_to_password_policy,
+        'last_login': user.last_login.isoformat() if user.last_login else None,
+        'last_login_at': last_login_at,
+        'date_joined': user.date_joined.isoformat(),
+    }
 
 @login_required
 def user_groups(request):
     """Возвращает список групп пользователя"""
-    user_groups = request.user.user_groups.all()
+    # Фильтр через подзапрос, чтобы Count учитывал всех участников, а не только текущего пользователя
+    user_groups = UserGroup.objects.filter(
+        id__in=request.user.user_groups.values('id')
+    ).select_related('created_by').annotate(
+        members_count=Count('members', distinct=True)
+    )
     groups_data = []
     
     for group in user_groups:
@@ -67,7 +136,7 @@ def user_groups(request):
             'name': group.name,
             'created_by': group.created_by.username,
             'created_at': group.created_at.isoformat(),
-            'members_count': group.members.count(),
+            'members_count': group.members_count,
         })
     
     return JsonResponse({'groups': groups_data})
@@ -96,70 +165,39 @@ def create_group(request):
 
 @login_required
 def user_list(request):
-    """Возвращает список всех пользователей (для админов) или данные текущего пользователя (для обычных пользователей)"""
+    """Возвращает список всех пользователей (для админов) или данные текущего пользователя (для обычных пользователей)
+    
+    Для админов поддерживаются параметры:
+        q: поиск по логину, имени, фамилии и email
+        page, page_size: постраничный вывод (см. _paginate)
+    """
     try:
         profile = Profile.objects.get(user=request.user)
         is_admin = profile.is_admin()
         
         # Если не админ, возвращаем только данные текущего пользователя
         if not is_admin:
-            user = request.user
-            try:
-                user_profile = Profile.objects.get(user=user)
-                role = user_profile.role
-                last_login_at = user_profile.last_login_at.isoformat() if user_profile.last_login_at else None
-                subject_to_password_policy = user_profile.subject_to_password_policy
-            except Profile.DoesNotExist:
-                role = 'user'
-                last_login_at = None
-                subject_to_password_policy = True
-            
-            user_data = [{
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'is_active': user.is_active,
-                'role': role,
-                'subject_to_password_policy': subject_to_password_policy,
-                'last_login': user.last_login.isoformat() if user.last_login else None,
-                'last_login_at': last_login_at,
-                'date_joined': user.date_joined.isoformat(),
-            }]
-            
-            return JsonResponse({'success': True, 'users': user_data})
+            return JsonResponse({'success': True, 'users': [_serialize_user(request.user, profile)]})
         
-        # Админ видит всех пользователей
-        users = User.objects.all()
-        user_data = []
+        # Админ видит всех пользователей (профили загружаются тем же запросом)
+        users = User.objects.select_related('profile').order_by('id')
         
-        for user in users:
-            try:
-                user_profile = Profile.objects.get(user=user)
-                role = user_profile.role
-                last_login_at = user_profile.last_login_at.isoformat() if user_profile.last_login_at else None
-                subject_to_password_policy = user_profile.subject_to_password_policy
-            except Profile.DoesNotExist:
-                role = 'user'
-                last_login_at = None
-                subject_to_password_policy = True
-            
-            user_data.append({
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'is_active': user.is_active,
-                'role': role,
-                'subject_to_password_policy': subject_to_password_policy,
-                'last_login': user.last_login.isoformat() if user.last_login else None,
-                'last_login_at': last_login_at,
-                'date_joined': user.date_joined.isoformat(),
-            })
+        search = request.GET.get('q', '').strip()
+        if search:
+            users = users.filter(
+                Q(username__icontains=search) |
+                Q(first_name__icontains=search) |
+                Q(last_name__icontains=search) |
+                Q(email__icontains=search)
+            )
+        
+        users, pagination = _paginate(request, users)
+        user_data = [_serialize_user(user, getattr(user, 'profile', None)) for user in users]
         
-        return JsonResponse({'success': True, 'users': user_data})
+        response = {'success': True, 'users': user_data}
+        if pagination:
+            response['pagination'] = pagination
+        return JsonResponse(response)
         
     except Profile.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Доступ запрещен'})
@@ -211,7 +249,12 @@ def create_user(request):
 
 @login_required
 def all_groups(request):
-    """Возвращает список всех групп (для админов) или группы текущего пользователя (для обычных пользователей)"""
+    """Возвращает список всех групп (для админов) или группы текущего пользователя (для обычных пользователей)
+    
+    Поддерживаются параметры:
+        q: поиск по названию группы
+        page, page_size: постраничный вывод (см. _paginate)
+    """
     try:
         profile = Profile.objects.get(user=request.user)
         is_admin = profile.is_admin()
@@ -219,25 +262,36 @@ def all_groups(request):
         return JsonResponse({'success': False, 'error': 'Доступ запрещен'})
     
     # Админы видят все группы, обычные пользователи - все группы (для отображения в модальном окне)
-    groups = UserGroup.objects.all()
+    # Количество подключений считается аннотацией, участники подгружаются одним запросом
+    groups = UserGroup.objects.select_related('created_by').annotate(
+        connections_count=Count('serverconnection', distinct=True)
+    ).prefetch_related(
+        Prefetch('members', queryset=User.objects.only('id', 'username').order_by('username'))
+    ).order_by('id')
+    
+    search = request.GET.get('q', '').strip()
+    if search:
+        groups = groups.filter(name__icontains=search)
+    
+    groups, pagination = _paginate(request, groups)
     group_data = []
     
     for group in groups:
-        # Подсчитываем количество подключений для этой группы
-        from clusters.models import ServerConnection
-        connections_count = ServerConnection.objects.filter(user_group=group).count()
-        
+        members = [{'id': m.id, 'username': m.username} for m in group.members.all()]
         group_data.append({
             'id': group.id,
             'name': group.name,
             'created_by': group.created_by.username,
             'created_at': group.created_at.isoformat(),
-            'members_count': group.members.count(),
-            'connections_count': connections_count,
-            'members': [{'id': m.id, 'username': m.username} for m in group.members.all()]
+            'members_count': len(members),
+            'connections_count': group.connections_count,
+            'members': members
         })
     
-    return JsonResponse({'success': True, 'groups': group_data})
+    response = {'success': True, 'groups': group_data}
+    if pagination:
+        response['pagination'] = pagination
+    return JsonResponse(response)
 
 @login_required
 @csrf_exempt
@@ -342,6 +396,8 @@ def change_password(request):
             # НЕ изменяем force_password_change - флаг должен оставаться как был
             # Флаг сбрасывается только когда пользователь сам меняет пароль
             # через страницу принудительной смены пароля (core/views.py:force_password_change)
+            # Закэшированный флаг сбрасываем, чтобы middleware перечитала его из БД
+            Profile.invalidate_password_change_cache(user.id)
             
             # Если админ меняет свой пароль, обновляем сессию
             if user.id == request.user.id:
@@ -652,6 +708,19 @@ def request_password_change(request):
     return JsonResponse({'success': False, 'error': 'Only POST allowed'})
 
 
+def _copy_connection(conn, user_group):
+    """Создаёт несохранённую копию подключения для bulk_create"""
+    from clusters.models import ServerConnection
+    
+    return ServerConnection(
+        user_group=user_group,
+        display_name=conn.display_name,
+        server_host=conn.server_host,
+        ras_port=conn.ras_port,
+        cluster_admin=conn.cluster_admin,
+        cluster_password=conn.cluster_password
+    )
+
 @login_required
 @csrf_exempt
 def copy_group(request):
@@ -674,24 +743,20 @@ def copy_group(request):
             date_str = datetime.now().strftime('%d.%m.%Y')
             new_name = f"{original_group.name} (копия {date_str})"
             
-            new_group = UserGroup.objects.create(
-                name=new_name,
-                created_by=request.user
-            )
-            
-            # Копируем все подключения к серверам 1С
-            connections_copied = 0
-            connections = ServerConnection.objects.filter(user_group=original_group)
-            for conn in connections:
-                ServerConnection.objects.create(
-                    user_group=new_group,
-                    display_name=conn.display_name,
-                    server_host=conn.server_host,
-                    ras_port=conn.ras_port,
-                    cluster_admin=conn.cluster_admin,
-                    cluster_password=conn.cluster_password
+            with transaction.atomic():
+                new_group = UserGroup.objects.create(
+                    name=new_name,
+                    created_by=request.user
                 )
-                connections_copied += 1
+                
+                # Копируем все подключения к серверам 1С одним bulk_create
+                connections = ServerConnection.objects.filter(user_group=original_group).order_by('id')
+                new_connections = [
+                    _copy_connection(conn, new_group)
+                    for conn in connections
+                ]
+                ServerConnection.objects.bulk_create(new_connections)
+                connections_copied = len(new_connections)
             
             # Пользователей НЕ копируем согласно ТЗ
             
@@ -744,55 +809,51 @@ def merge_groups(request):
             if groups.count() != len(group_ids):
                 return JsonResponse({'success': False, 'error': 'Некоторые группы не найдены'})
             
-            # Создаём новую группу
-            new_group = UserGroup.objects.create(
-                name=new_name,
-                created_by=request.user
-            )
-            
-            # Переносим/копируем подключения к серверам 1С
-            connections_copied = 0
-            existing_connections = set()  # Для избежания дубликатов
-            
-            for group in groups:
-                connections = ServerConnection.objects.filter(user_group=group)
+            with transaction.atomic():
+                # Создаём новую группу
+                new_group = UserGroup.objects.create(
+                    name=new_name,
+                    created_by=request.user
+                )
+                
+                # Переносим/копируем подключения к серверам 1С
+                # Все подключения выбираются одним запросом, дубликаты по host:port отсекаются множеством
+                connections = ServerConnection.objects.filter(
+                    user_group__in=groups
+                ).order_by('user_group_id', 'id')
+                existing_connections = set()  # Для избежания дубликатов
+                unique_connections = []
                 for conn in connections:
-                    # Проверяем на дубликаты по host:port
-                    conn_key = f"{conn.server_host}:{conn.ras_port}"
+                    conn_key = (conn.server_host, conn.ras_port)
                     if conn_key not in existing_connections:
                         existing_connections.add(conn_key)
-                        
-                        if delete_old_groups:
-                            # Переносим подключение (меняем группу)
-                            conn.user_group = new_group
-                            conn.save()
-                        else:
-                            # Копируем подключение
-                            ServerConnection.objects.create(
-                                user_group=new_group,
-                                display_name=conn.display_name,
-                                server_host=conn.server_host,
-                                ras_port=conn.ras_port,
-                                cluster_admin=conn.cluster_admin,
-                                cluster_password=conn.cluster_password
-                            )
-                        connections_copied += 1
-            
-            # Переносим пользователей если нужно
-            users_count = 0
-            if transfer_users:
-                all_users = set()
-                for group in groups:
-                    all_users.update(group.members.all())
+                        unique_connections.append(conn)
                 
-                for user in all_users:
-                    new_group.members.add(user)
-                users_count = len(all_users)
-            
-            # Удаляем старые группы если нужно
-            if delete_old_groups:
-                for group in groups:
-                    group.delete()
+                if delete_old_groups:
+                    # Переносим подключения (меняем группу одним UPDATE, без перешифровки паролей)
+                    ServerConnection.objects.filter(
+                        id__in=[conn.id for conn in unique_connections]
+                    ).update(user_group=new_group)
+                else:
+                    # Копируем подключения одним bulk_create
+                    ServerConnection.objects.bulk_create([
+                        _copy_connection(conn, new_group)
+                        for conn in unique_connections
+                    ])
+                connections_copied = len(unique_connections)
+                
+                # Переносим пользователей если нужно
+                users_count = 0
+                if transfer_users:
+                    member_ids = set(
+                        User.objects.filter(user_groups__in=groups).values_list('id', flat=True)
+                    )
+                    new_group.members.add(*member_ids)
+                    users_count = len(member_ids)
+                
+                # Удаляем старые группы если нужно
+                if delete_old_groups:
+                    groups.delete()
             
             message_parts = [f'Создана группа "{new_name}"']
             if connections_copied > 0: